@@ -0,0 +1,506 @@
+"""
+Cache backends.
+"""
+
+import heapq
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.config import settings, CacheBackendType
+
+
+logger = logging.getLogger(__name__)
+
+
+def _approximate_size(value: Any) -> int:
+    """Deep ``sys.getsizeof`` of a JSON-compatible value."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(
+            _approximate_size(key) + _approximate_size(item)
+            for key, item in value.items()
+        )
+    elif isinstance(value, (list, tuple)):
+        size += sum(_approximate_size(item) for item in value)
+    return size
+
+
+class CacheBackend:
+    """Interface shared by every cache backend.
+
+    Values must be JSON-compatible so that in-process and shared backends
+    are interchangeable. A value of ``None`` is never stored: ``get``
+    returning ``None`` always means a miss.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        raise NotImplementedError
+
+    def get_counters(self, keys: Iterable[str]) -> List[int]:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this backend.
+
+        Returns:
+        --------
+        dict
+            Backend name, hits, misses, hit rate and current entry count
+        """
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def counters(self) -> Dict[str, Optional[int]]:
+        """Return the hit, miss and entry counters in constant time.
+
+        Unlike ``stats``, this never walks the cached data, so it is safe
+        to call on every metrics scrape.
+
+        Returns:
+        --------
+        dict
+            Hits, misses and entries; ``entries`` is ``None`` when the
+            backend cannot count its entries without a scan
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": None}
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Size-bounded LRU cache with per-entry TTL, local to the process.
+
+    Counters (used for tag versions) live outside the LRU so that an
+    eviction can never roll a version back and resurrect stale entries;
+    they are only dropped once the TTL given to ``incr`` runs out.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10_000, default_ttl: Optional[float] = None):
+        super().__init__()
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._counter_expiry: Dict[str, float] = {}
+        self._expiry_heap: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def _expire_counters(self) -> None:
+        now = time.monotonic()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            # Skip heap items superseded by a later incr of the same key.
+            if self._counter_expiry.get(key) == expires_at:
+                del self._counter_expiry[key]
+                del self._counters[key]
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            self._expire_counters()
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            if ttl:
+                expires_at = time.monotonic() + ttl
+                self._counter_expiry[key] = expires_at
+                heapq.heappush(self._expiry_heap, (expires_at, key))
+            else:
+                self._counter_expiry.pop(key, None)
+            return value
+
+    def get_counters(self, keys: Iterable[str]) -> List[int]:
+        with self._lock:
+            self._expire_counters()
+            return [self._counters.get(key, 0) for key in keys]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+            self._counter_expiry.clear()
+            self._expiry_heap.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def counters(self) -> Dict[str, Optional[int]]:
+        counters = super().counters()
+        counters["entries"] = len(self._entries)
+        return counters
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the cached keys and values."""
+        with self._lock:
+            entries = list(self._entries.items())
+        return sum(
+            _approximate_size(key) + _approximate_size(value)
+            for key, (_, value) in entries
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["max_entries"] = self.max_entries
+        stats["evictions"] = self.evictions
+        stats["memory_bytes"] = self.memory_bytes()
+        return stats
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache stored in a Redis-compatible server shared by all workers.
+
+    Eviction is delegated to the server (configure ``maxmemory-policy
+    allkeys-lru``); TTLs are applied per key. Hit/miss counters are kept
+    per process.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self, client, prefix: str = "waitlist:", default_ttl: Optional[float] = None
+    ):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self._key(key))
+        self._record(raw is not None)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        px = int(ttl * 1000) if ttl else None
+        self.client.set(self._key(key), json.dumps(value), px=px)
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self._key(key) for key in keys))
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        key = self._key(f"counter:{key}")
+        if not ttl:
+            return int(self.client.incr(key))
+        pipeline = self.client.pipeline()
+        pipeline.incr(key)
+        pipeline.pexpire(key, int(ttl * 1000))
+        return int(pipeline.execute()[0])
+
+    def get_counters(self, keys: Iterable[str]) -> List[int]:
+        keys = [self._key(f"counter:{key}") for key in keys]
+        if not keys:
+            return []
+        return [
+            int(value) if value is not None else 0 for value in self.client.mget(keys)
+        ]
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}*"))
+
+
+class RedisChannel:
+    """Redis pub/sub channel shared by every worker.
+
+    Messages are JSON objects carrying an ``op``; each worker hands them to
+    the handler registered for that op and ignores the other ops and its
+    own messages. Several components can share one channel this way.
+
+    The listener thread is started by ``listen``, lazily, and again in a
+    forked worker, since threads do not survive a fork. Handlers run on
+    that thread.
+    """
+
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+        self._handlers: Dict[str, Callable[[dict], None]] = {}
+        self._listener = None
+        self._listener_pid = None
+        self._origin = None
+        self._origin_pid = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, op: str, handler: Callable[[dict], None]) -> None:
+        """Call ``handler`` with the messages of ``op`` sent by other workers."""
+        self._handlers[op] = handler
+
+    def _origin_id(self) -> str:
+        if self._origin_pid != os.getpid():
+            self._origin = uuid.uuid4().hex
+            self._origin_pid = os.getpid()
+        return self._origin
+
+    def listen(self) -> None:
+        if self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.name: self._on_message})
+            self._listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+            self._listener_pid = os.getpid()
+
+    def _on_message(self, message) -> None:
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed message on %s", self.name)
+            return
+        if not isinstance(payload, dict) or payload.get("origin") == self._origin_id():
+            return
+        handler = self._handlers.get(payload.get("op"))
+        if handler is None:
+            return
+        try:
+            handler(payload)
+        except Exception:
+            logger.exception("Failed to handle %s message", payload.get("op"))
+
+    def publish(self, op: str, **fields: Any) -> None:
+        self.client.publish(
+            self.name, json.dumps({"origin": self._origin_id(), "op": op, **fields})
+        )
+
+    def close(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            self._listener_pid = None
+
+
+def create_channel(prefix: str = "waitlist:") -> Optional[RedisChannel]:
+    """Build the channel the workers share under ``settings.CACHE_BACKEND``.
+
+    Parameters:
+    -----------
+    prefix: str
+        Key prefix of the shared backend; the channel is named after it,
+        so a tiered backend built with the same prefix shares it
+
+    Returns:
+    --------
+    Optional[RedisChannel]
+        The channel, or None with the in-process backend, whose state
+        is never shared with other workers
+    """
+    if settings.CACHE_BACKEND not in (CacheBackendType.REDIS, CacheBackendType.TIERED):
+        return None
+    import redis
+
+    return RedisChannel(redis.Redis.from_url(settings.CACHE_URL), f"{prefix}invalidate")
+
+
+class TieredCacheBackend(CacheBackend):
+    """In-process LRU in front of a shared Redis backend.
+
+    Reads are served from the local tier when possible and fall back to
+    the shared one, filling the local tier. Deletes and clears are
+    published on a Redis channel, and every worker evicts the same keys
+    from its local tier when it receives them. Counters always live in
+    the shared tier, so tag versions are consistent across workers.
+
+    ``set`` does not notify other workers: writers delete the key first,
+    which is what both the response and the entity caches do. The local
+    TTL bounds staleness should an invalidation message be lost.
+    """
+
+    name = "tiered"
+
+    def __init__(
+        self,
+        local: InMemoryCacheBackend,
+        shared: RedisCacheBackend,
+        channel: str = "waitlist:invalidate",
+    ):
+        super().__init__()
+        self.local = local
+        self.shared = shared
+        self.channel = RedisChannel(shared.client, channel)
+        self.channel.subscribe(
+            "delete", lambda message: self.local.delete(*message.get("keys", []))
+        )
+        self.channel.subscribe("clear", lambda message: self.local.clear())
+
+    def get(self, key: str) -> Optional[Any]:
+        self.channel.listen()
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        self._record(value is not None)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.channel.listen()
+        self.shared.set(key, value, ttl=ttl)
+        self.local.set(key, value)
+
+    def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        self.channel.listen()
+        self.local.delete(*keys)
+        self.shared.delete(*keys)
+        self.channel.publish("delete", keys=list(keys))
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        return self.shared.incr(key, ttl=ttl)
+
+    def get_counters(self, keys: Iterable[str]) -> List[int]:
+        return self.shared.get_counters(keys)
+
+    def clear(self) -> None:
+        self.channel.listen()
+        self.local.clear()
+        self.shared.clear()
+        self.channel.publish("clear")
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        self.channel.close()
+
+    def __len__(self) -> int:
+        return len(self.shared)
+
+    def counters(self) -> Dict[str, Optional[int]]:
+        # Counting the shared tier takes a SCAN; the local tier is what
+        # this worker holds.
+        counters = super().counters()
+        counters["entries"] = len(self.local)
+        return counters
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["local"] = self.local.stats()
+        return stats
+
+
+def create_cache_backend(
+    max_entries: int, default_ttl: Optional[float] = None, prefix: str = "waitlist:"
+) -> CacheBackend:
+    """Build the cache backend selected by ``settings.CACHE_BACKEND``.
+
+    Parameters:
+    -----------
+    max_entries: int
+        Maximum number of entries kept in process (in-process and tiered
+        backends)
+    default_ttl: Optional[float]
+        TTL in seconds applied when ``set`` is called without one
+    prefix: str
+        Key prefix used by the shared backend, also naming its
+        invalidation channel
+
+    Returns:
+    --------
+    CacheBackend
+        The configured backend
+    """
+    if settings.CACHE_BACKEND in (CacheBackendType.REDIS, CacheBackendType.TIERED):
+        import redis
+
+        client = redis.Redis.from_url(settings.CACHE_URL)
+        shared = RedisCacheBackend(client, prefix=prefix, default_ttl=default_ttl)
+        if settings.CACHE_BACKEND == CacheBackendType.REDIS:
+            return shared
+
+        local_ttl = settings.CACHE_LOCAL_TTL_SECONDS
+        if default_ttl:
+            local_ttl = min(local_ttl, default_ttl)
+        return TieredCacheBackend(
+            InMemoryCacheBackend(max_entries=max_entries, default_ttl=local_ttl),
+            shared,
+            channel=f"{prefix}invalidate",
+        )
+
+    return InMemoryCacheBackend(max_entries=max_entries, default_ttl=default_ttl)
@@ -0,0 +1,97 @@
+"""
+Entity cache.
+"""
+
+from typing import Any, Dict, Optional
+
+from app.backend.cache import CacheBackend, create_cache_backend
+from app.config import settings
+
+
+class EntityCache:
+    """Cache of user and service account snapshots by phone.
+
+    Entries are JSON snapshots of a row, or a negative marker for phones
+    that do not exist, which expires sooner. Writes to an entity delete
+    its entry, so a snapshot is never served after an update or a delete
+    made by this process; the TTL bounds staleness otherwise.
+    """
+
+    MISSING = {"__missing__": True}
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None,
+        enabled: bool = True,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.enabled = enabled
+        self.negative_hits = 0
+
+    @staticmethod
+    def _key(kind: str, phone: str) -> str:
+        return f"entity:{kind}:{phone}"
+
+    def get(self, kind: str, phone: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached snapshot.
+
+        Parameters:
+        -----------
+        kind: str
+            Entity kind, e.g. ``"user"``
+        phone: str
+            Phone number identifying the entity
+
+        Returns:
+        --------
+        Optional[dict]
+            The snapshot, ``EntityCache.MISSING`` for a known unknown phone,
+            or ``None`` on a miss
+        """
+        if not self.enabled:
+            return None
+        value = self.backend.get(self._key(kind, phone))
+        if value == self.MISSING:
+            self.negative_hits += 1
+        return value
+
+    def set(self, kind: str, phone: str, snapshot: Dict[str, Any]) -> None:
+        if self.enabled:
+            self.backend.set(self._key(kind, phone), snapshot, ttl=self.ttl)
+
+    def set_missing(self, kind: str, phone: str) -> None:
+        if self.enabled:
+            self.backend.set(
+                self._key(kind, phone), self.MISSING, ttl=self.negative_ttl
+            )
+
+    def invalidate(self, kind: str, phone: str) -> None:
+        self.backend.delete(self._key(kind, phone))
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.negative_hits = 0
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.backend.stats()
+        stats["negative_hits"] = self.negative_hits
+        return stats
+
+    def counters(self) -> Dict[str, Optional[int]]:
+        return self.backend.counters()
+
+
+entity_cache = EntityCache(
+    backend=create_cache_backend(
+        max_entries=settings.ENTITY_CACHE_MAX_ENTRIES,
+        default_ttl=settings.ENTITY_CACHE_TTL_SECONDS,
+        prefix="waitlist-entity:",
+    ),
+    ttl=settings.ENTITY_CACHE_TTL_SECONDS,
+    negative_ttl=settings.ENTITY_CACHE_NEGATIVE_TTL_SECONDS,
+    enabled=settings.ENTITY_CACHE_ENABLED,
+)
@@ -0,0 +1,430 @@
+"""
+Metrics registry.
+"""
+
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ARCHIVE_FILE = "archive.json"
+
+
+class Metric:
+    """Base class of the metrics: one value per combination of label values.
+
+    Label values are passed positionally, in ``labelnames`` order, so an
+    update is a tuple lookup and an addition under a lock.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> List[list]:
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": self.samples(),
+        }
+
+
+class Counter(Metric):
+    """Monotonic total. ``set`` is meant for totals kept by another component."""
+
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(Metric):
+    """Current value, summed over the live workers."""
+
+    type = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    """Distribution of observations over fixed buckets.
+
+    Each label combination keeps one count per bucket (not cumulative,
+    so an observation touches a single slot) and the sum of observations.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self) -> List[list]:
+        with self._lock:
+            return [
+                [list(labels), [list(counts), total]]
+                for labels, (counts, total) in self._values.items()
+            ]
+
+    def describe(self) -> Dict[str, Any]:
+        description = super().describe()
+        description["buckets"] = list(self.buckets)
+        return description
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _merge(
+    target: Dict[str, Any], snapshot: Dict[str, Any], include_gauges: bool = True
+) -> None:
+    """Add the samples of a snapshot into another, metric by metric."""
+    for name, description in snapshot.items():
+        if description["type"] == "gauge" and not include_gauges:
+            continue
+        merged = target.setdefault(name, {**description, "samples": []})
+        samples = {tuple(labels): value for labels, value in merged["samples"]}
+        for labels, value in description["samples"]:
+            key = tuple(labels)
+            current = samples.get(key)
+            if current is None:
+                samples[key] = value
+            elif description["type"] == "histogram":
+                samples[key] = [
+                    [a + b for a, b in zip(current[0], value[0])],
+                    current[1] + value[1],
+                ]
+            else:
+                samples[key] = current + value
+        merged["samples"] = [[list(labels), value] for labels, value in samples.items()]
+
+
+def _worker_pid(name: str) -> Optional[int]:
+    """PID of a worker snapshot file name, ``None`` for any other file."""
+    stem, extension = os.path.splitext(name)
+    return int(stem) if extension == ".json" and stem.isdigit() else None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics rendered in the Prometheus text format.
+
+    With a multiprocess ``directory``, every worker writes a snapshot of
+    its metrics to ``<directory>/<pid>.json`` every ``flush_interval``
+    seconds, from a background thread, and when it stops. A scrape served
+    by any worker renders its own live values plus the files of the other
+    workers: counters and histograms of every worker that ever ran, and
+    gauges of the live ones only. Files of exited workers are folded into
+    one archive file so that the directory does not grow with recycling.
+    The directory must be emptied before the server starts.
+
+    Collectors registered with ``register_collector`` run before each
+    snapshot, to copy values kept by other components into metrics.
+    """
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_pid: Optional[int] = None
+        self._stop = threading.Event()
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Collect and describe every metric of this process."""
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:
+                logger.exception("Metrics collector %r failed", collector)
+        return {name: metric.describe() for name, metric in self._metrics.items()}
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def flush(self, include_gauges: bool = True) -> None:
+        """Write this worker's snapshot to the multiprocess directory."""
+        if not self.directory:
+            return
+        snapshot = self.snapshot()
+        if not include_gauges:
+            snapshot = {
+                name: description
+                for name, description in snapshot.items()
+                if description["type"] != "gauge"
+            }
+        path = self._path(f"{os.getpid()}.json")
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(snapshot, file)
+        os.replace(f"{path}.tmp", path)
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Could not write the metrics snapshot")
+
+    def start(self) -> None:
+        """Start flushing in the background; call it in every worker."""
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name="metrics-flush", daemon=True
+        )
+        self._flusher.start()
+        self._flusher_pid = os.getpid()
+
+    def stop(self) -> None:
+        """Stop the background flush and write the final snapshot."""
+        if self._flusher_pid != os.getpid():
+            return
+        self._stop.set()
+        self._flusher.join()
+        self._flusher = None
+        self._flusher_pid = None
+        # Gauges of an exited worker must not be reported.
+        self.flush(include_gauges=False)
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(name)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning("Ignoring unreadable metrics file %s", name)
+            return None
+
+    def _compact(self) -> None:
+        """Fold the files of exited workers into the archive."""
+        try:
+            import fcntl
+        except ImportError:
+            return
+
+        with open(self._path(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                exited = [
+                    name
+                    for name in os.listdir(self.directory)
+                    if _worker_pid(name) is not None
+                    and not _pid_alive(_worker_pid(name))
+                ]
+                if not exited:
+                    return
+                archive = self._read(ARCHIVE_FILE) or {}
+                for name in exited:
+                    snapshot = self._read(name)
+                    if snapshot is not None:
+                        _merge(archive, snapshot, include_gauges=False)
+                temporary = self._path(f"{ARCHIVE_FILE}.tmp")
+                with open(temporary, "w") as file:
+                    json.dump(archive, file)
+                os.replace(temporary, self._path(ARCHIVE_FILE))
+                for name in exited:
+                    os.remove(self._path(name))
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def collect(self) -> Dict[str, Any]:
+        """Snapshot of all workers when multiprocess, else of this process."""
+        own = self.snapshot()
+        if not self.directory or not os.path.isdir(self.directory):
+            return own
+
+        self._compact()
+        merged: Dict[str, Any] = {}
+        _merge(merged, own)
+        own_file = f"{os.getpid()}.json"
+        for name in sorted(os.listdir(self.directory)):
+            pid = _worker_pid(name)
+            if name == own_file or (pid is None and name != ARCHIVE_FILE):
+                continue
+            snapshot = self._read(name)
+            if snapshot is not None:
+                _merge(
+                    merged, snapshot, include_gauges=pid is not None and _pid_alive(pid)
+                )
+        return merged
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for name, description in self.collect().items():
+            lines.append(f"# HELP {name} {description['help']}")
+            lines.append(f"# TYPE {name} {description['type']}")
+            labelnames = description["labelnames"]
+            for labels, value in description["samples"]:
+                if description["type"] != "histogram":
+                    lines.append(
+                        f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+                    )
+                    continue
+                counts, total = value
+                cumulative = 0
+                bounds = description["buckets"] + [float("inf")]
+                for bound, count in zip(bounds, counts):
+                    cumulative += count
+                    bucket_labels = _format_labels(
+                        [*labelnames, "le"], [*labels, _format_value(bound)]
+                    )
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                formatted = _format_labels(labelnames, labels)
+                lines.append(f"{name}_sum{formatted} {_format_value(total)}")
+                lines.append(f"{name}_count{formatted} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry(
+    directory=settings.METRICS_MULTIPROC_DIR,
+    flush_interval=settings.METRICS_FLUSH_SECONDS,
+)
+
+http_requests = registry.counter(
+    "waitlist_http_requests_total",
+    "HTTP requests by route template and status code",
+    ("method", "route", "status"),
+)
+http_request_duration = registry.histogram(
+    "waitlist_http_request_duration_seconds",
+    "HTTP request latency by route template, including admission and rate limiting",
+    ("method", "route"),
+)
+http_requests_in_progress = registry.gauge(
+    "waitlist_http_requests_in_progress",
+    "HTTP requests being served by route template",
+    ("method", "route"),
+)
+penalty_computations = registry.counter(
+    "waitlist_penalty_computations_total",
+    "Reliability penalties computed for new appointments",
+)
+appointment_rejections = registry.counter(
+    "waitlist_appointment_rejections_total",
+    "Appointments refused at creation, by reason",
+    ("reason",),
+)
+queue_length = registry.histogram(
+    "waitlist_queue_length",
+    "Active queue length seen by position lookups and live stream snapshots",
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+sql_queries_per_request = registry.histogram(
+    "waitlist_sql_queries_per_request",
+    "SQL statements run per request, by route template",
+    ("method", "route"),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+sql_repeated_statements = registry.counter(
+    "waitlist_sql_repeated_statements_total",
+    "Requests running one statement shape SQL_REPEATED_QUERY_THRESHOLD times or more",
+    ("method", "route"),
+)
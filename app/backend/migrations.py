@@ -0,0 +1,162 @@
+"""
+Database schema version check.
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.config import Environment, settings
+
+
+logger = logging.getLogger(__name__)
+
+# Latest revision under migrations/versions; bump it with every new migration.
+SCHEMA_REVISION = "0002"
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    """Read the revision the database was migrated to.
+
+    Parameters:
+    -----------
+    engine: Engine
+        Database engine
+
+    Returns:
+    --------
+    Optional[str]
+        Alembic revision, or ``None`` for an unversioned database
+    """
+    with engine.connect() as connection:
+        if not inspect(connection).has_table("alembic_version"):
+            return None
+        return connection.execute(
+            text("SELECT version_num FROM alembic_version")
+        ).scalar()
+
+
+def unversioned_revision(engine: Engine) -> Optional[str]:
+    """Find the revision matching tables created without migrations.
+
+    Such tables come from ``Base.metadata.create_all``, run by versions of
+    the application that predate migrations (revision 0001) or by scripts
+    using the current models.
+
+    Parameters:
+    -----------
+    engine: Engine
+        Database engine
+
+    Returns:
+    --------
+    Optional[str]
+        Revision to stamp, or ``None`` if the database is versioned or empty
+    """
+    with engine.connect() as connection:
+        inspector = inspect(connection)
+        if inspector.has_table("alembic_version") or not inspector.has_table(
+            "appointments"
+        ):
+            return None
+        if inspector.has_table("appointment_events"):
+            return "0002"
+        return "0001"
+
+
+def _run_alembic(engine: Engine, name: str, revision: str) -> None:
+    # Alembic is imported here rather than at module level, so that it only
+    # costs startup time when a migration actually runs.
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        getattr(command, name)(config, revision)
+
+
+def upgrade_database(engine: Engine, revision: str = "head") -> None:
+    """Run the Alembic migrations up to a revision.
+
+    Parameters:
+    -----------
+    engine: Engine
+        Database engine
+    revision: str
+        Target revision
+    """
+    _run_alembic(engine, "upgrade", revision)
+
+
+def migrate_database(engine: Engine, revision: str = "head") -> Optional[str]:
+    """Upgrade a database, first stamping tables created without migrations.
+
+    Parameters:
+    -----------
+    engine: Engine
+        Database engine
+    revision: str
+        Target revision
+
+    Returns:
+    --------
+    Optional[str]
+        The database revision after the upgrade
+    """
+    stamp = unversioned_revision(engine)
+    if stamp is not None:
+        logger.warning(
+            "Database tables are not under version control, stamping them "
+            "at revision %s",
+            stamp,
+        )
+        _run_alembic(engine, "stamp", stamp)
+    upgrade_database(engine, revision)
+    return current_revision(engine)
+
+
+def ensure_schema(engine: Engine) -> str:
+    """Check that the database is at ``SCHEMA_REVISION``, migrating if allowed.
+
+    Migrations run on startup when ``DATABASE_MIGRATE_ON_STARTUP`` is set,
+    or by default in development. Otherwise an outdated database stops the
+    application, since several workers must not migrate concurrently.
+    Tables created without migrations are stamped at the revision they
+    match before being migrated.
+
+    Parameters:
+    -----------
+    engine: Engine
+        Database engine
+
+    Returns:
+    --------
+    str
+        The database revision
+
+    Raises:
+    -------
+    RuntimeError: if the database is outdated and may not be migrated
+    """
+    revision = current_revision(engine)
+    if revision == SCHEMA_REVISION:
+        return revision
+
+    migrate = settings.DATABASE_MIGRATE_ON_STARTUP
+    if migrate is None:
+        migrate = settings.ENV == Environment.DEVELOPMENT
+    if not migrate:
+        raise RuntimeError(
+            f"Database schema is at revision {revision or 'none'}, expected "
+            f"{SCHEMA_REVISION}. Run `python -m app.commands.migrate`."
+        )
+
+    logger.info("Migrating database from revision %s to %s", revision, SCHEMA_REVISION)
+    return migrate_database(engine)
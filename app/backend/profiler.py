@@ -0,0 +1,146 @@
+"""
+Sampling profiler.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(APP_ROOT):
+        filename = "app" + filename[len(APP_ROOT) :]
+    else:
+        filename = os.path.basename(filename)
+    # co_qualname is new in Python 3.11.
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """Sample the Python stacks of the process from a background thread.
+
+    Handlers may run on the event loop or on a threadpool thread, and
+    neither can be told apart from another request's by looking at its
+    frames, so every thread executing code under ``root`` is sampled. Run
+    one sampler at a time, and profile a quiet worker when the stacks of
+    concurrent requests would get in the way.
+
+    Stacks are aggregated in the folded format read by ``flamegraph.pl``,
+    speedscope and inferno: one ``root;...;leaf count`` line per stack.
+    """
+
+    def __init__(self, interval: float = 0.001, root: str = APP_ROOT):
+        self.interval = interval
+        self.root = root
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[object, Tuple[str, bool]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._sample(frame)
+
+    def _sample(self, frame) -> None:
+        stack = []
+        in_app = False
+        while frame is not None:
+            code = frame.f_code
+            entry = self._labels.get(code)
+            if entry is None:
+                entry = self._labels[code] = (
+                    _frame_label(code),
+                    code.co_filename.startswith(self.root),
+                )
+            stack.append(entry[0])
+            in_app = in_app or entry[1]
+            frame = frame.f_back
+        if in_app:
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+class Profiler:
+    """Profile requests one at a time and store their folded stacks.
+
+    Parameters:
+    -----------
+    directory: str
+        Where profiles are written, created on demand
+    interval: float
+        Seconds between two samples
+    root: str
+        Only stacks running code under this directory are kept
+    """
+
+    def __init__(
+        self, directory: str = "profiles", interval: float = 0.001, root: str = APP_ROOT
+    ):
+        self.directory = directory
+        self.interval = interval
+        self.root = root
+        self._lock = threading.Lock()
+
+    def start(self) -> Optional[StackSampler]:
+        """Start sampling, or return None if another profile is running."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        sampler = StackSampler(self.interval, self.root)
+        sampler.start()
+        return sampler
+
+    @staticmethod
+    def filename(name: str) -> str:
+        """Name the profile file of an operation, e.g. a route."""
+        safe = "".join(char if char.isalnum() else "_" for char in name).strip("_")
+        return f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{safe}.folded"
+
+    def finish(self, sampler: StackSampler, filename: str) -> str:
+        """Stop a sampler and write its stacks to ``filename``.
+
+        This joins the sampler thread and writes to disk, so call it from a
+        worker thread rather than the event loop.
+        """
+        try:
+            sampler.stop()
+        finally:
+            self._lock.release()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, filename), "w") as file:
+            file.write(sampler.folded())
+        return filename
+
+
+profiler = Profiler(
+    directory=settings.PROFILER_DIR, interval=settings.PROFILER_INTERVAL_SECONDS
+)
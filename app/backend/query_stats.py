@@ -0,0 +1,115 @@
+"""
+SQL query instrumentation.
+"""
+
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(
+    r"\(\s*\?(?:\s*,\s*\?)+\s*\)|\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+\s*\)"
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so that executions differing only by their
+    parameters, including the length of expanded ``IN`` lists, compare
+    equal."""
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryStats:
+    """Queries run while handling one request.
+
+    Statements are counted by shape; a shape executed ``repeat_threshold``
+    times or more is reported by ``repeated``, which is how N+1 lookups
+    (one query per row of a previous result) show up.
+    """
+
+    __slots__ = ("count", "duration", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Dict[str, int] = {}
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        shape = statement_shape(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Get the statement shapes run at least ``threshold`` times, most
+        repeated first."""
+        return sorted(
+            (
+                (shape, count)
+                for shape, count in self.shapes.items()
+                if count >= threshold
+            ),
+            key=lambda item: -item[1],
+        )
+
+    def server_timing(self) -> str:
+        """Format the totals as a ``Server-Timing`` header value."""
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"'
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def instrument_engine(engine: Engine, slow_query_ms: Optional[float] = None) -> None:
+    """Time every statement run by an engine.
+
+    Durations are added to the ``QueryStats`` of the current request, if
+    any, and statements slower than ``slow_query_ms`` are logged with
+    their parameters.
+
+    Parameters:
+    -----------
+    engine: Engine
+        Engine to instrument
+    slow_query_ms: Optional[float]
+        Threshold of the slow query log, disabled if None
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+        if slow_query_ms is not None and duration * 1000 >= slow_query_ms:
+            # Bulk writes can carry thousands of rows; only show the first.
+            if executemany:
+                shown = f"{parameters[0]!r} and {len(parameters) - 1} more rows"
+            else:
+                shown = repr(parameters)
+            logger.warning(
+                "Slow query (%.1f ms): %s; parameters: %s",
+                duration * 1000,
+                _WHITESPACE.sub(" ", statement).strip(),
+                shown,
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
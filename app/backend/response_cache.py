@@ -0,0 +1,146 @@
+"""
+Response cache.
+"""
+
+import functools
+import inspect
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from app.backend.cache import CacheBackend, create_cache_backend
+from app.config import settings
+
+
+class ResponseCache:
+    """Cache of endpoint responses invalidated by tag versions.
+
+    Every cached response is stored under a key made of the route, its
+    normalized query parameters and the current version of each tag it
+    depends on. Mutations bump the version of the tags they touch, so a
+    cached read can never be served after a write to the rows behind it.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: Optional[float] = None,
+        enabled: bool = True,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+
+    @staticmethod
+    def _normalize(value: Any) -> str:
+        if isinstance(value, date):
+            return value.isoformat()
+        if hasattr(value, "value"):
+            return str(value.value)
+        return str(value)
+
+    def make_key(self, route: str, params: Dict[str, Any], tags: List[str]) -> str:
+        """Build the cache key for a route call.
+
+        Parameters:
+        -----------
+        route: str
+            Route identifier
+        params: Dict[str, Any]
+            Query and path parameters of the call; ``None`` values are dropped
+        tags: List[str]
+            Tags the response depends on
+
+        Returns:
+        --------
+        str
+            Cache key embedding the current version of every tag
+        """
+        query = "&".join(
+            f"{name}={self._normalize(value)}"
+            for name, value in sorted(params.items())
+            if value is not None
+        )
+        versions = self.backend.get_counters(f"tag:{tag}" for tag in tags)
+        tag_part = ",".join(f"{tag}@{version}" for tag, version in zip(tags, versions))
+        return f"response:{route}?{query}#{tag_part}"
+
+    def invalidate(self, *tags: str) -> None:
+        """Invalidate every cached response depending on any of the tags.
+
+        Parameters:
+        -----------
+        tags: str
+            Tags touched by a mutation
+        """
+        for tag in tags:
+            self.backend.incr(f"tag:{tag}")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats()
+
+    def counters(self) -> Dict[str, Optional[int]]:
+        return self.backend.counters()
+
+    def cached(self, *tags: str, exclude: tuple = ("db",)):
+        """Decorate an async route handler to cache its response.
+
+        Parameters:
+        -----------
+        tags: str
+            Tag templates formatted with the handler arguments,
+            e.g. ``"queue:{service_account_phone}"``
+        exclude: tuple
+            Handler arguments that are not part of the cache key
+
+        Returns:
+        --------
+        Callable
+            Decorator preserving the handler signature for FastAPI
+        """
+
+        def decorator(func):
+            signature = inspect.signature(func)
+            route = f"{func.__module__}.{func.__name__}"
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await func(*args, **kwargs)
+
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                params = {
+                    name: value
+                    for name, value in bound.arguments.items()
+                    if name not in exclude
+                }
+                key = self.make_key(
+                    route, params, [tag.format(**params) for tag in tags]
+                )
+
+                cached = self.backend.get(key)
+                if cached is not None:
+                    return cached
+
+                result = await func(*args, **kwargs)
+                self.backend.set(key, jsonable_encoder(result), ttl=self.ttl)
+                return result
+
+            return wrapper
+
+        return decorator
+
+
+response_cache = ResponseCache(
+    backend=create_cache_backend(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        default_ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    ),
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
@@ -3,8 +3,10 @@ Session.
 """
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
+from app.backend.query_stats import instrument_engine
+from app.backend.tracing import trace_engine
 from app.config import settings
 
 
@@ -15,6 +17,11 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    instrument_engine(engine, slow_query_ms=settings.SQL_SLOW_QUERY_MS)
+if settings.TRACING_ENABLED:
+    trace_engine(engine)
+
 
 def get_db():
     db = SessionLocal()
@@ -22,3 +29,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def lookup_memo(db: Session, name: str) -> dict:
+    """Get a named memo living as long as the session, i.e. one request.
+
+    Memoized entities must be checked with ``entity in db`` before reuse,
+    since they are dropped from the session when it is closed or when
+    they are deleted.
+    """
+    return db.info.setdefault(name, {})
@@ -0,0 +1,53 @@
+"""
+Startup timing.
+"""
+
+import logging
+import time
+from typing import Dict
+
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Wall-clock duration of each startup phase, measured from import time.
+
+    Each ``mark`` closes the phase running since the previous one, so the
+    phases add up to the total time until the application was ready.
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._last = self._started
+        self._phases: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> float:
+        """Record the end of a phase and return its duration in seconds."""
+        now = time.perf_counter()
+        duration = now - self._last
+        self._phases[phase] = duration
+        self._last = now
+        return duration
+
+    def report(self) -> dict:
+        return {
+            "phases_ms": {
+                phase: round(duration * 1000, 2)
+                for phase, duration in self._phases.items()
+            },
+            "total_ms": round((self._last - self._started) * 1000, 2),
+        }
+
+    def log(self) -> None:
+        report = self.report()
+        logger.info(
+            "Started in %.1f ms (%s)",
+            report["total_ms"],
+            ", ".join(
+                f"{phase}: {ms:.1f} ms" for phase, ms in report["phases_ms"].items()
+            ),
+        )
+
+
+startup_timer = StartupTimer()
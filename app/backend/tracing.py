@@ -0,0 +1,379 @@
+"""
+Request tracing.
+"""
+
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings, TraceExporterType
+
+
+logger = logging.getLogger(__name__)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    """One timed operation of a trace.
+
+    Spans finished within a process are collected on their local root,
+    the first span of the trace started here, and exported together when
+    it ends.
+    """
+
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "status",
+        "root",
+        "finished",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        kind: int,
+        trace_id: str,
+        parent_id: Optional[str],
+        root: Optional["Span"],
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status = STATUS_UNSET
+        self.root = root or self
+        self.finished: List["Span"] = []
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple]:
+    """Parse a W3C ``traceparent`` header.
+
+    Returns:
+    --------
+    Optional[tuple]
+        Trace ID, parent span ID and whether the caller sampled the trace,
+        or None if the header is missing or invalid
+    """
+    match = _TRACEPARENT.match(header.strip().lower()) if header else None
+    if match is None:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class InMemorySpanExporter:
+    """Keep exported spans in a bounded list, for tests and debugging."""
+
+    def __init__(self, max_spans: int = 10_000):
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+            del self.spans[: -self.max_spans]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def flush(self) -> None:
+        """Nothing to wait for: spans are stored as they are exported."""
+
+
+class FileSpanExporter:
+    """Append spans to a file as OTLP/JSON, one export request per line.
+
+    Each line is an ``ExportTraceServiceRequest`` that an OpenTelemetry
+    collector's file receiver, or ``otel-cli``, can load as is.
+
+    ``export`` only queues the spans; a background thread, started in each
+    process on its first export, serializes and appends them, so requests
+    never wait on the file. Once ``max_pending`` exports are waiting,
+    further spans are dropped and counted in ``dropped``.
+    """
+
+    def __init__(self, path: str, service_name: str, max_pending: int = 10_000):
+        self.path = path
+        self.service_name = service_name
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_pid: Optional[int] = None
+
+    def export(self, spans: List[Span]) -> None:
+        self._start_writer()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            if not self.dropped:
+                logger.warning("Span export queue is full, dropping spans")
+            self.dropped += len(spans)
+
+    def flush(self) -> None:
+        """Block until every queued span has been written."""
+        if self._writer_pid == os.getpid():
+            self._queue.join()
+
+    def _start_writer(self) -> None:
+        if self._writer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._writer_pid == os.getpid():
+                return
+            if self._writer_pid is not None:
+                # Forked: the queued spans belong to the parent's writer.
+                self._queue = queue.Queue(maxsize=self.max_pending)
+            self._writer = threading.Thread(
+                target=self._write_queued, name="trace-export", daemon=True
+            )
+            self._writer.start()
+            self._writer_pid = os.getpid()
+
+    def _write_queued(self) -> None:
+        pending = self._queue
+        while True:
+            batches = [pending.get()]
+            while True:
+                try:
+                    batches.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                lines = "".join(self._line(spans) for spans in batches)
+                with open(self.path, "a") as file:
+                    file.write(lines)
+            except Exception:
+                logger.warning(
+                    "Failed to export %d spans to %s",
+                    sum(len(spans) for spans in batches),
+                    self.path,
+                    exc_info=True,
+                )
+            finally:
+                for _ in batches:
+                    pending.task_done()
+
+    def _line(self, spans: List[Span]) -> str:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        return json.dumps(request, separators=(",", ":")) + "\n"
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Start and export spans for sampled requests.
+
+    A request trace is sampled when its caller sampled it, per its
+    ``traceparent`` header, or otherwise with probability ``sample_rate``.
+    Child spans are only recorded below a sampled request span, so
+    unsampled requests cost a context variable lookup per instrumented
+    call, and a disabled tracer instruments nothing at all.
+    """
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 1.0, exporter=None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exporter = exporter if exporter is not None else InMemorySpanExporter()
+
+    def start_request_span(
+        self, name: str, traceparent: Optional[str] = None, **attributes
+    ) -> Optional[Span]:
+        """Start the server span of a request, or None if it is not sampled."""
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            return None
+        return Span(name, SPAN_KIND_SERVER, trace_id, parent_id, None, attributes)
+
+    def start_span(
+        self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes
+    ) -> Optional[Span]:
+        """Start a child of the current span, or None outside a sampled trace."""
+        parent = current_span.get()
+        if parent is None:
+            return None
+        return Span(
+            name, kind, parent.trace_id, parent.span_id, parent.root, attributes
+        )
+
+    def end(self, span: Span, error: Optional[BaseException] = None) -> None:
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.status = STATUS_ERROR
+            span.attributes["exception.type"] = type(error).__name__
+        if span.root is not span:
+            span.root.finished.append(span)
+            return
+        spans, span.finished = span.finished + [span], []
+        self.exporter.export(spans)
+
+
+def _build_exporter():
+    if settings.TRACING_EXPORTER == TraceExporterType.FILE:
+        return FileSpanExporter(settings.TRACING_FILE, settings.TRACING_SERVICE_NAME)
+    return InMemorySpanExporter()
+
+
+tracer = Tracer(
+    enabled=settings.TRACING_ENABLED,
+    sample_rate=settings.TRACING_SAMPLE_RATE,
+    exporter=_build_exporter(),
+)
+
+
+def _traced_function(name: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        span = tracer.start_span(name)
+        if span is None:
+            return func(*args, **kwargs)
+        token = current_span.set(span)
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as error:
+            tracer.end(span, error)
+            raise
+        finally:
+            current_span.reset(token)
+        tracer.end(span)
+        return result
+
+    return wrapper
+
+
+def wrap_static_methods(cls) -> Dict[str, staticmethod]:
+    """Wrap each public static method of a class in a span named
+    ``Class.method``."""
+    return {
+        name: staticmethod(_traced_function(f"{cls.__name__}.{name}", attr.__func__))
+        for name, attr in vars(cls).items()
+        if isinstance(attr, staticmethod) and not name.startswith("_")
+    }
+
+
+def traced(cls):
+    """Class decorator tracing the static methods of a service when tracing
+    is enabled; otherwise the class is left untouched."""
+    if tracer.enabled:
+        for name, method in wrap_static_methods(cls).items():
+            setattr(cls, name, method)
+    return cls
+
+
+def trace_engine(engine: Engine) -> None:
+    """Record each statement run by an engine as a client span."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        span = tracer.start_span(
+            statement.split(None, 1)[0].upper() if statement else "SQL",
+            SPAN_KIND_CLIENT,
+            **{"db.system": engine.dialect.name, "db.statement": statement},
+        )
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        span = conn.info["trace_spans"].pop()
+        if span is not None:
+            tracer.end(span)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("trace_spans"):
+            span = connection.info["trace_spans"].pop()
+            if span is not None:
+                tracer.end(span, exception_context.original_exception)
@@ -0,0 +1,53 @@
+"""
+Columnar snapshot export command.
+
+Usage:
+    python -m app.commands.export appointments --output appointments.parquet \
+        [--format parquet|arrow] [--from YYYY-MM-DD] [--to YYYY-MM-DD] \
+        [--service-account-phone PHONE]
+"""
+
+import argparse
+from datetime import date
+
+from app.backend.session import SessionLocal
+from app.config import settings
+from app.schemas.export import ColumnarFormat, ExportTable
+from app.services.export import ExportService
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("table", type=ExportTable, choices=list(ExportTable))
+    parser.add_argument("--output", required=True)
+    parser.add_argument(
+        "--format",
+        type=ColumnarFormat,
+        choices=list(ColumnarFormat),
+        default=ColumnarFormat.PARQUET,
+    )
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat)
+    parser.add_argument("--service-account-phone")
+    parser.add_argument("--batch-size", type=int, default=settings.EXPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        with open(args.output, "wb") as output:
+            for chunk in ExportService.stream_columnar_snapshot(
+                db,
+                table=args.table,
+                columnar_format=args.format,
+                date_from=args.date_from,
+                date_to=args.date_to,
+                service_account_phone=args.service_account_phone,
+                batch_size=args.batch_size,
+            ):
+                output.write(chunk)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
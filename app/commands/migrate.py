@@ -0,0 +1,29 @@
+"""
+Database migration command.
+
+Tables created without migrations are stamped at the revision they match
+before the upgrade, so that it does not try to create them again.
+
+Usage:
+    python -m app.commands.migrate [--revision REVISION]
+"""
+
+import argparse
+import logging
+
+from app.backend.migrations import migrate_database
+from app.backend.session import engine
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--revision", default="head")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    revision = migrate_database(engine, args.revision)
+    print(f"Database at revision {revision}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Daily appointment stats rebuild command.
+
+Usage:
+    python -m app.commands.rebuild_stats [--service-account-phone PHONE] \
+        [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+"""
+
+import argparse
+from datetime import date
+
+from app.backend.session import SessionLocal
+from app.services.stats import StatsService
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--service-account-phone")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        rows = StatsService.rebuild(
+            db,
+            service_account_phone=args.service_account_phone,
+            date_from=args.date_from,
+            date_to=args.date_to,
+        )
+    finally:
+        db.close()
+    print(f"Rebuilt {rows} daily stats rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Synthetic dataset seeding command.
+
+Usage:
+    python -m app.commands.seed --users 100000 --service-accounts 500 \
+        --appointments 1000000 [--seed 42] [--now YYYY-MM-DD] [--months 6] \
+        [--cancel-rate 0.12] [--no-show-rate 0.08] [--skew 1.1]
+"""
+
+import argparse
+import itertools
+import random
+import time as timer
+from bisect import bisect
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.backend.session import engine
+from app.config import settings
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.appointment_event import AppointmentEvent, AppointmentEventType
+from app.models.service_account import ServiceAccount
+from app.models.user import User, UserType
+from app.services.stats import StatsService
+
+
+BATCH_SIZE = 50_000
+UPCOMING_DAYS = 30
+UPCOMING_SHARE = 0.3
+
+
+def user_phone(index: int) -> str:
+    return f"+55119{index:08d}"
+
+
+def service_account_phone(index: int) -> str:
+    return f"+55118{index:08d}"
+
+
+def popularity(service_accounts: int, skew: float) -> list:
+    """Cumulative Zipf weights of the service accounts, most popular first."""
+    return list(
+        itertools.accumulate(1 / (rank + 1) ** skew for rank in range(service_accounts))
+    )
+
+
+def seed_database(
+    bind: Engine,
+    users: int,
+    service_accounts: int,
+    appointments: int,
+    seed: int = 42,
+    now: Optional[datetime] = None,
+    months: int = 6,
+    cancel_rate: float = 0.12,
+    no_show_rate: float = 0.08,
+    skew: float = 1.1,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """Fill an empty database with a reproducible synthetic dataset.
+
+    Appointments are spread over the users in turn. Most are settled,
+    dated over the past ``months`` with the given cancel and no-show
+    rates; the rest are active over the next ``UPCOMING_DAYS`` days, at
+    most one per user and day. Service accounts are picked with Zipf
+    popularity, so a few of them hold long queues. Each appointment gets
+    its creation event, plus a status change event once settled, and the
+    daily stats are rebuilt at the end.
+
+    Rows are generated from ``seed`` and ``now`` only, so the same
+    arguments always produce the same database.
+
+    Parameters:
+    -----------
+    bind: Engine
+        Engine of the database to fill
+    users: int
+        Number of regular users
+    service_accounts: int
+        Number of service accounts
+    appointments: int
+        Number of appointments
+    seed: int
+        Random seed
+    now: Optional[datetime]
+        Reference time, defaults to the start of the current UTC day
+    months: int
+        How far back settled appointments go
+    cancel_rate: float
+        Share of settled appointments that were canceled
+    no_show_rate: float
+        Share of settled appointments that were no-shows
+    skew: float
+        Zipf exponent of the service account popularity
+    batch_size: int
+        Rows per insert
+
+    Returns:
+    --------
+    dict
+        Number of rows inserted per table
+    """
+    if users < 1 or service_accounts < 1:
+        raise ValueError("At least one user and one service account are required")
+    if now is None:
+        now = datetime.combine(datetime.now(timezone.utc).date(), time.min)
+    now = now.replace(tzinfo=None)
+
+    rng = random.Random(seed)
+    weights = popularity(service_accounts, skew)
+    total_weight = weights[-1]
+    settled_thresholds = (1 - cancel_rate - no_show_rate, 1 - no_show_rate)
+    active = AppointmentStatus.ACTIVE.name
+    settled = (
+        AppointmentStatus.COMPLETED.name,
+        AppointmentStatus.CANCELED.name,
+        AppointmentStatus.NO_SHOW.name,
+    )
+    regular = UserType.REGULAR.name
+    created, status_changed = (
+        AppointmentEventType.CREATED.name,
+        AppointmentEventType.STATUS_CHANGED.name,
+    )
+    slot_minutes = settings.AVAILABILITY_SLOT_MINUTES
+    opening = settings.AVAILABILITY_OPENING_HOUR * 60
+    slots = (settings.AVAILABILITY_CLOSING_HOUR * 60 - opening) // slot_minutes
+    history_days = months * 30
+    booking_minutes = 14 * 24 * 60
+    joined = now - timedelta(days=history_days + 30)
+    account_phones = [service_account_phone(i) for i in range(service_accounts)]
+
+    with bind.begin() as connection:
+        if connection.execute(select(func.count()).select_from(User)).scalar():
+            raise ValueError("The database already has users")
+        stamp = _timestamp_format(connection)
+
+        _bulk_insert(
+            connection,
+            ServiceAccount.__table__,
+            [
+                (
+                    i + 1,
+                    f"Service Account {i}",
+                    phone,
+                    None,
+                    None,
+                    stamp(joined),
+                    True,
+                    1.0,
+                    2.0,
+                    None,
+                )
+                for i, phone in enumerate(account_phones)
+            ],
+        )
+        for start in range(0, users, batch_size):
+            _bulk_insert(
+                connection,
+                User.__table__,
+                [
+                    (
+                        i + 1,
+                        f"User {i}",
+                        user_phone(i),
+                        None,
+                        stamp(joined),
+                        regular,
+                        False,
+                        None,
+                    )
+                    for i in range(start, min(start + batch_size, users))
+                ],
+            )
+
+        event_id = 0
+        for start in range(0, appointments, batch_size):
+            rows, events = [], []
+            for appointment_id in range(
+                start + 1, min(start + batch_size, appointments) + 1
+            ):
+                turn, user = divmod(appointment_id - 1, users)
+                phone = user_phone(user)
+                account = account_phones[bisect(weights, rng.random() * total_weight)]
+                slot = timedelta(minutes=opening + rng.randrange(slots) * slot_minutes)
+                if turn < UPCOMING_DAYS and rng.random() < UPCOMING_SHARE:
+                    status = active
+                    appointment_date = (
+                        now + timedelta(days=1 + (turn + user) % UPCOMING_DAYS) + slot
+                    )
+                    created_at = now - timedelta(minutes=rng.randrange(booking_minutes))
+                    penalty = round(rng.random() * 0.5, 4)
+                else:
+                    status = settled[bisect(settled_thresholds, rng.random())]
+                    appointment_date = (
+                        now - timedelta(days=rng.randrange(1, history_days + 1)) + slot
+                    )
+                    created_at = appointment_date - timedelta(
+                        minutes=rng.randrange(1, booking_minutes)
+                    )
+                    penalty = 0.0
+
+                event_id += 1
+                events.append(
+                    (
+                        event_id,
+                        appointment_id,
+                        account,
+                        phone,
+                        created,
+                        None,
+                        active,
+                        stamp(created_at),
+                    )
+                )
+                updated_at = created_at
+                if status != active:
+                    event_id += 1
+                    updated_at = appointment_date
+                    events.append(
+                        (
+                            event_id,
+                            appointment_id,
+                            account,
+                            phone,
+                            status_changed,
+                            active,
+                            status,
+                            stamp(updated_at),
+                        )
+                    )
+                rows.append(
+                    (
+                        appointment_id,
+                        phone,
+                        account,
+                        stamp(appointment_date),
+                        status,
+                        slot_minutes,
+                        None,
+                        stamp(created_at),
+                        penalty,
+                        stamp(updated_at),
+                        event_id,
+                    )
+                )
+            _bulk_insert(connection, Appointment.__table__, rows)
+            _bulk_insert(connection, AppointmentEvent.__table__, events)
+
+        if connection.dialect.name == "postgresql":
+            # Ids were given explicitly, so move the sequences past them.
+            for table in (ServiceAccount, User, Appointment, AppointmentEvent):
+                table = table.__table__
+                connection.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"COALESCE(MAX(id), 1)) FROM {table.name}"
+                )
+
+    with Session(bind) as db:
+        stats = StatsService.rebuild(db)
+
+    return {
+        "service_accounts": service_accounts,
+        "users": users,
+        "appointments": appointments,
+        "appointment_events": event_id,
+        "daily_appointment_stats": stats,
+    }
+
+
+def _timestamp_format(connection) -> Callable[[datetime], Any]:
+    """SQLite stores datetimes as text, in SQLAlchemy's format; other
+    drivers take them as they are."""
+    if connection.dialect.name == "sqlite":
+        return lambda value: value.isoformat(" ", "microseconds")
+    return lambda value: value
+
+
+def _bulk_insert(connection, table, rows: List[tuple]) -> None:
+    """Insert rows, given as tuples in table column order, with the
+    driver's executemany.
+
+    SQLAlchemy's per-value type processing costs more than the insert
+    itself at this volume, so values must already be what the driver
+    stores: enum names, and timestamps from ``_timestamp_format``.
+    """
+    keys = table.columns.keys()
+    compiled = insert(table).compile(dialect=connection.dialect, column_keys=keys)
+    if not compiled.positional:
+        rows = [dict(zip(keys, row)) for row in rows]
+    elif list(compiled.positiontup) != keys:
+        raise RuntimeError(f"Unexpected column order inserting into {table.name}")
+    connection.exec_driver_sql(compiled.string, rows)
+
+
+def _fast_sqlite_writes(engine: Engine) -> None:
+    """Skip fsyncs while loading; a crash mid-seed only loses the seed."""
+    if engine.dialect.name == "sqlite":
+
+        @event.listens_for(engine, "connect")
+        def _connect(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA synchronous = OFF")
+            dbapi_connection.execute("PRAGMA cache_size = -262144")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, required=True)
+    parser.add_argument("--service-accounts", type=int, required=True)
+    parser.add_argument("--appointments", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--now", type=date.fromisoformat)
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--cancel-rate", type=float, default=0.12)
+    parser.add_argument("--no-show-rate", type=float, default=0.08)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    _fast_sqlite_writes(engine)
+    started = timer.perf_counter()
+    counts = seed_database(
+        engine,
+        users=args.users,
+        service_accounts=args.service_accounts,
+        appointments=args.appointments,
+        seed=args.seed,
+        now=datetime.combine(args.now, time.min) if args.now else None,
+        months=args.months,
+        cancel_rate=args.cancel_rate,
+        no_show_rate=args.no_show_rate,
+        skew=args.skew,
+        batch_size=args.batch_size,
+    )
+    print(
+        ", ".join(f"{count} {table}" for table, count in counts.items())
+        + f" seeded in {timer.perf_counter() - started:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""
+Production server command.
+
+Usage:
+    python -m app.commands.serve [--host HOST] [--port PORT] [--workers N] \
+        [--max-requests N] [--max-requests-jitter N] [--graceful-timeout SECONDS] \
+        [--no-preload]
+"""
+
+import argparse
+import inspect
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from app.config import settings, CacheBackendType
+
+
+logger = logging.getLogger("app.serve")
+
+APP = "app.main:app"
+
+# Exit status of a worker whose application failed to start.
+WORKER_BOOT_ERROR = 3
+
+
+def default_workers() -> int:
+    """One worker per CPU available to this process."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(len(os.sched_getaffinity(0)), 1)
+    return os.cpu_count() or 1
+
+
+def local_state_settings() -> List[str]:
+    """Settings keeping state in each process that other workers never see."""
+    local = []
+    if settings.CACHE_BACKEND == CacheBackendType.MEMORY:
+        local.append("CACHE_BACKEND")
+    if (
+        settings.RATE_LIMIT_ENABLED
+        and settings.RATE_LIMIT_BACKEND == CacheBackendType.MEMORY
+    ):
+        local.append("RATE_LIMIT_BACKEND")
+    return local
+
+
+def check_workers(workers: int) -> int:
+    """Fall back to a single worker when state is kept per process.
+
+    With the in-memory backends each worker has its own availability
+    counters, entity and response caches, rate limit buckets and live
+    queue notifications: workers would serve stale reads, let clients
+    through at several times their rate and miss each other's changes.
+    ``WORKER_ALLOW_LOCAL_STATE`` keeps the requested number of workers
+    anyway.
+
+    Returns:
+    --------
+    int
+        Number of workers to start
+    """
+    local = local_state_settings()
+    if workers <= 1 or not local or settings.WORKER_ALLOW_LOCAL_STATE:
+        return workers
+    logger.warning(
+        "%s set to memory keeps state per process, so only 1 worker is started "
+        "instead of %s. Set CACHE_BACKEND=tiered (or redis) and "
+        "RATE_LIMIT_BACKEND=redis with CACHE_URL to run several workers.",
+        " and ".join(local),
+        workers,
+    )
+    return 1
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def prepare_metrics_directory(workers: int) -> Optional[str]:
+    """Give the workers an empty directory to aggregate their metrics in.
+
+    Snapshots left by a previous run would be counted again, so the
+    configured directory is emptied, and a temporary one is created for
+    several workers when none is configured.
+
+    Returns:
+    --------
+    Optional[str]
+        The temporary directory to remove on exit, if one was created
+    """
+    directory = settings.METRICS_MULTIPROC_DIR
+    created = None
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+    elif workers > 1:
+        directory = created = tempfile.mkdtemp(prefix="waitlist-metrics-")
+    else:
+        return None
+    # Read by the registry when the app is imported, before or after forking.
+    settings.METRICS_MULTIPROC_DIR = directory
+    os.environ["METRICS_MULTIPROC_DIR"] = directory
+    return created
+
+
+class WorkerPool:
+    """Pre-fork master keeping a fixed number of uvicorn workers alive.
+
+    The application is imported (and the database schema checked) once in
+    the master, so workers fork with everything loaded and share its memory
+    pages until they write to them. Each worker serves the listening socket
+    inherited from the master and exits after ``max_requests`` requests
+    (plus a random jitter, so that workers do not restart together); the
+    master then forks a replacement, unless the worker failed to start, in
+    which case the whole pool shuts down. On SIGTERM or SIGINT every worker
+    stops accepting connections and gets ``graceful_timeout`` seconds to
+    finish its in-flight requests before it is killed.
+    """
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        workers: int,
+        preload: bool = True,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        graceful_timeout: int = 30,
+        keepalive: int = 5,
+    ):
+        self.sock = sock
+        self.workers = workers
+        self.preload = preload
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.keepalive = keepalive
+        self.children: Dict[int, float] = {}
+        self.app = None
+        self._stopping = False
+        self._status = 0
+
+    def load(self) -> None:
+        """Import the application and check the schema before forking."""
+        from app.backend.migrations import ensure_schema
+        from app.backend.session import engine
+        from app.main import app
+
+        if settings.DATABASE_SCHEMA_CHECK:
+            ensure_schema(engine)
+        # Workers must not reuse connections opened by the master.
+        engine.dispose()
+        self.app = app
+
+    def _config_options(self, uvicorn) -> dict:
+        options = {
+            "limit_max_requests": self.max_requests or None,
+            "timeout_graceful_shutdown": self.graceful_timeout,
+            "timeout_keep_alive": self.keepalive,
+            "log_level": "info",
+        }
+        # Older uvicorn releases have no jitter option; workers then restart
+        # after exactly ``max_requests`` requests.
+        if "limit_max_requests_jitter" in inspect.signature(uvicorn.Config).parameters:
+            options["limit_max_requests_jitter"] = (
+                self.max_requests_jitter if self.max_requests else 0
+            )
+        elif self.max_requests_jitter:
+            logger.warning(
+                "uvicorn %s does not support --max-requests-jitter, ignoring it",
+                uvicorn.__version__,
+            )
+        return options
+
+    def _run_worker(self) -> int:
+        """Serve requests until told to stop.
+
+        Returns:
+        --------
+        int
+            Exit status, ``WORKER_BOOT_ERROR`` if the server failed to start
+        """
+        server = None
+        try:
+            import uvicorn
+
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, signal.SIG_DFL)
+            if self.app is not None:
+                from app.backend.session import engine
+
+                engine.dispose(close=False)
+
+            config = uvicorn.Config(
+                self.app if self.app is not None else APP,
+                **self._config_options(uvicorn),
+            )
+            server = uvicorn.Server(config)
+            server.run(sockets=[self.sock])
+        except Exception:
+            if server is not None and server.started:
+                raise
+            logger.exception("Worker %s failed to start", os.getpid())
+            return WORKER_BOOT_ERROR
+        return 0 if server.started else WORKER_BOOT_ERROR
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                status = self._run_worker()
+            except BaseException:
+                logger.exception("Worker %s crashed", os.getpid())
+            finally:
+                os._exit(status)
+
+        self.children[pid] = time.monotonic()
+        logger.info("Started worker %s", pid)
+        return pid
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _reap(self) -> None:
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            started = self.children.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            logger.info(
+                "Worker %s exited with status %s after %.0f s",
+                pid,
+                code,
+                time.monotonic() - started,
+            )
+            if code == WORKER_BOOT_ERROR:
+                logger.error("Worker %s failed to start, shutting down", pid)
+                self._stopping = True
+                self._status = code
+
+    def stop(self) -> None:
+        """Ask every worker to drain, then kill those past the graceful timeout."""
+        self._stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+
+        for pid in list(self.children):
+            logger.warning("Killing worker %s after the graceful timeout", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        while self.children:
+            self._reap()
+            time.sleep(0.05)
+
+    def run(self) -> int:
+        """Fork the workers and replace those that exit until stopped.
+
+        Returns:
+        --------
+        int
+            Exit status for the master process
+        """
+        if self.preload:
+            self.load()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        logger.info(
+            "Serving %s with %s workers (pid %s)", APP, self.workers, os.getpid()
+        )
+
+        while not self._stopping:
+            while len(self.children) < self.workers and not self._stopping:
+                self.spawn()
+            time.sleep(0.2)
+            self._reap()
+
+        logger.info("Shutting down %s workers", len(self.children))
+        self.stop()
+        self.sock.close()
+        return self._status
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.WORKERS)
+    parser.add_argument(
+        "--max-requests", type=int, default=settings.WORKER_MAX_REQUESTS
+    )
+    parser.add_argument(
+        "--max-requests-jitter", type=int, default=settings.WORKER_MAX_REQUESTS_JITTER
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=settings.WORKER_GRACEFUL_TIMEOUT_SECONDS
+    )
+    parser.add_argument("--no-preload", dest="preload", action="store_false")
+    parser.set_defaults(preload=settings.WORKER_PRELOAD)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(message)s"
+    )
+    workers = check_workers(args.workers or default_workers())
+
+    if not hasattr(os, "fork"):
+        import uvicorn
+
+        uvicorn.run(
+            APP,
+            host=args.host,
+            port=args.port,
+            workers=workers,
+            limit_max_requests=args.max_requests or None,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            timeout_keep_alive=settings.WORKER_KEEPALIVE_SECONDS,
+            log_level="info",
+        )
+        return
+
+    metrics_directory = prepare_metrics_directory(workers)
+    sock = bind_socket(args.host, args.port, settings.WORKER_BACKLOG)
+    pool = WorkerPool(
+        sock,
+        workers=workers,
+        preload=args.preload,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        keepalive=settings.WORKER_KEEPALIVE_SECONDS,
+    )
+    status = pool.run()
+    if metrics_directory:
+        shutil.rmtree(metrics_directory, ignore_errors=True)
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
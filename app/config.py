@@ -4,7 +4,7 @@ Configuration settings.
 
 from pydantic_settings import BaseSettings
 from enum import Enum
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from pydantic import ConfigDict
 
 
@@ -13,18 +13,122 @@ class Environment(str, Enum):
     PRODUCTION = "prd"
 
 
+class CacheBackendType(str, Enum):
+    MEMORY = "memory"
+    REDIS = "redis"
+    TIERED = "tiered"
+
+
+class TraceExporterType(str, Enum):
+    MEMORY = "memory"
+    FILE = "file"
+
+
 class Settings(BaseSettings):
     APP_NAME: str = "Waitlist Management API"
     DATABASE_URL: str = "sqlite:///./waitlist.db"
+    DATABASE_SCHEMA_CHECK: bool = True
+    DATABASE_MIGRATE_ON_STARTUP: Optional[bool] = None
     ENV: Environment = Environment.DEVELOPMENT
-    WORKERS: int = 1
+    WORKERS: Optional[int] = None
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    WORKER_PRELOAD: bool = True
+    WORKER_MAX_REQUESTS: int = 10_000
+    WORKER_MAX_REQUESTS_JITTER: int = 1_000
+    WORKER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    WORKER_KEEPALIVE_SECONDS: int = 5
+    WORKER_BACKLOG: int = 2048
+    WORKER_ALLOW_LOCAL_STATE: bool = False
 
     SECRET_KEY: Optional[str] = None
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    CACHE_BACKEND: CacheBackendType = CacheBackendType.MEMORY
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_LOCAL_TTL_SECONDS: float = 5.0
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10_000
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    ENTITY_CACHE_ENABLED: bool = True
+    ENTITY_CACHE_MAX_ENTRIES: int = 50_000
+    ENTITY_CACHE_TTL_SECONDS: float = 300.0
+    ENTITY_CACHE_NEGATIVE_TTL_SECONDS: float = 30.0
+
+    EXPORT_BATCH_SIZE: int = 1000
+
+    QUEUE_STREAM_MAX_ENTRIES: int = 500
+    QUEUE_STREAM_MAX_PENDING: int = 100
+    QUEUE_STREAM_KEEPALIVE_SECONDS: float = 15.0
+    QUEUE_STREAM_MAX_SUBSCRIBERS: int = 1000
+    QUEUE_STREAM_RETRY_AFTER_SECONDS: int = 5
+
+    AVAILABILITY_OPENING_HOUR: int = 9
+    AVAILABILITY_CLOSING_HOUR: int = 18
+    AVAILABILITY_SLOT_MINUTES: int = 30
+    AVAILABILITY_INDEX_MAX_DAYS: int = 10_000
+    APPOINTMENT_MAX_DURATION_MINUTES: int = 24 * 60
+
+    CALENDAR_MAX_DAYS: int = 366
+    CALENDAR_MAX_ENTRIES_PER_DAY: int = 50
+    STATS_MAX_DAYS: int = 366
+
+    CHANGE_FEED_MAX_LIMIT: int = 1000
+    CHANGE_FEED_MAX_WAIT_SECONDS: float = 30.0
+    CHANGE_FEED_POLL_SECONDS: float = 1.0
+
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 64
+    ADMISSION_MAX_QUEUE: int = 256
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    ADMISSION_ROUTE_LIMITS: Dict[str, int] = {
+        "GET /exports/{table}": 2,
+        "GET /service-accounts/{phone}/appointments/export": 4,
+    }
+    ADMISSION_ROUTE_MAX_QUEUE: int = 16
+    ADMISSION_EXEMPT_ROUTES: List[str] = [
+        "GET /appointments/stream",
+        "GET /appointments/changes",
+        "GET /metrics",
+    ]
+
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_FLUSH_SECONDS: float = 1.0
+
+    SQL_INSTRUMENTATION_ENABLED: bool = True
+    SQL_SLOW_QUERY_MS: Optional[float] = 200.0
+    SQL_REPEATED_QUERY_THRESHOLD: int = 2
+    SQL_DEBUG_HEADERS: Optional[bool] = None
+
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 1.0
+    TRACING_EXPORTER: TraceExporterType = TraceExporterType.FILE
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_SERVICE_NAME: str = "waitlist-api"
+
+    PROFILER_ENABLED: bool = False
+    PROFILER_TOKEN: Optional[str] = None
+    PROFILER_SAMPLE_RATE: float = 0.0
+    PROFILER_INTERVAL_SECONDS: float = 0.001
+    PROFILER_DIR: str = "profiles"
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: CacheBackendType = CacheBackendType.MEMORY
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    RATE_LIMIT_RULES: Dict[str, Dict[str, Tuple[float, int]]] = {
+        "GET /appointments/": {
+            "ip": (20.0, 40),
+            "service_account_phone": (50.0, 100),
+        },
+        "POST /appointments/": {
+            "ip": (10.0, 20),
+            "user_phone": (1.0, 5),
+        },
+    }
+
     model_config = ConfigDict(env_file=".env")
 
 
@@ -1,5 +1,7 @@
 """Exceptions module."""
 
+from datetime import datetime
+
 from fastapi import HTTPException
 
 
@@ -41,3 +43,20 @@ class AppointmentNotFound(HTTPException):
         super().__init__(
             status_code=404, detail=f"Appointment with phone {phone} not found"
         )
+
+
+class AppointmentSlotUnavailable(HTTPException):
+    def __init__(self, appointment_date: datetime):
+        super().__init__(
+            status_code=409,
+            detail=f"No availability left for an appointment at {appointment_date.isoformat()}",
+        )
+
+
+class QueueStreamFull(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail="Too many live queue subscribers, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
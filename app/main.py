@@ -2,22 +2,43 @@
 Main file for the application.
 """
 
+from app.backend.startup import startup_timer
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.backend.session import engine
+from app.backend.migrations import ensure_schema
+from app.backend.metrics import registry
+from app.backend.tracing import tracer
 
 from app.routers.routers import router
-from app.models.base import Base
-from app.config import settings
+from app.middleware import (
+    AdmissionControlMiddleware,
+    MetricsMiddleware,
+    QueryStatsMiddleware,
+    RateLimitMiddleware,
+    TracingMiddleware,
+    admission_controller,
+    rate_limiter,
+)
+from app.config import settings, Environment
 
-import uvicorn
 from contextlib import asynccontextmanager
 
+startup_timer.mark("imports")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
+    startup_timer.mark("app")
+    if settings.DATABASE_SCHEMA_CHECK:
+        ensure_schema(engine)
+    startup_timer.mark("schema")
+    startup_timer.log()
+    registry.start()
     yield
+    registry.stop()
+    tracer.exporter.flush()
 
 
 app = FastAPI(
@@ -34,6 +55,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+app.add_middleware(
+    QueryStatsMiddleware,
+    enabled=settings.SQL_INSTRUMENTATION_ENABLED,
+    debug_headers=(
+        settings.ENV == Environment.DEVELOPMENT
+        if settings.SQL_DEBUG_HEADERS is None
+        else settings.SQL_DEBUG_HEADERS
+    ),
+    repeat_threshold=settings.SQL_REPEATED_QUERY_THRESHOLD,
+)
+app.add_middleware(TracingMiddleware, tracer=tracer)
+if settings.PROFILER_ENABLED:
+    # Off by default, so the profiler is only imported when asked for.
+    from app.backend.profiler import profiler
+    from app.middleware.profiler import ProfilerMiddleware
+
+    app.add_middleware(
+        ProfilerMiddleware,
+        profiler=profiler,
+        enabled=True,
+        token=settings.PROFILER_TOKEN,
+        sample_rate=settings.PROFILER_SAMPLE_RATE,
+    )
+app.add_middleware(MetricsMiddleware, enabled=settings.METRICS_ENABLED)
 
 app.include_router(router)
 
@@ -45,19 +92,15 @@ def read_root():
 
 if __name__ == "__main__":
     if settings.ENV == "dev":
+        import uvicorn
+
         uvicorn.run(
             "app.main:app",
             host=settings.HOST,
             port=settings.PORT,
             reload=True,
-            workers=settings.WORKERS,
         )
     else:
-        uvicorn.run(
-            "app.main:app",
-            host=settings.HOST,
-            port=settings.PORT,
-            reload=False,
-            workers=settings.WORKERS,
-            log_level="info",
-        )
+        from app.commands.serve import main
+
+        main([])
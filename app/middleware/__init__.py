@@ -0,0 +1,39 @@
+"""
+Middleware module.
+"""
+
+from .admission import (
+    AdmissionControlMiddleware,
+    AdmissionController,
+    ConcurrencyLimiter,
+    admission_controller,
+)
+from .metrics import MetricsMiddleware
+from .query_stats import QueryStatsMiddleware
+from .rate_limit import (
+    LocalBucketStore,
+    RateLimitMiddleware,
+    RateLimiter,
+    RedisBucketStore,
+    rate_limiter,
+)
+from .tracing import TracingMiddleware
+
+# ProfilerMiddleware is imported from app.middleware.profiler when the
+# profiler is enabled, keeping it out of the default startup path.
+
+
+__all__ = [
+    "AdmissionControlMiddleware",
+    "AdmissionController",
+    "ConcurrencyLimiter",
+    "admission_controller",
+    "MetricsMiddleware",
+    "QueryStatsMiddleware",
+    "LocalBucketStore",
+    "RateLimitMiddleware",
+    "RateLimiter",
+    "RedisBucketStore",
+    "rate_limiter",
+    "TracingMiddleware",
+]
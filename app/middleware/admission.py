@@ -0,0 +1,237 @@
+"""
+Admission control middleware.
+"""
+
+import asyncio
+import heapq
+import itertools
+from typing import Any, Dict, Iterable, List, Optional
+
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+
+from app.config import settings
+
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+WRITE_PRIORITY = 0
+READ_PRIORITY = 1
+
+
+class ConcurrencyLimiter:
+    """Concurrency limit with a bounded wait queue ordered by priority.
+
+    Requests over the limit wait in the queue, lowest priority value
+    first and then in arrival order. When the queue is full, a newcomer
+    takes the place of the last waiter of a lower priority or is shed.
+    Meant to be used from a single event loop.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+        self._waiters: List[tuple] = []
+        self._sequence = itertools.count()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _discard(self, entry: tuple) -> None:
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            return
+        heapq.heapify(self._waiters)
+
+    async def acquire(self, priority: int, timeout: float) -> bool:
+        """Take a slot, waiting in the queue if needed.
+
+        Parameters:
+        -----------
+        priority: int
+            Lower values are admitted first
+        timeout: float
+            Seconds to wait in the queue before giving up
+
+        Returns:
+        --------
+        bool
+            Whether a slot was taken; the caller must ``release`` it
+        """
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            last = max(self._waiters, default=None)
+            if last is None or last[0] <= priority:
+                self.shed += 1
+                return False
+            self._discard(last)
+            if not last[2].done():
+                last[2].set_result(False)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            admitted = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            admitted = False
+        except asyncio.CancelledError:
+            self._discard(entry)
+            if future.done() and not future.cancelled() and future.result():
+                self.release()
+            raise
+
+        if not admitted:
+            self._discard(entry)
+            self.shed += 1
+        return admitted
+
+    def release(self) -> None:
+        """Free a slot, handing it over to the first waiter if any."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)
+                self.admitted += 1
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionController:
+    """Limiters applied to incoming requests, with their counters.
+
+    Every request goes through its route's limiter, when the route has
+    one, and then through the global limiter. Writes are queued ahead of
+    reads.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int = 1,
+        route_limits: Optional[Dict[str, int]] = None,
+        route_max_queue: int = 16,
+        exempt_routes: Iterable[str] = (),
+        enabled: bool = True,
+    ):
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.exempt_routes = frozenset(exempt_routes)
+        self.enabled = enabled
+        self.global_limiter = ConcurrencyLimiter("*", max_concurrency, max_queue)
+        self.route_limiters = {
+            route: ConcurrencyLimiter(route, limit, route_max_queue)
+            for route, limit in (route_limits or {}).items()
+        }
+        self._routes = [
+            self._compile(route)
+            for route in [*self.exempt_routes, *self.route_limiters]
+        ]
+
+    @staticmethod
+    def _compile(route: str) -> tuple:
+        method, path = route.split(" ", 1)
+        return method.upper(), compile_path(path)[0], route
+
+    def route_key(self, method: str, path: str) -> Optional[str]:
+        """Return the configured ``"METHOD /path/{template}"`` matching a request.
+
+        Only routes with a limit or an exemption are matched, so requests
+        to other routes cost a handful of regular expression checks.
+        """
+        for route_method, pattern, route in self._routes:
+            if route_method == method and pattern.match(path):
+                return route
+        return None
+
+    def limiters_for(self, route: Optional[str]) -> List[ConcurrencyLimiter]:
+        route_limiter = self.route_limiters.get(route)
+        if route_limiter is None:
+            return [self.global_limiter]
+        return [route_limiter, self.global_limiter]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "global": self.global_limiter.stats(),
+            "routes": {
+                route: limiter.stats() for route, limiter in self.route_limiters.items()
+            },
+        }
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware shedding requests the server cannot take in time.
+
+    Saturated requests are answered right away with 503 and
+    ``Retry-After`` instead of piling up in the server. Long-lived routes
+    (streams, long polls) listed as exempt bypass the limits.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.controller.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route = self.controller.route_key(scope["method"], scope["path"])
+        if route in self.controller.exempt_routes:
+            await self.app(scope, receive, send)
+            return
+
+        priority = WRITE_PRIORITY if scope["method"] in WRITE_METHODS else READ_PRIORITY
+        acquired = []
+        try:
+            for limiter in self.controller.limiters_for(route):
+                if not await limiter.acquire(priority, self.controller.queue_timeout):
+                    response = JSONResponse(
+                        {"detail": "Server is busy, retry later"},
+                        status_code=503,
+                        headers={"Retry-After": str(self.controller.retry_after)},
+                    )
+                    await response(scope, receive, send)
+                    return
+                acquired.append(limiter)
+            await self.app(scope, receive, send)
+        finally:
+            for limiter in acquired:
+                limiter.release()
+
+
+admission_controller = AdmissionController(
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    route_limits=settings.ADMISSION_ROUTE_LIMITS,
+    route_max_queue=settings.ADMISSION_ROUTE_MAX_QUEUE,
+    exempt_routes=settings.ADMISSION_EXEMPT_ROUTES,
+    enabled=settings.ADMISSION_CONTROL_ENABLED,
+)
@@ -0,0 +1,91 @@
+"""
+Request metrics middleware.
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+from starlette.routing import compile_path
+
+from app.backend.metrics import (
+    http_request_duration,
+    http_requests,
+    http_requests_in_progress,
+    registry,
+)
+
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """Count and time requests per route template.
+
+    The template is read from the route matched by the router, so paths
+    are never used as labels. Requests answered before routing (rate
+    limited, shed, CORS preflights) are matched against the templates of
+    the OpenAPI schema instead, and anything else is ``unmatched``.
+
+    In-flight requests are only tracked by reference; their per-route
+    gauge is computed when the metrics are collected, which keeps the
+    per-request cost to a dict insertion and removal.
+    """
+
+    def __init__(self, app, enabled: bool = True):
+        self.app = app
+        self.enabled = enabled
+        self._active: Dict[int, dict] = {}
+        self._templates: Optional[List[Tuple[object, str]]] = None
+        registry.register_collector(self._collect_in_progress)
+
+    def _fallback_template(self, scope) -> str:
+        if self._templates is None:
+            app = scope.get("app")
+            paths = app.openapi().get("paths", {}) if hasattr(app, "openapi") else {}
+            self._templates = [(compile_path(path)[0], path) for path in paths]
+        for regex, template in self._templates:
+            if regex.match(scope["path"]):
+                return template
+        return UNMATCHED_ROUTE
+
+    def route_template(self, scope) -> str:
+        route = scope.get("route")
+        path = getattr(route, "path", None)
+        if path is not None:
+            return path
+        return self._fallback_template(scope)
+
+    def _collect_in_progress(self) -> None:
+        counts: Dict[Tuple[str, str], int] = {}
+        for scope in list(self._active.values()):
+            key = (scope["method"], self.route_template(scope))
+            counts[key] = counts.get(key, 0) + 1
+        http_requests_in_progress.clear()
+        for (method, route), count in counts.items():
+            http_requests_in_progress.set(count, method, route)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        key = id(scope)
+        self._active[key] = scope
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            del self._active[key]
+            method = scope["method"]
+            route = self.route_template(scope)
+            http_requests.inc(method, route, str(status))
+            http_request_duration.observe(duration, method, route)
@@ -0,0 +1,92 @@
+"""
+Request profiling middleware.
+"""
+
+import hmac
+import logging
+import random
+from typing import Optional
+
+import anyio
+from starlette.concurrency import run_in_threadpool
+
+from app.backend.profiler import Profiler
+from app.middleware.metrics import UNMATCHED_ROUTE
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfilerMiddleware:
+    """Sample the stacks of requests asking for a profile.
+
+    A request is profiled when its ``X-Profile`` header matches ``token``,
+    or at random with probability ``sample_rate``; a single request is
+    profiled at a time. The profile is written to the profiler's directory
+    and its file name returned in an ``X-Profile`` response header.
+
+    Sampling stops once the application has sent the whole response, so
+    streaming responses are profiled up to their last chunk; the file is
+    written from the threadpool, off the event loop.
+    """
+
+    def __init__(
+        self,
+        app,
+        profiler: Profiler,
+        enabled: bool = False,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+    ):
+        self.app = app
+        self.profiler = profiler
+        self.enabled = enabled
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+
+    def _requested(self, scope) -> bool:
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = self.profiler.start()
+        if sampler is None:
+            await self.app(scope, receive, send)
+            return
+
+        filename = None
+
+        async def send_with_profile(message):
+            nonlocal filename
+            if message["type"] == "http.response.start":
+                route = getattr(scope.get("route"), "path", None)
+                filename = self.profiler.filename(
+                    f"{scope['method']} {route or UNMATCHED_ROUTE}"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_HEADER, filename.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if filename is None:
+                filename = self.profiler.filename(
+                    f"{scope['method']} {UNMATCHED_ROUTE}"
+                )
+            # Shielded, or a cancelled request would never release the profiler.
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(self.profiler.finish, sampler, filename)
+            logger.info(
+                "Profiled %s %s to %s", scope["method"], scope["path"], filename
+            )
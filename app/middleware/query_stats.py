@@ -0,0 +1,73 @@
+"""
+SQL query statistics middleware.
+"""
+
+import logging
+
+from app.backend.metrics import sql_queries_per_request, sql_repeated_statements
+from app.backend.query_stats import QueryStats, current_query_stats
+from app.middleware.metrics import UNMATCHED_ROUTE
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """Count and time the SQL statements run by each request.
+
+    With ``debug_headers``, the totals so far are sent in a
+    ``Server-Timing`` header; statements run while a response is streamed
+    come after the headers and are only counted in the metrics. Statement
+    shapes repeated ``repeat_threshold`` times or more within a request
+    are logged as likely N+1 queries.
+    """
+
+    def __init__(
+        self,
+        app,
+        enabled: bool = True,
+        debug_headers: bool = False,
+        repeat_threshold: int = 2,
+    ):
+        self.app = app
+        self.enabled = enabled
+        self.debug_headers = debug_headers
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(
+                scope, receive, send_with_timing if self.debug_headers else send
+            )
+        finally:
+            current_query_stats.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope, stats: QueryStats) -> None:
+        if stats.count == 0:
+            return
+        method = scope["method"]
+        route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+        sql_queries_per_request.observe(stats.count, method, route)
+        repeated = stats.repeated(self.repeat_threshold)
+        if not repeated:
+            return
+        sql_repeated_statements.inc(method, route)
+        for shape, count in repeated:
+            logger.warning(
+                "Possible N+1: %s %s ran %d times: %s", method, route, count, shape
+            )
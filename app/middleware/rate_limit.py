@@ -0,0 +1,312 @@
+"""
+Rate limiting middleware.
+"""
+
+import json
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+
+from app.config import settings, CacheBackendType
+
+
+logger = logging.getLogger(__name__)
+
+KEY_TYPES = ("ip", "user_phone", "service_account_phone")
+
+
+class LocalBucketStore:
+    """In-process token buckets, one float per active key.
+
+    Buckets follow the generic cell rate algorithm: instead of a token
+    count, each key stores the time at which its bucket will be full
+    again. Keys whose bucket is already full are indistinguishable from
+    unknown ones, so they are evicted as they go idle; the least recently
+    used keys are dropped beyond ``max_keys``.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._full_at: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._full_at)
+
+    def hit(self, key: str, rate: float, burst: int) -> float:
+        """Take a token from a key's bucket.
+
+        Parameters:
+        -----------
+        key: str
+            Bucket key
+        rate: float
+            Tokens added per second
+        burst: int
+            Bucket capacity
+
+        Returns:
+        --------
+        float
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        now = time.monotonic()
+        interval = 1.0 / rate
+        full_at = max(self._full_at.pop(key, now), now)
+        wait = full_at - now - (burst - 1) * interval
+        if wait > 0:
+            self._full_at[key] = full_at
+            return wait
+
+        self._full_at[key] = full_at + interval
+        self._evict(now)
+        return 0.0
+
+    def _evict(self, now: float) -> None:
+        while len(self._full_at) > self.max_keys:
+            self._full_at.popitem(last=False)
+        for _ in range(2):
+            oldest = next(iter(self._full_at), None)
+            if oldest is None or self._full_at[oldest] > now:
+                break
+            del self._full_at[oldest]
+
+    def clear(self) -> None:
+        self._full_at.clear()
+
+
+class RedisBucketStore:
+    """Token buckets shared by all workers through a Redis server.
+
+    Same algorithm as ``LocalBucketStore``, applied with an optimistic
+    transaction; each key expires when its bucket is full again.
+    """
+
+    def __init__(self, client, prefix: str = "waitlist-ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}*"))
+
+    def hit(self, key: str, rate: float, burst: int) -> float:
+        from redis.exceptions import WatchError
+
+        key = f"{self.prefix}{key}"
+        interval = 1.0 / rate
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    now = time.time()
+                    stored = pipe.get(key)
+                    full_at = max(float(stored) if stored else now, now)
+                    wait = full_at - now - (burst - 1) * interval
+                    if wait > 0:
+                        pipe.unwatch()
+                        return wait
+
+                    full_at += interval
+                    pipe.multi()
+                    expires_in = max(1, math.ceil((full_at - now) * 1000))
+                    pipe.set(key, full_at, px=expires_in)
+                    pipe.execute()
+                    return 0.0
+                except WatchError:
+                    continue
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class RateLimiter:
+    """Per-route token bucket rules keyed by client and phone numbers.
+
+    ``rules`` maps ``"METHOD /path/{template}"`` to the limits of that
+    route, as ``{key_type: (rate_per_second, burst)}`` where the key type
+    is ``ip``, ``user_phone`` or ``service_account_phone``. Phones are
+    read from the query string, then from the JSON body.
+    """
+
+    def __init__(
+        self,
+        rules: Dict[str, Dict[str, Tuple[float, int]]],
+        store=None,
+        enabled: bool = True,
+    ):
+        self.store = store if store is not None else LocalBucketStore()
+        self.enabled = enabled
+        self.allowed = 0
+        self.limited = 0
+        self._rules = []
+        for route, limits in rules.items():
+            unknown = set(limits) - set(KEY_TYPES)
+            if unknown:
+                raise ValueError(
+                    f"Unknown rate limit keys for {route}: {sorted(unknown)}"
+                )
+            method, path = route.split(" ", 1)
+            bucket_limits = [
+                (key_type, float(rate), int(burst))
+                for key_type, (rate, burst) in limits.items()
+            ]
+            self._rules.append(
+                (method.upper(), compile_path(path)[0], route, bucket_limits)
+            )
+
+    def match(self, method: str, path: str) -> Optional[tuple]:
+        for rule_method, pattern, route, limits in self._rules:
+            if rule_method == method and pattern.match(path):
+                return route, limits
+        return None
+
+    def check(self, route: str, limits: List[tuple], values: Dict[str, Any]) -> float:
+        """Take a token from every bucket of a request.
+
+        Parameters:
+        -----------
+        route: str
+            Matched route
+        limits: List[tuple]
+            ``(key_type, rate, burst)`` limits of the route
+        values: Dict[str, Any]
+            Key values of the request; missing keys are not limited
+
+        Returns:
+        --------
+        float
+            0 if the request is allowed, otherwise seconds to wait
+        """
+        wait = 0.0
+        for key_type, rate, burst in limits:
+            value = values.get(key_type)
+            if value is None:
+                continue
+            try:
+                key = f"{route}|{key_type}|{value}"
+                wait = max(wait, self.store.hit(key, rate, burst))
+            except Exception:
+                # A shared store outage must not take the API down.
+                logger.warning("Rate limit store unavailable", exc_info=True)
+                return 0.0
+        if wait > 0:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    def clear(self) -> None:
+        self.store.clear()
+        self.allowed = 0
+        self.limited = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "keys": len(self.store),
+        }
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 with ``Retry-After`` to clients over their rate.
+
+    Only routes with rules are inspected, and the request body is read
+    only when a rule needs a phone that is not in the query string.
+    """
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        matched = self.limiter.match(scope["method"], scope["path"])
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+        route, limits = matched
+
+        values = {}
+        client = scope.get("client")
+        if client:
+            values["ip"] = client[0]
+        if scope.get("query_string"):
+            values.update(
+                (name, value)
+                for name, value in parse_qsl(scope["query_string"].decode("latin-1"))
+                if name in KEY_TYPES and name != "ip"
+            )
+        needs_body = any(key_type not in values for key_type, _, _ in limits)
+        if needs_body and scope["method"] in ("POST", "PUT", "PATCH"):
+            body, receive = await self._read_body(receive)
+            try:
+                payload = json.loads(body) if body else {}
+            except ValueError:
+                payload = {}
+            if isinstance(payload, dict):
+                for key_type in ("user_phone", "service_account_phone"):
+                    if key_type not in values and isinstance(
+                        payload.get(key_type), str
+                    ):
+                        values[key_type] = payload[key_type]
+
+        wait = self.limiter.check(route, limits, values)
+        if wait > 0:
+            response = JSONResponse(
+                {"detail": "Too many requests, retry later"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return body, replay
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the rate limiter from settings, with a shared store if configured."""
+    store = LocalBucketStore(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    if settings.RATE_LIMIT_BACKEND != CacheBackendType.MEMORY:
+        import redis
+
+        store = RedisBucketStore(redis.Redis.from_url(settings.CACHE_URL))
+    return RateLimiter(
+        settings.RATE_LIMIT_RULES, store=store, enabled=settings.RATE_LIMIT_ENABLED
+    )
+
+
+rate_limiter = create_rate_limiter()
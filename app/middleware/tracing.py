@@ -0,0 +1,58 @@
+"""
+Tracing middleware.
+"""
+
+from app.backend.tracing import Tracer, current_span
+from app.middleware.metrics import UNMATCHED_ROUTE
+
+
+class TracingMiddleware:
+    """Open a server span around each sampled request.
+
+    The span continues the trace of an incoming ``traceparent`` header and
+    is named after the route template once the request has been routed;
+    the service methods and SQL statements it runs become its children.
+    """
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        span = self.tracer.start_request_span(
+            f"{scope['method']} {UNMATCHED_ROUTE}",
+            traceparent,
+            **{"http.request.method": scope["method"]},
+        )
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                span.attributes["http.response.status_code"] = message["status"]
+            await send(message)
+
+        token = current_span.set(span)
+        error = None
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            current_span.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                span.name = f"{scope['method']} {route}"
+                span.attributes["http.route"] = route
+            self.tracer.end(span, error)
@@ -11,6 +11,7 @@ from sqlalchemy import (
     Text,
     Float,
     String,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -29,6 +30,25 @@ class AppointmentStatus(str, enum.Enum):
 
 class Appointment(Base, BaseDict):
     __tablename__ = "appointments"
+    __table_args__ = (
+        Index("ix_appointments_service_account_id", "service_account_phone", "id"),
+        Index(
+            "ix_appointments_queue",
+            "service_account_phone",
+            "status",
+            "penalty",
+            "created_at",
+            "id",
+            "appointment_date",
+        ),
+        Index(
+            "ix_appointments_calendar",
+            "service_account_phone",
+            "appointment_date",
+            "status",
+        ),
+        Index("ix_appointments_changes", "service_account_phone", "change_seq"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_phone = Column(String, ForeignKey("users.phone"))
@@ -39,6 +59,10 @@ class Appointment(Base, BaseDict):
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     penalty = Column(Float, default=0.0)
+    updated_at = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc), index=True
+    )
+    change_seq = Column(Integer, nullable=True, index=True)
 
     user = relationship(
         "User", foreign_keys=[user_phone], back_populates="appointments"
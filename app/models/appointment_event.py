@@ -0,0 +1,44 @@
+"""
+Appointment event model.
+"""
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    DateTime,
+    ForeignKey,
+    Enum,
+    String,
+)
+from datetime import datetime, timezone
+import enum
+
+from app.models.base import Base
+from app.models.base import BaseDict
+from app.models.appointment import AppointmentStatus
+
+
+class AppointmentEventType(str, enum.Enum):
+    CREATED = "created"
+    STATUS_CHANGED = "status_changed"
+
+
+class AppointmentEvent(Base, BaseDict):
+    """Append-only log of appointment state changes.
+
+    Rows are written in the same transaction as the change they describe,
+    and ``id`` is a strictly increasing sequence that consumers use as a
+    cursor.
+    """
+
+    __tablename__ = "appointment_events"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    appointment_id = Column(Integer, ForeignKey("appointments.id"), index=True)
+    service_account_phone = Column(String, nullable=False)
+    user_phone = Column(String, nullable=False)
+    event_type = Column(Enum(AppointmentEventType), nullable=False)
+    from_status = Column(Enum(AppointmentStatus), nullable=True)
+    to_status = Column(Enum(AppointmentStatus), nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
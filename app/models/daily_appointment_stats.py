@@ -0,0 +1,27 @@
+"""
+Daily appointment stats model.
+"""
+
+from sqlalchemy import (
+    Column,
+    Date,
+    Float,
+    Integer,
+    String,
+)
+
+from app.models.base import Base
+from app.models.base import BaseDict
+
+
+class DailyAppointmentStats(Base, BaseDict):
+    __tablename__ = "daily_appointment_stats"
+
+    service_account_phone = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    active = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    canceled = Column(Integer, nullable=False, default=0)
+    no_show = Column(Integer, nullable=False, default=0)
+    penalty_sum = Column(Float, nullable=False, default=0.0)
@@ -32,6 +32,8 @@ class ServiceAccount(Base, BaseDict):
     cancellation_weight = Column(Float, default=1.0)
     no_show_weight = Column(Float, default=2.0)
 
+    max_concurrent_appointments = Column(Integer, nullable=True)
+
     appointments = relationship(
         "Appointment",
         foreign_keys="[Appointment.service_account_phone]",
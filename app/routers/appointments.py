@@ -2,19 +2,32 @@
 Appointment routers.
 """
 
-from fastapi import APIRouter, Depends, Query, status
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime
 
 from app.schemas import (
     Appointment,
     AppointmentCreate,
     AppointmentDetail,
     APIResponse,
+    QueuePosition,
+    RankedAppointment,
+    CalendarDay,
+    AppointmentChanges,
 )
 from app.services import AppointmentService
 from app.backend.session import get_db
+from app.backend.response_cache import response_cache
+from app.services.queue_stream import queue_broadcaster
+from app.services.events import change_notifier
+from app.config import settings
 
 router = APIRouter(
     prefix="/appointments",
@@ -41,9 +54,10 @@ async def create_appointment(
 
 @router.get(
     "/",
-    response_model=APIResponse[List[Appointment]],
+    response_model=APIResponse[List[RankedAppointment]],
     status_code=status.HTTP_200_OK,
 )
+@response_cache.cached("queue:{service_account_phone}")
 async def read_appointments(
     service_account_phone: str = Query(..., description="The service account phone"),
     day: Optional[date] = Query(
@@ -65,8 +79,11 @@ async def read_appointments(
 
     This creates a queue where users who frequently cancel or no-show
     are deprioritized compared to reliable users.
+
+    Each entry carries its rank and an estimated wait and start time,
+    derived from the durations of the appointments ranked before it.
     """
-    ranked_appointments = AppointmentService.get_ranked_appointments(
+    ranked_queue = AppointmentService.get_ranked_queue(
         db=db,
         service_account_phone=service_account_phone,
         day=day,
@@ -76,7 +93,148 @@ async def read_appointments(
     )
     return APIResponse(
         message="Appointments queue retrieved successfully",
-        data=[appointment.to_dict() for appointment in ranked_appointments],
+        data=ranked_queue,
+    )
+
+
+@router.get(
+    "/calendar",
+    response_model=APIResponse[List[CalendarDay]],
+    status_code=status.HTTP_200_OK,
+)
+async def read_appointments_calendar(
+    service_account_phone: str = Query(..., description="The service account phone"),
+    date_from: date = Query(..., alias="from", description="First day (YYYY-MM-DD)"),
+    date_to: date = Query(..., alias="to", description="Last day (YYYY-MM-DD)"),
+    entries: int = Query(
+        0,
+        ge=0,
+        le=settings.CALENDAR_MAX_ENTRIES_PER_DAY,
+        description="Optional: Number of appointments to inline per day",
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Get per-day appointment counts by status for a date range.
+
+    A whole month costs one aggregate query, plus one query for the
+    inlined first entries of each day when requested.
+    """
+    calendar = AppointmentService.get_calendar(
+        db=db,
+        service_account_phone=service_account_phone,
+        date_from=date_from,
+        date_to=date_to,
+        entries_per_day=entries,
+    )
+    return APIResponse(
+        message="Appointments calendar retrieved successfully",
+        data=calendar,
+    )
+
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def stream_appointments_queue(
+    request: Request,
+    service_account_phone: str = Query(..., description="The service account phone"),
+    db: Session = Depends(get_db),
+):
+    """
+    Follow a service account's ranked queue as Server-Sent Events.
+
+    The stream starts with a `snapshot` event holding the ranked queue,
+    followed by `diff` events (`inserted`, `removed`, `moved`, and the
+    `updated` fields of entries whose rank or estimates shifted) whenever
+    an appointment of that queue is created or changes status. Answers 503
+    when the worker already serves `QUEUE_STREAM_MAX_SUBSCRIBERS` streams.
+    """
+    try:
+        snapshot = queue_broadcaster.snapshot(service_account_phone)
+        if snapshot is None:
+            snapshot = AppointmentService.get_queue_snapshot(
+                db=db, service_account_phone=service_account_phone
+            )
+    finally:
+        # The stream may stay open for hours; don't hold a pooled connection.
+        db.close()
+    events = queue_broadcaster.subscribe(service_account_phone, snapshot)
+
+    async def event_stream():
+        try:
+            yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(
+                        events.get(), timeout=settings.QUEUE_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            queue_broadcaster.unsubscribe(service_account_phone, events)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/changes",
+    response_model=APIResponse[AppointmentChanges],
+    status_code=status.HTTP_200_OK,
+)
+async def read_appointment_changes(
+    since: int = Query(0, ge=0, description="Cursor returned by the previous page"),
+    updated_since: Optional[datetime] = Query(
+        None, description="Optional: Only appointments modified since this time"
+    ),
+    service_account_phone: Optional[str] = Query(
+        None, description="Optional: Filter by service account phone"
+    ),
+    limit: int = Query(100, ge=1, le=settings.CHANGE_FEED_MAX_LIMIT),
+    wait: float = Query(
+        0,
+        ge=0,
+        le=settings.CHANGE_FEED_MAX_WAIT_SECONDS,
+        description="Optional: Seconds to wait for a change when there is none yet",
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Get appointments created or modified after a cursor.
+
+    Changes are ordered by a sequence assigned in commit order, so a
+    cursor never skips a change committed after it was returned; each
+    appointment comes once, at its latest state. Pass the returned
+    `cursor` as `since` to get the next page;
+    with `wait`, an empty page is held open until a change arrives.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        changes = AppointmentService.get_changes(
+            db=db,
+            since=since,
+            updated_since=updated_since,
+            service_account_phone=service_account_phone,
+            limit=limit,
+        )
+        remaining = deadline - time.monotonic()
+        if changes["changes"] or remaining <= 0:
+            break
+        # Hand the connection back to the pool while waiting.
+        db.close()
+        await change_notifier.wait(min(remaining, settings.CHANGE_FEED_POLL_SECONDS))
+
+    return APIResponse(
+        message="Appointment changes retrieved successfully",
+        data=changes,
     )
 
 
@@ -95,6 +253,33 @@ async def read_appointment(appointment_id: int, db: Session = Depends(get_db)):
     )
 
 
+@router.get(
+    "/{appointment_id}/position",
+    response_model=APIResponse[QueuePosition],
+    status_code=status.HTTP_200_OK,
+)
+async def read_appointment_position(
+    appointment_id: int,
+    day: Optional[date] = Query(
+        None, description="Optional: Rank within that day's queue (YYYY-MM-DD)"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Get where an appointment stands in its service account's queue.
+
+    Returns the 1-based rank, how many appointments are ahead and the
+    total queue length, computed with index-backed counts.
+    """
+    position = AppointmentService.get_queue_position(
+        db, appointment_id=appointment_id, day=day
+    )
+    return APIResponse(
+        message=f"Appointment {appointment_id} queue position retrieved successfully",
+        data=position,
+    )
+
+
 @router.delete(
     "/{appointment_id}",
     response_model=APIResponse[Appointment],
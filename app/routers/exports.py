@@ -0,0 +1,64 @@
+"""
+Export routers.
+"""
+
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date
+
+from app.backend.session import get_db
+from app.schemas import ColumnarFormat, ExportTable
+from app.services import ExportService
+from app.services.export import EXPORT_MEDIA_TYPES
+
+router = APIRouter(
+    prefix="/exports",
+    tags=["exports"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get(
+    "/{table}",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def export_table_snapshot(
+    table: ExportTable,
+    format: ColumnarFormat = Query(
+        ColumnarFormat.PARQUET, description="Export format: parquet or arrow"
+    ),
+    date_from: Optional[date] = Query(
+        None, alias="from", description="Optional: First day to include (YYYY-MM-DD)"
+    ),
+    date_to: Optional[date] = Query(
+        None, alias="to", description="Optional: Last day to include (YYYY-MM-DD)"
+    ),
+    service_account_phone: Optional[str] = Query(
+        None, description="Optional: Filter by service account phone"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Export a columnar snapshot of a table for offline analytics.
+
+    The file is encoded in record batches and streamed as it is written,
+    so memory stays bounded regardless of the table size.
+    """
+    chunks = ExportService.stream_columnar_snapshot(
+        db=db,
+        table=table,
+        columnar_format=format,
+        date_from=date_from,
+        date_to=date_to,
+        service_account_phone=service_account_phone,
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{table.value}.{format.value}"'
+        },
+    )
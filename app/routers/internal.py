@@ -0,0 +1,86 @@
+"""
+Internal routers.
+"""
+
+from fastapi import APIRouter, status
+
+from app.schemas import APIResponse
+from app.backend.response_cache import response_cache
+from app.backend.entity_cache import entity_cache
+from app.backend.startup import startup_timer
+from app.middleware.admission import admission_controller
+from app.middleware.rate_limit import rate_limiter
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+)
+
+
+@router.get(
+    "/caches",
+    response_model=APIResponse[dict],
+    status_code=status.HTTP_200_OK,
+)
+async def read_cache_stats():
+    """
+    Get hit rates, entry counts and approximate memory of the caches.
+
+    Counters are local to the worker serving the request.
+    """
+    return APIResponse(
+        message="Cache statistics retrieved successfully",
+        data={
+            "response": response_cache.stats(),
+            "entity": entity_cache.stats(),
+        },
+    )
+
+
+@router.get(
+    "/admission",
+    response_model=APIResponse[dict],
+    status_code=status.HTTP_200_OK,
+)
+async def read_admission_stats():
+    """
+    Get active requests, queue depth and shed counts of the admission limiters.
+
+    Counters are local to the worker serving the request.
+    """
+    return APIResponse(
+        message="Admission statistics retrieved successfully",
+        data=admission_controller.stats(),
+    )
+
+
+@router.get(
+    "/rate-limits",
+    response_model=APIResponse[dict],
+    status_code=status.HTTP_200_OK,
+)
+async def read_rate_limit_stats():
+    """
+    Get allowed and limited request counts and the number of tracked keys.
+
+    Counters are local to the worker serving the request.
+    """
+    return APIResponse(
+        message="Rate limit statistics retrieved successfully",
+        data=rate_limiter.stats(),
+    )
+
+
+@router.get(
+    "/startup",
+    response_model=APIResponse[dict],
+    status_code=status.HTTP_200_OK,
+)
+async def read_startup_timing():
+    """
+    Get the duration of each startup phase of the worker serving the request.
+    """
+    return APIResponse(
+        message="Startup timing retrieved successfully",
+        data=startup_timer.report(),
+    )
@@ -0,0 +1,97 @@
+"""
+Metrics routers.
+"""
+
+from fastapi import APIRouter, Response
+
+from app.backend.entity_cache import entity_cache
+from app.backend.metrics import CONTENT_TYPE, registry
+from app.backend.response_cache import response_cache
+from app.backend.session import engine
+from app.middleware.admission import admission_controller
+from app.middleware.rate_limit import rate_limiter
+from app.services.queue_stream import queue_broadcaster
+
+router = APIRouter(
+    tags=["metrics"],
+)
+
+db_pool_connections = registry.gauge(
+    "waitlist_db_pool_connections",
+    "Database pool connections by state",
+    ("state",),
+)
+admission_active = registry.gauge(
+    "waitlist_admission_active_requests",
+    "Requests admitted and running, by admission limiter",
+    ("limiter",),
+)
+admission_queue_depth = registry.gauge(
+    "waitlist_admission_queue_depth",
+    "Requests waiting for admission, by admission limiter",
+    ("limiter",),
+)
+admission_rejections = registry.counter(
+    "waitlist_admission_rejections_total",
+    "Requests refused by admission control, by limiter and reason",
+    ("limiter", "reason"),
+)
+rate_limit_decisions = registry.counter(
+    "waitlist_rate_limit_decisions_total",
+    "Requests checked against rate limits, by decision",
+    ("decision",),
+)
+cache_lookups = registry.counter(
+    "waitlist_cache_lookups_total",
+    "Cache lookups by cache and result",
+    ("cache", "result"),
+)
+cache_entries = registry.gauge(
+    "waitlist_cache_entries",
+    "Entries each cache holds in this worker",
+    ("cache",),
+)
+queue_stream_subscribers = registry.gauge(
+    "waitlist_queue_stream_subscribers",
+    "Clients following a queue stream",
+)
+
+
+def _collect_components() -> None:
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        db_pool_connections.set(pool.checkedout(), "checked_out")
+    if hasattr(pool, "checkedin"):
+        db_pool_connections.set(pool.checkedin(), "idle")
+
+    limiters = {"global": admission_controller.global_limiter}
+    limiters.update(admission_controller.route_limiters)
+    for name, limiter in limiters.items():
+        admission_active.set(limiter.active, name)
+        admission_queue_depth.set(limiter.queue_depth, name)
+        admission_rejections.set(limiter.shed, name, "shed")
+        admission_rejections.set(limiter.timed_out, name, "timed_out")
+
+    rate_limit_decisions.set(rate_limiter.allowed, "allowed")
+    rate_limit_decisions.set(rate_limiter.limited, "limited")
+
+    for name, cache in (("response", response_cache), ("entity", entity_cache)):
+        # stats() measures memory and scans Redis; keep scrapes O(1).
+        counters = cache.counters()
+        cache_lookups.set(counters["hits"], name, "hit")
+        cache_lookups.set(counters["misses"], name, "miss")
+        if counters["entries"] is not None:
+            cache_entries.set(counters["entries"], name)
+
+    queue_stream_subscribers.set(queue_broadcaster.subscriber_count())
+
+
+registry.register_collector(_collect_components)
+
+
+@router.get("/metrics", response_class=Response)
+async def read_metrics():
+    """
+    Export the metrics of every worker in the Prometheus text format.
+    """
+    return Response(registry.render(), media_type=CONTENT_TYPE)
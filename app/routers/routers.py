@@ -7,12 +7,18 @@ from fastapi import APIRouter
 from app.routers.users import router as users_router
 from app.routers.service_accounts import router as service_accounts_router
 from app.routers.appointments import router as appointments_router
+from app.routers.exports import router as exports_router
+from app.routers.internal import router as internal_router
+from app.routers.metrics import router as metrics_router
 
 
 router = APIRouter()
 router.include_router(users_router)
 router.include_router(service_accounts_router)
 router.include_router(appointments_router)
+router.include_router(exports_router)
+router.include_router(internal_router)
+router.include_router(metrics_router)
 
 
 __all__ = ["router"]
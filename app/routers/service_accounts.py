@@ -2,23 +2,35 @@
 Service account routers.
 """
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 
 from app.backend.session import get_db
+from app.backend.response_cache import response_cache
 from app.schemas import (
     ServiceAccount,
     ServiceAccountCreate,
     ServiceAccountUpdate,
     ServiceAccountWithAppointments,
+    ServiceAccountAvailability,
+    DailyStats,
+    Appointment,
     APIResponse,
+    ExportFormat,
 )
 from app.services import (
     ServiceAccountService,
     AppointmentService,
+    ExportService,
+    AvailabilityService,
+    StatsService,
 )
+from app.services.export import EXPORT_MEDIA_TYPES
 from app.exceptions import ServiceAccountAlreadyExists, ServiceAccountNotFound
+from app.config import settings
 
 router = APIRouter(
     prefix="/service-accounts",
@@ -52,6 +64,7 @@ async def create_service_account(
     response_model=APIResponse[List[ServiceAccount]],
     status_code=status.HTTP_200_OK,
 )
+@response_cache.cached("service_accounts")
 async def read_service_accounts(
     skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
 ):
@@ -71,12 +84,14 @@ async def read_service_accounts(
 )
 async def read_service_account(phone: str, db: Session = Depends(get_db)):
     try:
-        service_account = ServiceAccountService.get_service_account(db=db, phone=phone)
+        service_account = ServiceAccountService.get_service_account_snapshot(
+            db=db, phone=phone
+        )
         service_appointments = AppointmentService.get_service_account_appointments(
             db=db, service_account_phone=phone
         )
 
-        service_data = service_account.to_dict()
+        service_data = service_account.model_dump()
         service_data["appointments"] = [
             appointment.to_dict() for appointment in service_appointments
         ]
@@ -121,3 +136,132 @@ async def delete_service_account(phone: str, db: Session = Depends(get_db)):
         return None
     except ServiceAccountNotFound as e:
         raise e
+
+
+@router.get(
+    "/{phone}/appointments/export",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def export_service_account_appointments(
+    phone: str,
+    format: ExportFormat = Query(
+        ExportFormat.NDJSON, description="Export format: ndjson or csv"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream the full appointment history of a service account.
+
+    Rows are read through a server-side cursor and serialized batch by
+    batch, so memory stays constant regardless of the history size.
+    """
+    chunks = ExportService.stream_service_account_appointments(
+        db=db, service_account_phone=phone, export_format=format
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="appointments-{phone}.{format.value}"'
+        },
+    )
+
+
+@router.post(
+    "/{phone}/queue/next",
+    response_model=APIResponse[Appointment],
+    status_code=status.HTTP_200_OK,
+)
+async def claim_next_appointment(
+    phone: str,
+    day: Optional[date] = Query(
+        None, description="Optional: Claim from that day's queue (YYYY-MM-DD)"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Call the next person in the queue.
+
+    Atomically claims the highest-ranked active appointment and marks it
+    as completed, so several front desks serving the same service account
+    never call the same person.
+    """
+    claimed_appointment = AppointmentService.claim_next_appointment(
+        db=db, service_account_phone=phone, day=day
+    )
+    return APIResponse(
+        message=f"Appointment {claimed_appointment.id} claimed from the queue",
+        data=claimed_appointment.to_dict(),
+    )
+
+
+@router.get(
+    "/{phone}/availability",
+    response_model=APIResponse[ServiceAccountAvailability],
+    status_code=status.HTTP_200_OK,
+)
+async def read_service_account_availability(
+    phone: str,
+    day: date = Query(..., description="Day to inspect (YYYY-MM-DD)"),
+    slot_minutes: int = Query(
+        settings.AVAILABILITY_SLOT_MINUTES,
+        ge=5,
+        le=24 * 60,
+        description="Length of each returned slot",
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    List the free slots of a service account on a day.
+
+    Slots lie within opening hours and are free when fewer than
+    `max_concurrent_appointments` bookings overlap them. Accounts without
+    a capacity limit are available during all opening hours.
+    """
+    service_account = ServiceAccountService.get_service_account_snapshot(
+        db=db, phone=phone
+    )
+    slots = AvailabilityService.get_free_slots(
+        db,
+        service_account_phone=phone,
+        capacity=service_account.max_concurrent_appointments,
+        day=day,
+        slot_minutes=slot_minutes,
+    )
+    return APIResponse(
+        message=f"Availability of service account {phone} retrieved successfully",
+        data={
+            "service_account_phone": phone,
+            "day": day,
+            "max_concurrent_appointments": service_account.max_concurrent_appointments,
+            "slots": slots,
+        },
+    )
+
+
+@router.get(
+    "/{phone}/stats",
+    response_model=APIResponse[List[DailyStats]],
+    status_code=status.HTTP_200_OK,
+)
+async def read_service_account_stats(
+    phone: str,
+    date_from: date = Query(..., alias="from", description="First day (YYYY-MM-DD)"),
+    date_to: date = Query(..., alias="to", description="Last day (YYYY-MM-DD)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Get per-day appointment totals and average penalty of a service account.
+
+    Reads the incrementally maintained daily rollup, so the cost grows
+    with the number of days, not the number of appointments.
+    """
+    ServiceAccountService.get_service_account_snapshot(db=db, phone=phone)
+    daily_stats = StatsService.get_daily_stats(
+        db, service_account_phone=phone, date_from=date_from, date_to=date_to
+    )
+    return APIResponse(
+        message=f"Stats of service account {phone} retrieved successfully",
+        data=daily_stats,
+    )
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app.backend.session import get_db
+from app.backend.response_cache import response_cache
 from app.schemas import (
     User,
     UserCreate,
@@ -45,6 +46,7 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     response_model=APIResponse[List[User]],
     status_code=status.HTTP_200_OK,
 )
+@response_cache.cached("users")
 async def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     users = UserService.get_users(db=db, skip=skip, limit=limit)
     return APIResponse(
@@ -58,12 +60,13 @@ async def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_
     response_model=APIResponse[UserWithAppointments],
     status_code=status.HTTP_200_OK,
 )
+@response_cache.cached("user:{phone}")
 async def read_user(phone: str, db: Session = Depends(get_db)):
     try:
-        user = UserService.get_user(db=db, phone=phone)
+        user = UserService.get_user_snapshot(db=db, phone=phone)
         return APIResponse(
             message=f"User with phone {phone} retrieved successfully",
-            data=user.to_dict(),
+            data=user.model_dump(),
         )
     except UserNotFound as e:
         raise e
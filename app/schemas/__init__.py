@@ -9,12 +9,21 @@ from app.schemas.appointment import (
     AppointmentDetail,
     UserWithAppointments,
     ServiceAccountWithAppointments,
+    QueuePosition,
+    RankedAppointment,
+    CalendarDay,
+    AppointmentChange,
+    AppointmentChanges,
 )
 
 from app.schemas.service_account import (
     ServiceAccount,
     ServiceAccountCreate,
     ServiceAccountUpdate,
+    ServiceAccountSnapshot,
+    ServiceAccountAvailability,
+    TimeSlot,
+    DailyStats,
 )
 
 from app.schemas.user import (
@@ -22,12 +31,19 @@ from app.schemas.user import (
     User,
     UserCreate,
     UserUpdate,
+    UserSnapshot,
 )
 
 from app.schemas.response import (
     APIResponse,
 )
 
+from app.schemas.export import (
+    ColumnarFormat,
+    ExportFormat,
+    ExportTable,
+)
+
 from app.schemas.base import BaseAccount
 
 
@@ -38,13 +54,26 @@ __all__ = [
     "AppointmentDetail",
     "UserWithAppointments",
     "ServiceAccountWithAppointments",
+    "QueuePosition",
+    "RankedAppointment",
+    "CalendarDay",
+    "AppointmentChange",
+    "AppointmentChanges",
     "ServiceAccount",
     "ServiceAccountCreate",
     "ServiceAccountUpdate",
+    "ServiceAccountSnapshot",
+    "ServiceAccountAvailability",
+    "TimeSlot",
+    "DailyStats",
     "BaseAccount",
     "User",
     "UserCreate",
     "UserUpdate",
+    "UserSnapshot",
     "APIResponse",
+    "ColumnarFormat",
+    "ExportFormat",
+    "ExportTable",
     "BaseAccount",
 ]
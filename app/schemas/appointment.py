@@ -2,20 +2,35 @@
 Appointment schemas.
 """
 
-from typing import Optional, List
-from datetime import datetime, time, timezone
+from typing import Dict, Optional, List
+from datetime import date, datetime, time, timezone
 from pydantic import BaseModel, field_validator, ConfigDict
 
+from app.config import settings
 from app.models.appointment import AppointmentStatus
 from app.schemas.user import User
 from app.schemas.service_account import ServiceAccount
 
 
+def _validate_duration(v: Optional[int]) -> Optional[int]:
+    # Capacity checks only look this far back for overlapping bookings.
+    if v is not None and v > settings.APPOINTMENT_MAX_DURATION_MINUTES:
+        raise ValueError(
+            "Duration must not exceed "
+            f"{settings.APPOINTMENT_MAX_DURATION_MINUTES} minutes"
+        )
+    return v
+
+
 class AppointmentBase(BaseModel):
     appointment_date: datetime
     duration_minutes: Optional[int] = 30
     notes: Optional[str] = None
 
+    @field_validator("duration_minutes")
+    def validate_duration_minutes(cls, v):
+        return _validate_duration(v)
+
 
 class AppointmentCreate(AppointmentBase):
     user_phone: str
@@ -74,6 +89,10 @@ class AppointmentUpdate(BaseModel):
     duration_minutes: Optional[int] = None
     notes: Optional[str] = None
 
+    @field_validator("duration_minutes")
+    def validate_duration_minutes(cls, v):
+        return _validate_duration(v)
+
 
 class Appointment(AppointmentBase):
     id: int
@@ -86,6 +105,23 @@ class Appointment(AppointmentBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class RankedAppointment(Appointment):
+    rank: int
+    estimated_wait_minutes: int
+    estimated_start: datetime
+
+
+class AppointmentChange(Appointment):
+    updated_at: datetime
+    change_seq: int
+
+
+class AppointmentChanges(BaseModel):
+    changes: List[AppointmentChange] = []
+    cursor: int
+    has_more: bool = False
+
+
 class AppointmentDetail(Appointment):
     user: User
     service_account: ServiceAccount
@@ -97,3 +133,18 @@ class UserWithAppointments(User):
 
 class ServiceAccountWithAppointments(ServiceAccount):
     appointments: List[Appointment] = []
+
+
+class QueuePosition(BaseModel):
+    appointment_id: int
+    service_account_phone: str
+    rank: int
+    ahead: int
+    queue_length: int
+
+
+class CalendarDay(BaseModel):
+    day: date
+    total: int = 0
+    counts: Dict[AppointmentStatus, int] = {}
+    entries: List[Appointment] = []
@@ -0,0 +1,21 @@
+"""
+Export schemas.
+"""
+
+from enum import Enum
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ColumnarFormat(str, Enum):
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+
+class ExportTable(str, Enum):
+    APPOINTMENTS = "appointments"
+    USERS = "users"
+    SERVICE_ACCOUNTS = "service_accounts"
@@ -2,9 +2,9 @@
 Service account schemas.
 """
 
-from typing import Optional
-from datetime import datetime
-from pydantic import BaseModel, field_validator, EmailStr, ConfigDict
+from typing import List, Optional
+from datetime import date, datetime
+from pydantic import BaseModel, Field, field_validator, EmailStr, ConfigDict
 
 from app.schemas.base import BaseAccount
 
@@ -14,6 +14,7 @@ class ServiceAccountCreate(BaseAccount):
     enable_cancellation_scoring: Optional[bool] = True
     cancellation_weight: Optional[float] = 1.0
     no_show_weight: Optional[float] = 2.0
+    max_concurrent_appointments: Optional[int] = Field(None, ge=1)
 
 
 class ServiceAccountUpdate(BaseModel):
@@ -24,6 +25,7 @@ class ServiceAccountUpdate(BaseModel):
     enable_cancellation_scoring: Optional[bool] = None
     cancellation_weight: Optional[float] = None
     no_show_weight: Optional[float] = None
+    max_concurrent_appointments: Optional[int] = Field(None, ge=1)
 
     @field_validator("phone")
     def validate_no_phone_change(cls, v):
@@ -39,5 +41,32 @@ class ServiceAccount(BaseAccount):
     enable_cancellation_scoring: Optional[bool] = True
     cancellation_weight: Optional[float] = 1.0
     no_show_weight: Optional[float] = 2.0
+    max_concurrent_appointments: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ServiceAccountSnapshot(ServiceAccount):
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class TimeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class ServiceAccountAvailability(BaseModel):
+    service_account_phone: str
+    day: date
+    max_concurrent_appointments: Optional[int] = None
+    slots: List[TimeSlot] = []
+
+
+class DailyStats(BaseModel):
+    day: date
+    total: int = 0
+    active: int = 0
+    completed: int = 0
+    canceled: int = 0
+    no_show: int = 0
+    average_penalty: float = 0.0
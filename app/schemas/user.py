@@ -29,3 +29,7 @@ class User(BaseAccount):
     id: int
     created_at: datetime
     model_config = ConfigDict(from_attributes=True)
+
+
+class UserSnapshot(User):
+    model_config = ConfigDict(from_attributes=True, frozen=True)
@@ -5,10 +5,18 @@ Services module.
 from .appointment import AppointmentService
 from .service_account import ServiceAccountService
 from .user import UserService
+from .export import ExportService
+from .availability import AvailabilityService
+from .stats import StatsService
+from .events import AppointmentEventService
 
 
 __all__ = [
     "AppointmentService",
     "ServiceAccountService",
     "UserService",
+    "ExportService",
+    "AvailabilityService",
+    "StatsService",
+    "AppointmentEventService",
 ]
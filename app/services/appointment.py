@@ -3,22 +3,40 @@ Appointment service.
 """
 
 import math
+from sqlalchemy import func, select, tuple_, update
 from sqlalchemy.orm import Session
 
-from app.schemas import AppointmentCreate
+from app.schemas import AppointmentCreate, RankedAppointment
 from app.models.appointment import Appointment, AppointmentStatus
-from datetime import datetime, time, date, timezone
+from app.models.appointment_event import AppointmentEventType
+from datetime import datetime, time, date, timedelta, timezone
 from fastapi import HTTPException
 from typing import Optional, List
 
 from app.services.user import UserService
 from app.services.service_account import ServiceAccountService
 from app.exceptions import AppointmentAlreadyExists
-
-
+from app.backend.response_cache import response_cache
+from app.backend.session import SessionLocal
+from app.backend.metrics import (
+    appointment_rejections,
+    penalty_computations,
+    queue_length,
+)
+from app.services.queue_stream import queue_broadcaster
+from app.services.availability import AvailabilityService
+from app.services.stats import StatsService
+from app.services.events import AppointmentEventService, change_notifier
+from app.config import settings
+from app.backend.tracing import traced
+
+
+@traced
 class AppointmentService:
     """Service class containing appointment-related business logic"""
 
+    QUEUE_ORDER = (Appointment.penalty, Appointment.created_at, Appointment.id)
+
     @staticmethod
     def get_appointment(db: Session, appointment_id: int) -> Appointment:
         """Retrieve a single appointment by ID.
@@ -66,15 +84,15 @@ class AppointmentService:
             Combined appointment details with user and service account information
         """
         db_appointment = AppointmentService.get_appointment(db, appointment_id)
-        user = UserService.get_user(db, db_appointment.user_phone)
-        service_account = ServiceAccountService.get_service_account(
+        user = UserService.get_user_snapshot(db, db_appointment.user_phone)
+        service_account = ServiceAccountService.get_service_account_snapshot(
             db, db_appointment.service_account_phone
         )
 
         return {
             **db_appointment.to_dict(),
-            "user": user.to_dict(),
-            "service_account": service_account.to_dict(),
+            "user": user.model_dump(),
+            "service_account": service_account.model_dump(),
         }
 
     @staticmethod
@@ -126,6 +144,171 @@ class AppointmentService:
 
         return query.offset(skip).limit(limit).all()
 
+    @staticmethod
+    def get_calendar(
+        db: Session,
+        service_account_phone: str,
+        date_from: date,
+        date_to: date,
+        entries_per_day: int = 0,
+    ) -> List[dict]:
+        """Get per-day appointment counts by status over a date range.
+
+        Counts come from a single ``GROUP BY`` over the range, whatever the
+        number of appointments. When entries are requested, the first ones
+        of each day are fetched with one extra windowed query.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: str
+            Target service account phone
+        date_from: date
+            First day of the range
+        date_to: date
+            Last day of the range (inclusive)
+        entries_per_day: int
+            Number of appointments to inline per day, by appointment time
+
+        Returns:
+        --------
+        List[dict]
+            One entry per day of the range with ``total``, ``counts`` per
+            status and the inlined ``entries``
+
+        Raises:
+        -------
+        HTTPException: 400 if the range is inverted or too long
+        """
+        number_of_days = (date_to - date_from).days + 1
+        if number_of_days < 1:
+            raise HTTPException(
+                status_code=400, detail="'to' must not be earlier than 'from'"
+            )
+        if number_of_days > settings.CALENDAR_MAX_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Calendar range cannot exceed {settings.CALENDAR_MAX_DAYS} days",
+            )
+
+        range_filters = [
+            Appointment.service_account_phone == service_account_phone,
+            Appointment.appointment_date
+            >= datetime.combine(date_from, time.min).replace(tzinfo=timezone.utc),
+            Appointment.appointment_date
+            <= datetime.combine(date_to, time.max).replace(tzinfo=timezone.utc),
+        ]
+        appointment_day = func.date(Appointment.appointment_date)
+
+        calendar = {
+            date_from + timedelta(days=offset): {
+                "day": date_from + timedelta(days=offset),
+                "total": 0,
+                "counts": {status: 0 for status in AppointmentStatus},
+                "entries": [],
+            }
+            for offset in range(number_of_days)
+        }
+
+        counts = (
+            db.query(appointment_day, Appointment.status, func.count(Appointment.id))
+            .filter(*range_filters)
+            .group_by(appointment_day, Appointment.status)
+            .all()
+        )
+        for day, appointment_status, count in counts:
+            entry = calendar[AppointmentService._as_date(day)]
+            entry["counts"][appointment_status] = count
+            entry["total"] += count
+
+        if entries_per_day > 0:
+            numbered = (
+                select(
+                    Appointment.id,
+                    func.row_number()
+                    .over(
+                        partition_by=appointment_day,
+                        order_by=(Appointment.appointment_date, Appointment.id),
+                    )
+                    .label("row_number"),
+                )
+                .where(*range_filters)
+                .subquery()
+            )
+            first_entries = (
+                db.query(Appointment)
+                .join(numbered, numbered.c.id == Appointment.id)
+                .filter(numbered.c.row_number <= entries_per_day)
+                .order_by(Appointment.appointment_date, Appointment.id)
+                .all()
+            )
+            for appointment in first_entries:
+                day = AppointmentService._as_date(appointment.appointment_date)
+                calendar[day]["entries"].append(appointment.to_dict())
+
+        return list(calendar.values())
+
+    @staticmethod
+    def get_changes(
+        db: Session,
+        since: int = 0,
+        updated_since: Optional[datetime] = None,
+        service_account_phone: Optional[str] = None,
+        limit: int = 100,
+    ) -> dict:
+        """Get appointments created or modified after a cursor, in change order.
+
+        Every mutation stamps the appointment with the sequence of its event
+        log entry, so a page is one range read on the ``change_seq`` index
+        and an appointment appears once, at its latest change.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        since: int
+            Cursor returned by the previous page (0 to start from scratch)
+        updated_since: Optional[datetime]
+            Only return appointments modified at or after this time
+        service_account_phone: Optional[str]
+            Only return appointments of this service account
+        limit: int
+            Maximum number of appointments to return
+
+        Returns:
+        --------
+        dict
+            ``changes`` in sequence order, the ``cursor`` to pass next and
+            whether more changes are already available (``has_more``)
+        """
+        query = db.query(Appointment).filter(Appointment.change_seq > since)
+        if service_account_phone:
+            query = query.filter(
+                Appointment.service_account_phone == service_account_phone
+            )
+        if updated_since:
+            if updated_since.tzinfo is None:
+                updated_since = updated_since.replace(tzinfo=timezone.utc)
+            query = query.filter(Appointment.updated_at >= updated_since)
+
+        changes = query.order_by(Appointment.change_seq).limit(limit + 1).all()
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        return {
+            "changes": [change.to_dict() for change in changes],
+            "cursor": changes[-1].change_seq if changes else since,
+            "has_more": has_more,
+        }
+
+    @staticmethod
+    def _as_date(value) -> date:
+        if isinstance(value, str):
+            return date.fromisoformat(value)
+        if isinstance(value, datetime):
+            return value.date()
+        return value
+
     @staticmethod
     def create_appointment(db: Session, appointment: AppointmentCreate) -> Appointment:
         """Create a new appointment with queue-based scheduling.
@@ -145,9 +328,11 @@ class AppointmentService:
         Raises:
         -------
         HTTPException: 400 if duplicate appointment exists
+        AppointmentSlotUnavailable: if the service account is fully booked
+            at that time
         """
-        user = UserService.get_user(db, appointment.user_phone)
-        service_account = ServiceAccountService.get_service_account(
+        user = UserService.get_user_snapshot(db, appointment.user_phone)
+        service_account = ServiceAccountService.get_service_account_snapshot(
             db, appointment.service_account_phone
         )
 
@@ -171,8 +356,17 @@ class AppointmentService:
         )
 
         if existing:
+            appointment_rejections.inc("duplicate")
             raise AppointmentAlreadyExists(user.phone)
 
+        AvailabilityService.check_slot(
+            db,
+            service_account.phone,
+            service_account.max_concurrent_appointments,
+            appointment.appointment_date,
+            appointment.duration_minutes,
+        )
+
         penalty = AppointmentService.calculate_user_penalty(
             db, user.phone, service_account.phone
         )
@@ -184,8 +378,15 @@ class AppointmentService:
         )
 
         db.add(db_appointment)
+        db.flush()
+        AvailabilityService.enforce_capacity(
+            db, db_appointment, service_account.max_concurrent_appointments
+        )
+        StatsService.record_created(db, db_appointment)
+        AppointmentEventService.record(db, db_appointment, AppointmentEventType.CREATED)
         db.commit()
         db.refresh(db_appointment)
+        AppointmentService._appointment_changed(db, db_appointment)
         return db_appointment
 
     @staticmethod
@@ -208,13 +409,14 @@ class AppointmentService:
         float
             Penalty score between 0 (reliable) and 1 (unreliable)
         """
-        service_account = ServiceAccountService.get_service_account(
+        service_account = ServiceAccountService.get_service_account_snapshot(
             db, service_account_phone
         )
 
         if not service_account.enable_cancellation_scoring:
             return 0.0
 
+        penalty_computations.inc()
         history = (
             db.query(Appointment)
             .filter(
@@ -321,9 +523,10 @@ class AppointmentService:
                     status_code=400, detail="Only active appointments can be canceled"
                 )
 
-        db_appointment.status = new_status
+        AppointmentService._set_status(db, db_appointment, new_status)
         db.commit()
         db.refresh(db_appointment)
+        AppointmentService._appointment_changed(db, db_appointment)
         return db_appointment
 
     @staticmethod
@@ -348,7 +551,7 @@ class AppointmentService:
         List[Appointment]
             List of user's appointments
         """
-        UserService.get_user(db, user_phone)
+        UserService.get_user_snapshot(db, user_phone)
         return (
             db.query(Appointment)
             .filter(Appointment.user_phone == user_phone)
@@ -379,7 +582,7 @@ class AppointmentService:
         List[Appointment]
             List of service account's appointments
         """
-        ServiceAccountService.get_service_account(db, service_account_phone)
+        ServiceAccountService.get_service_account_snapshot(db, service_account_phone)
         return (
             db.query(Appointment)
             .filter(Appointment.service_account_phone == service_account_phone)
@@ -420,31 +623,346 @@ class AppointmentService:
             Prioritized list of appointments
         """
         base_query = db.query(Appointment).filter(
-            Appointment.service_account_phone == service_account_phone,
-            Appointment.status == AppointmentStatus.ACTIVE,
+            *AppointmentService._queue_filters(service_account_phone, day)
         )
 
         if user_phone:
             base_query = base_query.filter(Appointment.user_phone == user_phone)
 
+        return (
+            base_query.order_by(*AppointmentService.QUEUE_ORDER)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def get_ranked_queue(
+        db: Session,
+        service_account_phone: str,
+        day: Optional[date] = None,
+        user_phone: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[dict]:
+        """Get the ranked queue with each entry's estimated wait.
+
+        The wait of an entry is the running sum of ``duration_minutes`` of
+        every entry of the same day ranked before it, computed by a window
+        function in the same query that ranks the queue. Each day's queue
+        starts now, or at its first appointment when that is later.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: str
+            Target service account phone
+        day: Optional[date]
+            Filter for specific day
+        user_phone: Optional[str]
+            Only return this user's entries (ranks and waits still account
+            for the whole queue)
+        skip: int
+            Number of records to skip
+        limit: int
+            Maximum number of records to return
+
+        Returns:
+        --------
+        List[dict]
+            Appointments with ``rank``, ``estimated_wait_minutes`` and
+            ``estimated_start``
+        """
+        order = AppointmentService.QUEUE_ORDER
+        appointment_day = func.date(Appointment.appointment_date)
+        ranked = (
+            select(
+                Appointment.id,
+                func.row_number().over(order_by=order).label("rank"),
+                func.coalesce(
+                    func.sum(func.coalesce(Appointment.duration_minutes, 0)).over(
+                        partition_by=appointment_day, order_by=order, rows=(None, -1)
+                    ),
+                    0,
+                ).label("wait"),
+                func.min(Appointment.appointment_date)
+                .over(partition_by=appointment_day)
+                .label("first_date"),
+            )
+            .where(*AppointmentService._queue_filters(service_account_phone, day))
+            .subquery()
+        )
+
+        query = db.query(
+            Appointment, ranked.c.rank, ranked.c.wait, ranked.c.first_date
+        ).join(ranked, ranked.c.id == Appointment.id)
+
+        if user_phone:
+            query = query.filter(Appointment.user_phone == user_phone)
+
+        rows = query.order_by(ranked.c.rank).offset(skip).limit(limit).all()
+
+        now = datetime.now(timezone.utc)
+        queue = []
+        for appointment, rank, wait, first_date in rows:
+            if first_date.tzinfo is None:
+                first_date = first_date.replace(tzinfo=timezone.utc)
+            start = max(now, first_date)
+            queue.append(
+                {
+                    **appointment.to_dict(),
+                    "rank": rank,
+                    "estimated_wait_minutes": wait,
+                    "estimated_start": start + timedelta(minutes=wait),
+                }
+            )
+        return queue
+
+    @staticmethod
+    def _queue_filters(service_account_phone: str, day: Optional[date] = None) -> list:
+        """Build the filters selecting the active queue of a service account.
+
+        Parameters:
+        -----------
+        service_account_phone: str
+            Target service account phone
+        day: Optional[date]
+            Restrict the queue to one day; defaults to every day from today on
+
+        Returns:
+        --------
+        list
+            SQLAlchemy filter expressions
+        """
+        filters = [
+            Appointment.service_account_phone == service_account_phone,
+            Appointment.status == AppointmentStatus.ACTIVE,
+        ]
+
         if day:
             day_start = datetime.combine(day, time.min).replace(tzinfo=timezone.utc)
             day_end = datetime.combine(day, time.max).replace(tzinfo=timezone.utc)
-            base_query = base_query.filter(
+            filters += [
                 Appointment.appointment_date >= day_start,
                 Appointment.appointment_date <= day_end,
-            )
+            ]
         else:
             today = datetime.now(timezone.utc).date()
             today_start = datetime.combine(today, time.min).replace(tzinfo=timezone.utc)
-            base_query = base_query.filter(Appointment.appointment_date >= today_start)
+            filters.append(Appointment.appointment_date >= today_start)
+
+        return filters
+
+    @staticmethod
+    def get_queue_position(
+        db: Session, appointment_id: int, day: Optional[date] = None
+    ) -> dict:
+        """Get the rank of an appointment in its service account's queue.
+
+        The rank is a count over an index range seek on the rows ordering
+        before ``(penalty, created_at, id)``; the queue is never loaded or
+        sorted.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        appointment_id: int
+            Target appointment ID
+        day: Optional[date]
+            Rank within that day's queue instead of the queue from today on
 
-        appointments = base_query.all()
-        sorted_appointments = sorted(
-            appointments, key=lambda x: (x.penalty, x.created_at)
+        Returns:
+        --------
+        dict
+            Rank (1-based), number of appointments ahead and queue length
+
+        Raises:
+        -------
+        HTTPException: 404 if appointment not found, 400 if it is not in the queue
+        """
+        appointment = AppointmentService.get_appointment(db, appointment_id)
+        filters = AppointmentService._queue_filters(
+            appointment.service_account_phone, day
         )
 
-        return sorted_appointments[skip : skip + limit]
+        in_queue = db.query(Appointment.id).filter(
+            Appointment.id == appointment.id, *filters
+        )
+        if not db.query(in_queue.exists()).scalar():
+            raise HTTPException(
+                status_code=400,
+                detail=f"Appointment {appointment_id} is not in the active queue",
+            )
+
+        count_query = db.query(func.count(Appointment.id)).filter(*filters)
+        ahead = count_query.filter(
+            tuple_(*AppointmentService.QUEUE_ORDER)
+            < tuple_(appointment.penalty, appointment.created_at, appointment.id)
+        ).scalar()
+        length = count_query.scalar()
+        queue_length.observe(length)
+
+        return {
+            "appointment_id": appointment.id,
+            "service_account_phone": appointment.service_account_phone,
+            "rank": ahead + 1,
+            "ahead": ahead,
+            "queue_length": length,
+        }
+
+    @staticmethod
+    def claim_next_appointment(
+        db: Session, service_account_phone: str, day: Optional[date] = None
+    ) -> Appointment:
+        """Atomically claim the highest-ranked active appointment of a queue.
+
+        The claim is a single conditional ``UPDATE ... RETURNING`` on the
+        top row in ranking order. On PostgreSQL the row is picked with
+        ``FOR UPDATE SKIP LOCKED`` so concurrent desks never wait on each
+        other; on SQLite the statement runs under the database write lock.
+        Either way, two callers can never claim the same appointment.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: str
+            Target service account phone
+        day: Optional[date]
+            Claim from that day's queue instead of the queue from today on
+
+        Returns:
+        --------
+        Appointment
+            The claimed appointment, now marked as completed
+
+        Raises:
+        -------
+        ServiceAccountNotFound: if service account not found
+        HTTPException: 404 if the queue is empty
+        """
+        next_id = (
+            select(Appointment.id)
+            .where(*AppointmentService._queue_filters(service_account_phone, day))
+            .order_by(*AppointmentService.QUEUE_ORDER)
+            .limit(1)
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            next_id = next_id.with_for_update(skip_locked=True)
+
+        claimed = db.execute(
+            update(Appointment)
+            .where(
+                Appointment.id == next_id.scalar_subquery(),
+                Appointment.status == AppointmentStatus.ACTIVE,
+            )
+            .values(status=AppointmentStatus.COMPLETED)
+            .returning(Appointment)
+        ).scalar_one_or_none()
+        if claimed is not None:
+            StatsService.record_transition(
+                db,
+                claimed.service_account_phone,
+                claimed.appointment_date,
+                AppointmentStatus.ACTIVE,
+                AppointmentStatus.COMPLETED,
+            )
+            AppointmentEventService.record(
+                db,
+                claimed,
+                AppointmentEventType.STATUS_CHANGED,
+                from_status=AppointmentStatus.ACTIVE,
+                to_status=AppointmentStatus.COMPLETED,
+            )
+        db.commit()
+
+        if claimed is None:
+            ServiceAccountService.get_service_account_snapshot(
+                db, service_account_phone
+            )
+            raise HTTPException(
+                status_code=404,
+                detail=f"No active appointments in the queue of {service_account_phone}",
+            )
+
+        db.refresh(claimed)
+        AppointmentService._appointment_changed(db, claimed)
+        return claimed
+
+    @staticmethod
+    def get_queue_snapshot(db: Session, service_account_phone: str) -> List[dict]:
+        """Get the serialized ranked queue pushed to live subscribers.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: str
+            Target service account phone
+
+        Returns:
+        --------
+        List[dict]
+            JSON-compatible ranked appointments
+        """
+        snapshot = [
+            RankedAppointment.model_validate(entry).model_dump(mode="json")
+            for entry in AppointmentService.get_ranked_queue(
+                db,
+                service_account_phone=service_account_phone,
+                limit=settings.QUEUE_STREAM_MAX_ENTRIES,
+            )
+        ]
+        queue_length.observe(len(snapshot))
+        return snapshot
+
+    @staticmethod
+    def _set_status(
+        db: Session, appointment: Appointment, new_status: AppointmentStatus
+    ) -> None:
+        """Change an appointment's status within the caller's transaction.
+
+        The transition is recorded in the daily rollup and appended to the
+        event log, so all three are committed together.
+        """
+        from_status = appointment.status
+        StatsService.record_transition(
+            db,
+            appointment.service_account_phone,
+            appointment.appointment_date,
+            from_status,
+            new_status,
+        )
+        appointment.status = new_status
+        AppointmentEventService.record(
+            db,
+            appointment,
+            AppointmentEventType.STATUS_CHANGED,
+            from_status=from_status,
+            to_status=new_status,
+        )
+
+    @staticmethod
+    def _appointment_changed(db: Session, appointment: Appointment) -> None:
+        """Propagate a committed change of an appointment.
+
+        Updates the loaded availability index of its day, invalidates cached
+        queue reads, wakes up change feed long-polls and, when the queue has
+        live subscribers, recomputes its snapshot once and broadcasts the diff.
+        Other workers are told about the change to do the same.
+        """
+        service_account_phone = appointment.service_account_phone
+        AvailabilityService.sync_appointment(appointment)
+        response_cache.invalidate(f"queue:{service_account_phone}")
+        change_notifier.notify()
+        queue_broadcaster.announce(service_account_phone)
+        if queue_broadcaster.has_subscribers(service_account_phone):
+            queue_broadcaster.publish(
+                service_account_phone,
+                AppointmentService.get_queue_snapshot(db, service_account_phone),
+            )
 
     @staticmethod
     def cancel_appointment(db: Session, appointment_id: int) -> Appointment:
@@ -470,10 +988,11 @@ class AppointmentService:
                 detail=f"Cannot cancel appointment with status '{status_display}'. Only active appointments can be canceled.",
             )
 
-        appointment.status = AppointmentStatus.CANCELED
+        AppointmentService._set_status(db, appointment, AppointmentStatus.CANCELED)
 
         db.commit()
         db.refresh(appointment)
+        AppointmentService._appointment_changed(db, appointment)
         return appointment
 
     @staticmethod
@@ -492,9 +1011,10 @@ class AppointmentService:
             Completed appointment object
         """
         appointment = AppointmentService.get_appointment(db, appointment_id)
-        appointment.status = AppointmentStatus.COMPLETED
+        AppointmentService._set_status(db, appointment, AppointmentStatus.COMPLETED)
         db.commit()
         db.refresh(appointment)
+        AppointmentService._appointment_changed(db, appointment)
         return appointment
 
     @staticmethod
@@ -513,10 +1033,11 @@ class AppointmentService:
             Marked no show appointment object
         """
         appointment = AppointmentService.get_appointment(db, appointment_id)
-        appointment.status = AppointmentStatus.NO_SHOW
+        AppointmentService._set_status(db, appointment, AppointmentStatus.NO_SHOW)
 
         db.commit()
         db.refresh(appointment)
+        AppointmentService._appointment_changed(db, appointment)
         return appointment
 
     @staticmethod
@@ -528,7 +1049,7 @@ class AppointmentService:
         Parameters:
         -----------
         """
-        UserService.get_user(db, user_phone)
+        UserService.get_user_snapshot(db, user_phone)
         return (
             db.query(Appointment)
             .filter(Appointment.user_phone == user_phone)
@@ -536,3 +1057,15 @@ class AppointmentService:
             .limit(limit)
             .all()
         )
+
+
+def _load_queue_snapshot(service_account_phone: str) -> List[dict]:
+    """Recompute a queue snapshot for a change announced by another worker."""
+    db = SessionLocal()
+    try:
+        return AppointmentService.get_queue_snapshot(db, service_account_phone)
+    finally:
+        db.close()
+
+
+queue_broadcaster.load_snapshot = _load_queue_snapshot
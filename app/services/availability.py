@@ -0,0 +1,457 @@
+"""
+Availability service.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.backend.cache import create_cache_backend
+from app.backend.metrics import appointment_rejections
+from app.config import settings
+from app.exceptions import AppointmentSlotUnavailable
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.service_account import ServiceAccount
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class IntervalIndex:
+    """Sorted interval list of the bookings of one service account on one day.
+
+    A day's index holds every booking overlapping it, including those
+    started the evening before.
+
+    Intervals are kept sorted by start time next to the longest booked
+    duration, so the bookings overlapping a range are found with one
+    binary search plus a scan over the candidates that can reach it.
+    """
+
+    def __init__(self, version: int = 0):
+        self.version = version
+        self._starts: List[Tuple[datetime, int]] = []
+        self._intervals: Dict[int, Tuple[datetime, datetime]] = {}
+        self._max_duration = timedelta(0)
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def add(self, appointment_id: int, start: datetime, end: datetime) -> None:
+        self.remove(appointment_id)
+        insort(self._starts, (start, appointment_id))
+        self._intervals[appointment_id] = (start, end)
+        self._max_duration = max(self._max_duration, end - start)
+
+    def remove(self, appointment_id: int) -> None:
+        interval = self._intervals.pop(appointment_id, None)
+        if interval is None:
+            return
+        index = bisect_left(self._starts, (interval[0], appointment_id))
+        del self._starts[index]
+
+    def overlapping(
+        self, start: datetime, end: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """Return the booked intervals intersecting ``[start, end)``.
+
+        Parameters:
+        -----------
+        start: datetime
+            Range start
+        end: datetime
+            Range end (exclusive)
+
+        Returns:
+        --------
+        List[Tuple[datetime, datetime]]
+            Overlapping intervals
+        """
+        low = bisect_left(self._starts, (start - self._max_duration,))
+        high = bisect_left(self._starts, (end,))
+        result = []
+        for interval_start, appointment_id in self._starts[low:high]:
+            interval_end = self._intervals[appointment_id][1]
+            if interval_end > start:
+                result.append((interval_start, interval_end))
+        return result
+
+    def max_concurrency(self, start: datetime, end: datetime) -> int:
+        """Return the peak number of bookings overlapping ``[start, end)``."""
+        events = []
+        for interval_start, interval_end in self.overlapping(start, end):
+            events.append((max(interval_start, start), 1))
+            events.append((min(interval_end, end), -1))
+
+        peak = depth = 0
+        for _, delta in sorted(events):
+            depth += delta
+            peak = max(peak, depth)
+        return peak
+
+    def free_windows(
+        self, start: datetime, end: datetime, capacity: int
+    ) -> List[Tuple[datetime, datetime]]:
+        """Return the sub-ranges of ``[start, end)`` with spare capacity."""
+        events = [(start, 0)]
+        for interval_start, interval_end in self.overlapping(start, end):
+            events.append((max(interval_start, start), 1))
+            events.append((min(interval_end, end), -1))
+        events.append((end, 0))
+        events.sort()
+
+        windows = []
+        depth = 0
+        window_start = None
+        for moment, delta in events:
+            depth += delta
+            if depth < capacity and window_start is None:
+                window_start = moment
+            elif depth >= capacity and window_start is not None:
+                if moment > window_start:
+                    windows.append((window_start, moment))
+                window_start = None
+
+        if window_start is not None and end > window_start:
+            windows.append((window_start, end))
+        return windows
+
+
+class AvailabilityService:
+    """Service class containing slot availability logic
+
+    Day indexes are kept in process. Each day also has a version counter
+    in the cache backend, bumped by every booking change; an index built
+    at an older version than the counter (because another worker changed
+    that day) is rebuilt on its next use. Counters expire a while after
+    their day is over, and indexes of past days are never kept, since
+    there is no counter left to tell whether they are stale.
+
+    Indexes only reflect committed bookings, so ``check_slot`` is a fast
+    way to turn down full slots; ``enforce_capacity`` has the final say
+    within the booking's transaction.
+    """
+
+    _indexes: "OrderedDict[Tuple[str, date], IntervalIndex]" = OrderedDict()
+    _lock = threading.RLock()
+    _versions = create_cache_backend(max_entries=1, prefix="waitlist-availability:")
+    # How long a day's version counter outlives the day, covering clock
+    # skew between workers.
+    _version_grace = timedelta(days=1)
+
+    @staticmethod
+    def _version_key(service_account_phone: str, day: date) -> str:
+        return f"version:{service_account_phone}:{day.isoformat()}"
+
+    @staticmethod
+    def _day_bounds(day: date) -> Tuple[datetime, datetime]:
+        day_start = datetime.combine(day, time.min)
+        return day_start, day_start + timedelta(days=1)
+
+    @staticmethod
+    def _days(start: datetime, end: datetime) -> List[date]:
+        """Return the days overlapped by ``[start, end)``, at least the first."""
+        last = max(start, end - timedelta(microseconds=1)).date()
+        days = [start.date()]
+        while days[-1] < last:
+            days.append(days[-1] + timedelta(days=1))
+        return days
+
+    @staticmethod
+    def _is_past(day: date) -> bool:
+        return day < datetime.now(timezone.utc).date()
+
+    @staticmethod
+    def _interval(appointment: Appointment) -> Tuple[datetime, datetime]:
+        start = _naive_utc(appointment.appointment_date)
+        return start, start + timedelta(minutes=appointment.duration_minutes or 0)
+
+    @staticmethod
+    def rebuild_index(
+        db: Session, service_account_phone: str, day: date
+    ) -> IntervalIndex:
+        """Rebuild the interval index of a service account's day from the database.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: str
+            Target service account phone
+        day: date
+            Day to index
+
+        Returns:
+        --------
+        IntervalIndex
+            The rebuilt index
+        """
+        # Read the version first: a change committed while the rows are
+        # loaded bumps it past this value and triggers another rebuild.
+        version = AvailabilityService._versions.get_counters(
+            [AvailabilityService._version_key(service_account_phone, day)]
+        )[0]
+        index = AvailabilityService._load_index(
+            db, service_account_phone, *AvailabilityService._day_bounds(day), version
+        )
+        if AvailabilityService._is_past(day):
+            return index
+
+        key = (service_account_phone, day)
+        with AvailabilityService._lock:
+            AvailabilityService._indexes[key] = index
+            AvailabilityService._indexes.move_to_end(key)
+            while (
+                len(AvailabilityService._indexes) > settings.AVAILABILITY_INDEX_MAX_DAYS
+            ):
+                AvailabilityService._indexes.popitem(last=False)
+        return index
+
+    @staticmethod
+    def _load_index(
+        db: Session,
+        service_account_phone: str,
+        start: datetime,
+        end: datetime,
+        version: int = 0,
+    ) -> IntervalIndex:
+        """Index the active bookings overlapping ``[start, end)``.
+
+        Only bookings starting within the longest allowed duration before
+        ``start`` are read, so the query stays bounded by the range.
+        """
+        lookback = timedelta(minutes=settings.APPOINTMENT_MAX_DURATION_MINUTES)
+        rows = (
+            db.query(
+                Appointment.id,
+                Appointment.appointment_date,
+                Appointment.duration_minutes,
+            )
+            .filter(
+                Appointment.service_account_phone == service_account_phone,
+                Appointment.status == AppointmentStatus.ACTIVE,
+                Appointment.appointment_date
+                >= (start - lookback).replace(tzinfo=timezone.utc),
+                Appointment.appointment_date < end.replace(tzinfo=timezone.utc),
+            )
+            .all()
+        )
+
+        index = IntervalIndex(version)
+        for appointment_id, appointment_date, duration_minutes in rows:
+            interval_start = _naive_utc(appointment_date)
+            interval_end = interval_start + timedelta(minutes=duration_minutes or 0)
+            if interval_start >= start or interval_end > start:
+                index.add(appointment_id, interval_start, interval_end)
+        return index
+
+    @staticmethod
+    def get_index(db: Session, service_account_phone: str, day: date) -> IntervalIndex:
+        """Get the up-to-date interval index of a service account's day.
+
+        The index is rebuilt when missing or older than the day's version.
+        """
+        key = (service_account_phone, day)
+        version = AvailabilityService._versions.get_counters(
+            [AvailabilityService._version_key(service_account_phone, day)]
+        )[0]
+        with AvailabilityService._lock:
+            index = AvailabilityService._indexes.get(key)
+            if index is not None and index.version == version:
+                AvailabilityService._indexes.move_to_end(key)
+                return index
+        return AvailabilityService.rebuild_index(db, service_account_phone, day)
+
+    @staticmethod
+    def check_slot(
+        db: Session,
+        service_account_phone: str,
+        capacity: Optional[int],
+        appointment_date: datetime,
+        duration_minutes: int,
+    ) -> None:
+        """Ensure a booking fits within the service account's capacity.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: str
+            Target service account phone
+        capacity: Optional[int]
+            Maximum concurrent appointments; ``None`` disables the check
+        appointment_date: datetime
+            Requested start
+        duration_minutes: int
+            Requested duration
+
+        Raises:
+        -------
+        AppointmentSlotUnavailable: if the slot is already at capacity
+        """
+        if capacity is None:
+            return
+
+        start = _naive_utc(appointment_date)
+        end = start + timedelta(minutes=duration_minutes or 0)
+        for day in AvailabilityService._days(start, end):
+            day_start, day_end = AvailabilityService._day_bounds(day)
+            index = AvailabilityService.get_index(db, service_account_phone, day)
+            with AvailabilityService._lock:
+                peak = index.max_concurrency(max(start, day_start), min(end, day_end))
+            if peak >= capacity:
+                appointment_rejections.inc("slot_unavailable")
+                raise AppointmentSlotUnavailable(appointment_date)
+
+    @staticmethod
+    def enforce_capacity(
+        db: Session, appointment: Appointment, capacity: Optional[int]
+    ) -> None:
+        """Recount a flushed booking against the others before it is committed.
+
+        Bookings committed by other requests since ``check_slot`` read its
+        index are counted here. The service account row is locked first
+        (``SELECT ... FOR UPDATE``), so the bookings of one account go
+        through this check one at a time; SQLite ignores the lock but
+        already serializes writers from the booking's flush on.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session holding the booking, flushed but not committed
+        appointment: Appointment
+            The pending booking
+        capacity: Optional[int]
+            Maximum concurrent appointments; ``None`` disables the check
+
+        Raises:
+        -------
+        AppointmentSlotUnavailable: if the slot is over capacity, after
+            rolling the transaction back
+        """
+        if capacity is None:
+            return
+
+        db.execute(
+            select(ServiceAccount.id)
+            .where(ServiceAccount.phone == appointment.service_account_phone)
+            .with_for_update()
+        )
+        start, end = AvailabilityService._interval(appointment)
+        index = AvailabilityService._load_index(
+            db, appointment.service_account_phone, start, end
+        )
+        if index.max_concurrency(start, end) > capacity:
+            db.rollback()
+            appointment_rejections.inc("slot_unavailable")
+            raise AppointmentSlotUnavailable(appointment.appointment_date)
+
+    @staticmethod
+    def sync_appointment(appointment: Appointment) -> None:
+        """Reflect a committed appointment change in its day index.
+
+        Bumps the version of every day the appointment overlaps, for every
+        worker. Active appointments occupy their interval and any other
+        status frees it. Days whose index is not loaded, or that missed a
+        change from another worker, are left to be rebuilt from the database
+        on first use. Days over for longer than the grace period are skipped.
+        """
+        start, end = AvailabilityService._interval(appointment)
+        now = _naive_utc(datetime.now(timezone.utc))
+        for day in AvailabilityService._days(start, end):
+            expires_at = (
+                AvailabilityService._day_bounds(day)[1]
+                + AvailabilityService._version_grace
+            )
+            if expires_at <= now:
+                continue
+
+            key = (appointment.service_account_phone, day)
+            version = AvailabilityService._versions.incr(
+                AvailabilityService._version_key(
+                    appointment.service_account_phone, day
+                ),
+                ttl=(expires_at - now).total_seconds(),
+            )
+            with AvailabilityService._lock:
+                index = AvailabilityService._indexes.get(key)
+                if index is None:
+                    continue
+                if index.version != version - 1:
+                    del AvailabilityService._indexes[key]
+                    continue
+                if appointment.status == AppointmentStatus.ACTIVE:
+                    index.add(appointment.id, start, end)
+                else:
+                    index.remove(appointment.id)
+                index.version = version
+
+    @staticmethod
+    def get_free_slots(
+        db: Session,
+        service_account_phone: str,
+        capacity: Optional[int],
+        day: date,
+        slot_minutes: int,
+    ) -> List[dict]:
+        """List the bookable slots of a service account on a day.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: str
+            Target service account phone
+        capacity: Optional[int]
+            Maximum concurrent appointments; ``None`` means unlimited
+        day: date
+            Day to inspect
+        slot_minutes: int
+            Length of each returned slot
+
+        Returns:
+        --------
+        List[dict]
+            Free slots within opening hours, from now on
+        """
+        opening = datetime.combine(day, time(hour=settings.AVAILABILITY_OPENING_HOUR))
+        closing = datetime.combine(day, time(hour=settings.AVAILABILITY_CLOSING_HOUR))
+        opening = max(
+            opening,
+            _naive_utc(datetime.now(timezone.utc)).replace(second=0, microsecond=0),
+        )
+
+        if capacity is None:
+            windows = [(opening, closing)] if closing > opening else []
+        else:
+            index = AvailabilityService.get_index(db, service_account_phone, day)
+            with AvailabilityService._lock:
+                windows = index.free_windows(opening, closing, capacity)
+
+        length = timedelta(minutes=slot_minutes)
+        slots = []
+        for window_start, window_end in windows:
+            slot_start = window_start
+            while slot_start + length <= window_end:
+                slots.append(
+                    {
+                        "start": slot_start.replace(tzinfo=timezone.utc),
+                        "end": (slot_start + length).replace(tzinfo=timezone.utc),
+                    }
+                )
+                slot_start += length
+        return slots
+
+    @staticmethod
+    def clear() -> None:
+        with AvailabilityService._lock:
+            AvailabilityService._indexes.clear()
+        AvailabilityService._versions.clear()
@@ -0,0 +1,165 @@
+"""
+Appointment event service.
+"""
+
+import asyncio
+import threading
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.backend.cache import RedisChannel, create_channel
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.appointment_event import AppointmentEvent, AppointmentEventType
+
+
+# Postgres advisory lock serializing event sequence assignment.
+EVENT_SEQUENCE_LOCK = 0x77616974
+
+
+class AppointmentEventService:
+    """Service class writing and reading the appointment event log"""
+
+    @staticmethod
+    def record(
+        db: Session,
+        appointment: Appointment,
+        event_type: AppointmentEventType,
+        from_status: Optional[AppointmentStatus] = None,
+        to_status: Optional[AppointmentStatus] = None,
+    ) -> AppointmentEvent:
+        """Append an event to the log within the caller's transaction.
+
+        Sequences must be assigned in commit order, or a consumer could move
+        its cursor past an event whose transaction commits later. SQLite
+        holds its write lock from a transaction's first write to its commit,
+        which already guarantees it; on Postgres a transaction-level advisory
+        lock is taken before the sequence is drawn and held until commit.
+        Pending changes are flushed first, so that this lock is always the
+        last one a writer waits for, and the caller must commit right after.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        appointment: Appointment
+            Appointment the event is about (must already have an ID)
+        event_type: AppointmentEventType
+            Kind of change
+        from_status: Optional[AppointmentStatus]
+            Status before the change, if any
+        to_status: Optional[AppointmentStatus]
+            Status after the change; defaults to the appointment's status
+
+        Returns:
+        --------
+        AppointmentEvent
+            The pending event, flushed so that its sequence is assigned.
+            The appointment's ``change_seq`` and ``updated_at`` are set from
+            it, which feeds the change feed.
+        """
+        db.flush()
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"),
+                {"key": EVENT_SEQUENCE_LOCK},
+            )
+        event = AppointmentEvent(
+            appointment_id=appointment.id,
+            service_account_phone=appointment.service_account_phone,
+            user_phone=appointment.user_phone,
+            event_type=event_type,
+            from_status=from_status,
+            to_status=to_status or appointment.status,
+        )
+        db.add(event)
+        db.flush()
+        appointment.change_seq = event.id
+        appointment.updated_at = event.created_at
+        return event
+
+    @staticmethod
+    def get_events(
+        db: Session,
+        after: int = 0,
+        service_account_phone: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[AppointmentEvent]:
+        """Read events in sequence order after a cursor.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        after: int
+            Return events with a sequence strictly greater than this one
+        service_account_phone: Optional[str]
+            Only return events of this service account
+        limit: int
+            Maximum number of events to return
+
+        Returns:
+        --------
+        List[AppointmentEvent]
+            Events ordered by sequence
+        """
+        query = db.query(AppointmentEvent).filter(AppointmentEvent.id > after)
+        if service_account_phone:
+            query = query.filter(
+                AppointmentEvent.service_account_phone == service_account_phone
+            )
+        return query.order_by(AppointmentEvent.id).limit(limit).all()
+
+
+class ChangeNotifier:
+    """Wakes up change feed long-polls waiting on this process's event loops.
+
+    With a ``channel``, notifications are also sent to the other workers,
+    which wake up their own waiters. Without one, only commits made by
+    this process are signalled; waiters still time out and re-query so
+    that changes from other workers are picked up eventually.
+    """
+
+    def __init__(self, channel: Optional[RedisChannel] = None):
+        self.channel = channel
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._lock = threading.Lock()
+        if channel is not None:
+            channel.subscribe("changes", lambda message: self._wake())
+
+    def notify(self) -> None:
+        self._wake()
+        if self.channel is not None:
+            self.channel.publish("changes")
+
+    def _wake(self) -> None:
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait until the next notification or the timeout.
+
+        Returns:
+        --------
+        bool
+            Whether a notification arrived before the timeout
+        """
+        if self.channel is not None:
+            self.channel.listen()
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+change_notifier = ChangeNotifier(channel=create_channel())
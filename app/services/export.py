@@ -0,0 +1,328 @@
+"""
+Export service.
+"""
+
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime, time, timezone
+from typing import Any, Iterator, List, Optional
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, exists, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.appointment import Appointment
+from app.models.service_account import ServiceAccount
+from app.models.user import User
+from app.schemas.export import ColumnarFormat, ExportFormat, ExportTable
+from app.services.service_account import ServiceAccountService
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+    ColumnarFormat.PARQUET: "application/vnd.apache.parquet",
+    ColumnarFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+EXPORT_MODELS = {
+    ExportTable.APPOINTMENTS: Appointment,
+    ExportTable.USERS: User,
+    ExportTable.SERVICE_ACCOUNTS: ServiceAccount,
+}
+
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _columnar_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object handing out what was written since last drain.
+
+    ``tell`` reports the total number of bytes written so that columnar
+    writers compute correct file offsets while chunks are streamed away.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+
+    fields = []
+    for column in columns:
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+class ExportService:
+    """Service class containing bulk export logic"""
+
+    @staticmethod
+    def iter_service_account_appointment_batches(
+        db: Session, service_account_phone: str, batch_size: int
+    ) -> Iterator[List[tuple]]:
+        """Iterate over a service account's appointment history in batches.
+
+        Rows are fetched through a server-side cursor in primary key order,
+        so at most one batch of plain row tuples is held in memory.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: str
+            Target service account phone
+        batch_size: int
+            Number of rows fetched per round trip
+
+        Returns:
+        --------
+        Iterator[List[tuple]]
+            Batches of appointment rows ordered by ID
+        """
+        statement = (
+            select(*Appointment.__table__.columns)
+            .where(Appointment.service_account_phone == service_account_phone)
+            .order_by(Appointment.id)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        result = db.execute(statement)
+        try:
+            for partition in result.partitions():
+                yield partition
+        finally:
+            result.close()
+
+    @staticmethod
+    def stream_service_account_appointments(
+        db: Session,
+        service_account_phone: str,
+        export_format: ExportFormat,
+        batch_size: int = settings.EXPORT_BATCH_SIZE,
+    ) -> Iterator[str]:
+        """Serialize a service account's appointment history as a text stream.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: str
+            Target service account phone
+        export_format: ExportFormat
+            NDJSON (one object per line) or CSV (with a header row)
+        batch_size: int
+            Number of rows fetched and serialized per chunk
+
+        Returns:
+        --------
+        Iterator[str]
+            One text chunk per batch
+
+        Raises:
+        -------
+        ServiceAccountNotFound: if service account not found
+        """
+        ServiceAccountService.get_service_account_snapshot(db, service_account_phone)
+        columns = [column.name for column in Appointment.__table__.columns]
+
+        def generate() -> Iterator[str]:
+            if export_format == ExportFormat.CSV:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(columns)
+                yield buffer.getvalue()
+
+            for batch in ExportService.iter_service_account_appointment_batches(
+                db, service_account_phone, batch_size
+            ):
+                if export_format == ExportFormat.CSV:
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerows(
+                        [_export_value(value) for value in row] for row in batch
+                    )
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(
+                        json.dumps(
+                            {
+                                name: _export_value(value)
+                                for name, value in zip(columns, row)
+                            }
+                        )
+                        + "\n"
+                        for row in batch
+                    )
+
+        return generate()
+
+    @staticmethod
+    def _table_statement(
+        table: ExportTable,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        service_account_phone: Optional[str] = None,
+    ):
+        model = EXPORT_MODELS[table]
+        date_column = (
+            Appointment.appointment_date
+            if table == ExportTable.APPOINTMENTS
+            else model.created_at
+        )
+        statement = select(*model.__table__.columns).order_by(model.id)
+
+        if date_from:
+            statement = statement.where(
+                date_column
+                >= datetime.combine(date_from, time.min).replace(tzinfo=timezone.utc)
+            )
+        if date_to:
+            statement = statement.where(
+                date_column
+                <= datetime.combine(date_to, time.max).replace(tzinfo=timezone.utc)
+            )
+
+        if service_account_phone:
+            if table == ExportTable.APPOINTMENTS:
+                statement = statement.where(
+                    Appointment.service_account_phone == service_account_phone
+                )
+            elif table == ExportTable.SERVICE_ACCOUNTS:
+                statement = statement.where(
+                    ServiceAccount.phone == service_account_phone
+                )
+            else:
+                statement = statement.where(
+                    exists().where(
+                        Appointment.user_phone == User.phone,
+                        Appointment.service_account_phone == service_account_phone,
+                    )
+                )
+
+        return statement
+
+    @staticmethod
+    def stream_columnar_snapshot(
+        db: Session,
+        table: ExportTable,
+        columnar_format: ColumnarFormat,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        service_account_phone: Optional[str] = None,
+        batch_size: int = settings.EXPORT_BATCH_SIZE,
+    ) -> Iterator[bytes]:
+        """Serialize a table snapshot as Parquet or Arrow IPC record batches.
+
+        Each database batch becomes one record batch (one Parquet row group),
+        and the encoded bytes are handed out as soon as they are written,
+        so memory stays bounded by a single batch.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        table: ExportTable
+            Table to export
+        columnar_format: ColumnarFormat
+            Parquet file or Arrow IPC stream
+        date_from: Optional[date]
+            Keep rows on or after this day (appointment date, or creation date
+            for users and service accounts)
+        date_to: Optional[date]
+            Keep rows on or before this day
+        service_account_phone: Optional[str]
+            Restrict to one service account (users are those who booked it)
+        batch_size: int
+            Number of rows per record batch
+
+        Returns:
+        --------
+        Iterator[bytes]
+            Encoded chunks of the output file
+        """
+        import pyarrow as pa
+
+        model = EXPORT_MODELS[table]
+        columns = list(model.__table__.columns)
+        schema = _arrow_schema(columns)
+        statement = ExportService._table_statement(
+            table, date_from, date_to, service_account_phone
+        ).execution_options(stream_results=True, yield_per=batch_size)
+
+        def generate() -> Iterator[bytes]:
+            sink = _ChunkSink()
+            if columnar_format == ColumnarFormat.PARQUET:
+                import pyarrow.parquet as pq
+
+                writer = pq.ParquetWriter(sink, schema)
+            else:
+                writer = pa.ipc.new_stream(sink, schema)
+
+            result = db.execute(statement)
+            try:
+                for partition in result.partitions():
+                    arrays = [
+                        [_columnar_value(row[index]) for row in partition]
+                        for index in range(len(columns))
+                    ]
+                    writer.write_batch(
+                        pa.RecordBatch.from_arrays(
+                            [
+                                pa.array(values, type=field.type)
+                                for values, field in zip(arrays, schema)
+                            ],
+                            schema=schema,
+                        )
+                    )
+                    yield sink.drain()
+            finally:
+                result.close()
+                writer.close()
+            yield sink.drain()
+
+        return generate()
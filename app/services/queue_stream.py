@@ -0,0 +1,226 @@
+"""
+Live queue stream.
+"""
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.backend.cache import RedisChannel, create_channel
+from app.config import settings
+from app.exceptions import QueueStreamFull
+
+
+def diff_queue(old: List[dict], new: List[dict]) -> Dict[str, list]:
+    """Compute the changes turning one ranked snapshot into another.
+
+    Clients apply ``removed`` first, then place every ``inserted`` and
+    ``moved`` entry at its final ``position``, and finally merge the
+    ``updated`` fields into the entries they already had. An insertion or
+    removal shifts the rank, estimated wait and estimated start of the
+    entries after it, which are sent as ``updated`` even if they did not
+    move.
+
+    Parameters:
+    -----------
+    old: List[dict]
+        Previous ranked entries (each with an ``id``)
+    new: List[dict]
+        Current ranked entries
+
+    Returns:
+    --------
+    dict
+        ``inserted`` entries with their position, ``removed`` IDs,
+        ``moved`` entries with their previous and new positions, and
+        ``updated`` entries with the fields whose value changed
+    """
+    old_positions = {entry["id"]: index for index, entry in enumerate(old)}
+    old_entries = {entry["id"]: entry for entry in old}
+    new_ids = {entry["id"] for entry in new}
+
+    removed = [entry["id"] for entry in old if entry["id"] not in new_ids]
+    inserted = [
+        {"position": index, "appointment": entry}
+        for index, entry in enumerate(new)
+        if entry["id"] not in old_positions
+    ]
+
+    expected = [entry["id"] for entry in old if entry["id"] in new_ids]
+    for item in inserted:
+        expected.insert(item["position"], item["appointment"]["id"])
+
+    moved = []
+    if expected != [entry["id"] for entry in new]:
+        moved = [
+            {"id": entry["id"], "from": old_positions[entry["id"]], "to": index}
+            for index, entry in enumerate(new)
+            if entry["id"] in old_positions and expected[index] != entry["id"]
+        ]
+
+    updated = []
+    for entry in new:
+        previous = old_entries.get(entry["id"])
+        if previous is None:
+            continue
+        fields = {
+            key: value for key, value in entry.items() if previous.get(key) != value
+        }
+        if fields:
+            updated.append({"id": entry["id"], "fields": fields})
+
+    return {
+        "inserted": inserted,
+        "removed": removed,
+        "moved": moved,
+        "updated": updated,
+    }
+
+
+class QueueBroadcaster:
+    """Fan-out of ranked queue changes to live subscribers, per service account.
+
+    The ranked snapshot of a queue is kept in memory while it has
+    subscribers: new subscribers reuse it and each mutation recomputes it
+    once, so the database is never queried per subscriber.
+
+    Streams are exempt from admission control, so the number of
+    subscribers per process is capped by ``max_subscribers`` instead.
+
+    With a ``channel``, changes are announced to the other workers, and a
+    worker with subscribers on the changed queue recomputes its snapshot
+    with ``load_snapshot``.
+    """
+
+    def __init__(
+        self,
+        max_pending: int = 100,
+        max_subscribers: int = 1000,
+        retry_after: int = 5,
+        channel: Optional[RedisChannel] = None,
+    ):
+        self.max_pending = max_pending
+        self.max_subscribers = max_subscribers
+        self.retry_after = retry_after
+        self.channel = channel
+        self.load_snapshot: Optional[Callable[[str], List[dict]]] = None
+        self._subscribers: Dict[
+            str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]
+        ] = {}
+        self._snapshots: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+        if channel is not None:
+            channel.subscribe("queue", self._on_remote_change)
+
+    def has_subscribers(self, service_account_phone: str) -> bool:
+        return bool(self._subscribers.get(service_account_phone))
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in list(self._subscribers.values()))
+
+    def snapshot(self, service_account_phone: str) -> Optional[List[dict]]:
+        return self._snapshots.get(service_account_phone)
+
+    def subscribe(
+        self, service_account_phone: str, snapshot: List[dict]
+    ) -> asyncio.Queue:
+        """Register a subscriber on the running event loop.
+
+        Parameters:
+        -----------
+        service_account_phone: str
+            Queue to follow
+        snapshot: List[dict]
+            Current ranked entries, stored if the queue has none yet
+
+        Returns:
+        --------
+        asyncio.Queue
+            Queue receiving ``(event, data)`` tuples
+
+        Raises:
+        -------
+        QueueStreamFull
+            If the process already has ``max_subscribers`` subscribers
+        """
+        if self.channel is not None:
+            self.channel.listen()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        with self._lock:
+            if self.subscriber_count() >= self.max_subscribers:
+                raise QueueStreamFull(self.retry_after)
+            self._snapshots.setdefault(service_account_phone, snapshot)
+            self._subscribers.setdefault(service_account_phone, []).append(
+                (asyncio.get_running_loop(), queue)
+            )
+        return queue
+
+    def unsubscribe(self, service_account_phone: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = [
+                subscriber
+                for subscriber in self._subscribers.get(service_account_phone, [])
+                if subscriber[1] is not queue
+            ]
+            if subscribers:
+                self._subscribers[service_account_phone] = subscribers
+            else:
+                self._subscribers.pop(service_account_phone, None)
+                self._snapshots.pop(service_account_phone, None)
+
+    def publish(self, service_account_phone: str, snapshot: List[dict]) -> None:
+        """Send the diff between the stored and the new snapshot to subscribers.
+
+        Parameters:
+        -----------
+        service_account_phone: str
+            Queue that changed
+        snapshot: List[dict]
+            New ranked entries
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(service_account_phone, []))
+            if not subscribers:
+                return
+            previous = self._snapshots.get(service_account_phone, [])
+            self._snapshots[service_account_phone] = snapshot
+
+        changes = diff_queue(previous, snapshot)
+        if not any(changes.values()):
+            return
+
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._deliver, queue, ("diff", changes), snapshot)
+
+    def announce(self, service_account_phone: str) -> None:
+        """Tell the other workers that a queue changed."""
+        if self.channel is not None:
+            self.channel.publish("queue", service_account_phone=service_account_phone)
+
+    def _on_remote_change(self, message: dict) -> None:
+        service_account_phone = message.get("service_account_phone")
+        if self.load_snapshot is None or not self.has_subscribers(
+            service_account_phone
+        ):
+            return
+        self.publish(service_account_phone, self.load_snapshot(service_account_phone))
+
+    @staticmethod
+    def _deliver(
+        queue: asyncio.Queue, event: Tuple[str, Any], snapshot: List[dict]
+    ) -> None:
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A slow subscriber missed diffs: drop them and resynchronize it.
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(("snapshot", snapshot))
+
+
+queue_broadcaster = QueueBroadcaster(
+    max_pending=settings.QUEUE_STREAM_MAX_PENDING,
+    max_subscribers=settings.QUEUE_STREAM_MAX_SUBSCRIBERS,
+    retry_after=settings.QUEUE_STREAM_RETRY_AFTER_SECONDS,
+    channel=create_channel(),
+)
@@ -5,11 +5,20 @@ Service account service.
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.schemas.service_account import ServiceAccountCreate, ServiceAccountUpdate
+from app.schemas.service_account import (
+    ServiceAccountCreate,
+    ServiceAccountSnapshot,
+    ServiceAccountUpdate,
+)
 from app.models.service_account import ServiceAccount
 from app.exceptions import ServiceAccountAlreadyExists, ServiceAccountNotFound
+from app.backend.response_cache import response_cache
+from app.backend.entity_cache import entity_cache
+from app.backend.session import lookup_memo
+from app.backend.tracing import traced
 
 
+@traced
 class ServiceAccountService:
     """Service class containing service account-related business logic"""
 
@@ -17,6 +26,9 @@ class ServiceAccountService:
     def get_service_account(db: Session, phone: str) -> Optional[ServiceAccount]:
         """Retrieve a single service account by phone number.
 
+        The service account is memoized on the session, so repeated lookups
+        within a request hit the database once.
+
         Parameters:
         -----------
         db: Session
@@ -33,13 +45,58 @@ class ServiceAccountService:
         --------
         ServiceAccountNotFound: if service account not found
         """
+        memo = lookup_memo(db, "service_accounts")
+        service_account = memo.get(phone)
+        if service_account is not None and service_account in db:
+            return service_account
+
         service_account = (
             db.query(ServiceAccount).filter(ServiceAccount.phone == phone).first()
         )
         if not service_account:
             raise ServiceAccountNotFound(phone)
+        memo[phone] = service_account
         return service_account
 
+    @staticmethod
+    def get_service_account_snapshot(db: Session, phone: str) -> ServiceAccountSnapshot:
+        """Retrieve a read-only snapshot of a service account, including its scoring weights.
+
+        Snapshots are served from the process-wide entity cache, which also
+        remembers unknown phones for a short while, so hot lookups and
+        repeated misses do not reach the database.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        phone: str
+            Phone number of service account to retrieve
+
+        Returns:
+        --------
+        ServiceAccountSnapshot
+            Immutable snapshot of the service account
+
+        Raises:
+        --------
+        ServiceAccountNotFound: if service account not found
+        """
+        cached = entity_cache.get("service_account", phone)
+        if cached == entity_cache.MISSING:
+            raise ServiceAccountNotFound(phone)
+        if cached is not None:
+            return ServiceAccountSnapshot.model_validate(cached)
+
+        try:
+            service_account = ServiceAccountService.get_service_account(db, phone)
+        except ServiceAccountNotFound:
+            entity_cache.set_missing("service_account", phone)
+            raise
+        snapshot = ServiceAccountSnapshot.model_validate(service_account)
+        entity_cache.set("service_account", phone, snapshot.model_dump(mode="json"))
+        return snapshot
+
     @staticmethod
     def get_service_accounts(
         db: Session, skip: int = 0, limit: int = 100
@@ -97,6 +154,8 @@ class ServiceAccountService:
         db.add(db_service_account)
         db.commit()
         db.refresh(db_service_account)
+        response_cache.invalidate("service_accounts")
+        entity_cache.invalidate("service_account", db_service_account.phone)
         return db_service_account
 
     @staticmethod
@@ -129,6 +188,8 @@ class ServiceAccountService:
 
         db.commit()
         db.refresh(db_service_account)
+        response_cache.invalidate("service_accounts")
+        entity_cache.invalidate("service_account", db_service_account.phone)
         return db_service_account
 
     @staticmethod
@@ -149,6 +210,9 @@ class ServiceAccountService:
         db_service_account = ServiceAccountService.get_service_account(db, phone)
         db.delete(db_service_account)
         db.commit()
+        lookup_memo(db, "service_accounts").pop(phone, None)
+        response_cache.invalidate("service_accounts", f"queue:{phone}")
+        entity_cache.invalidate("service_account", phone)
         return {
             "success": True,
             "message": f"Service account with phone {phone} deleted",
@@ -0,0 +1,272 @@
+"""
+Stats service.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.daily_appointment_stats import DailyAppointmentStats
+
+
+def _day_of(value) -> date:
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    return value
+
+
+class StatsService:
+    """Service class maintaining the daily appointment rollup"""
+
+    @staticmethod
+    def _ensure_row(db: Session, service_account_phone: str, day: date) -> None:
+        """Insert an empty rollup row for the day unless it already exists."""
+        key = {"service_account_phone": service_account_phone, "day": day}
+        dialect = db.get_bind().dialect.name
+
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+            db.execute(
+                dialect_insert(DailyAppointmentStats)
+                .values(**key)
+                .on_conflict_do_nothing()
+            )
+        elif db.get(DailyAppointmentStats, (service_account_phone, day)) is None:
+            db.execute(insert(DailyAppointmentStats).values(**key))
+
+    @staticmethod
+    def _increment(
+        db: Session, service_account_phone: str, day: date, **deltas
+    ) -> None:
+        StatsService._ensure_row(db, service_account_phone, day)
+        db.execute(
+            update(DailyAppointmentStats)
+            .where(
+                DailyAppointmentStats.service_account_phone == service_account_phone,
+                DailyAppointmentStats.day == day,
+            )
+            .values(
+                {
+                    getattr(DailyAppointmentStats, column): getattr(
+                        DailyAppointmentStats, column
+                    )
+                    + delta
+                    for column, delta in deltas.items()
+                }
+            )
+        )
+
+    @staticmethod
+    def record_created(db: Session, appointment: Appointment) -> None:
+        """Count a new appointment in its day's rollup, in the caller's transaction.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        appointment: Appointment
+            The appointment being created
+        """
+        StatsService._increment(
+            db,
+            appointment.service_account_phone,
+            _day_of(appointment.appointment_date),
+            total=1,
+            penalty_sum=appointment.penalty or 0.0,
+            **{appointment.status.value: 1},
+        )
+
+    @staticmethod
+    def record_transition(
+        db: Session,
+        service_account_phone: str,
+        appointment_date: datetime,
+        from_status: AppointmentStatus,
+        to_status: AppointmentStatus,
+    ) -> None:
+        """Move one appointment between status counters, in the caller's transaction.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: str
+            Service account of the appointment
+        appointment_date: datetime
+            Date of the appointment, selecting the rollup day
+        from_status: AppointmentStatus
+            Previous status
+        to_status: AppointmentStatus
+            New status
+        """
+        if from_status == to_status:
+            return
+        StatsService._increment(
+            db,
+            service_account_phone,
+            _day_of(appointment_date),
+            **{from_status.value: -1, to_status.value: 1},
+        )
+
+    @staticmethod
+    def rebuild(
+        db: Session,
+        service_account_phone: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> int:
+        """Recompute the rollup from the appointments table and commit.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: Optional[str]
+            Only rebuild this service account
+        date_from: Optional[date]
+            Only rebuild days on or after this one
+        date_to: Optional[date]
+            Only rebuild days on or before this one
+
+        Returns:
+        --------
+        int
+            Number of rollup rows written
+        """
+        stats_filters = []
+        appointment_filters = []
+        if service_account_phone:
+            stats_filters.append(
+                DailyAppointmentStats.service_account_phone == service_account_phone
+            )
+            appointment_filters.append(
+                Appointment.service_account_phone == service_account_phone
+            )
+        if date_from:
+            stats_filters.append(DailyAppointmentStats.day >= date_from)
+            appointment_filters.append(
+                Appointment.appointment_date
+                >= datetime.combine(date_from, time.min).replace(tzinfo=timezone.utc)
+            )
+        if date_to:
+            stats_filters.append(DailyAppointmentStats.day <= date_to)
+            appointment_filters.append(
+                Appointment.appointment_date
+                <= datetime.combine(date_to, time.max).replace(tzinfo=timezone.utc)
+            )
+
+        appointment_day = func.date(Appointment.appointment_date)
+        groups = (
+            db.query(
+                Appointment.service_account_phone,
+                appointment_day,
+                Appointment.status,
+                func.count(Appointment.id),
+                func.coalesce(func.sum(Appointment.penalty), 0.0),
+            )
+            .filter(*appointment_filters)
+            .group_by(
+                Appointment.service_account_phone, appointment_day, Appointment.status
+            )
+            .all()
+        )
+
+        rows = {}
+        for phone, day, appointment_status, count, penalty_sum in groups:
+            key = (phone, _day_of(day))
+            row = rows.setdefault(
+                key,
+                {
+                    "service_account_phone": phone,
+                    "day": key[1],
+                    "total": 0,
+                    "penalty_sum": 0.0,
+                    **{status.value: 0 for status in AppointmentStatus},
+                },
+            )
+            row[appointment_status.value] += count
+            row["total"] += count
+            row["penalty_sum"] += penalty_sum
+
+        db.execute(delete(DailyAppointmentStats).where(*stats_filters))
+        if rows:
+            db.execute(insert(DailyAppointmentStats), list(rows.values()))
+        db.commit()
+        return len(rows)
+
+    @staticmethod
+    def get_daily_stats(
+        db: Session, service_account_phone: str, date_from: date, date_to: date
+    ) -> List[dict]:
+        """Read per-day totals of a service account from the rollup.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        service_account_phone: str
+            Target service account phone
+        date_from: date
+            First day of the range
+        date_to: date
+            Last day of the range (inclusive)
+
+        Returns:
+        --------
+        List[dict]
+            One entry per day with status counters and average penalty
+
+        Raises:
+        -------
+        HTTPException: 400 if the range is inverted or too long
+        """
+        number_of_days = (date_to - date_from).days + 1
+        if number_of_days < 1:
+            raise HTTPException(
+                status_code=400, detail="'to' must not be earlier than 'from'"
+            )
+        if number_of_days > settings.STATS_MAX_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Stats range cannot exceed {settings.STATS_MAX_DAYS} days",
+            )
+
+        stored = {
+            row.day: row
+            for row in db.query(DailyAppointmentStats).filter(
+                DailyAppointmentStats.service_account_phone == service_account_phone,
+                DailyAppointmentStats.day >= date_from,
+                DailyAppointmentStats.day <= date_to,
+            )
+        }
+
+        daily_stats = []
+        for offset in range(number_of_days):
+            day = date_from + timedelta(days=offset)
+            row = stored.get(day)
+            total = row.total if row else 0
+            daily_stats.append(
+                {
+                    "day": day,
+                    "total": total,
+                    **{
+                        status.value: getattr(row, status.value) if row else 0
+                        for status in AppointmentStatus
+                    },
+                    "average_penalty": row.penalty_sum / total if total else 0.0,
+                }
+            )
+        return daily_stats
@@ -5,11 +5,16 @@ User service.
 from sqlalchemy.orm import Session
 from typing import Optional, List
 
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserCreate, UserUpdate, UserSnapshot
 from app.models.user import User
 from app.exceptions import UserAlreadyExists, UserNotFound
+from app.backend.response_cache import response_cache
+from app.backend.entity_cache import entity_cache
+from app.backend.session import lookup_memo
+from app.backend.tracing import traced
 
 
+@traced
 class UserService:
     """Service class containing user-related business logic"""
 
@@ -17,6 +22,9 @@ class UserService:
     def get_user(db: Session, phone: str) -> Optional[User]:
         """Retrieve a single user by phone number.
 
+        The user is memoized on the session, so repeated lookups within a
+        request hit the database once.
+
         Parameters:
         -----------
         db: Session
@@ -33,11 +41,56 @@ class UserService:
         --------
         UserNotFound: if user not found
         """
+        memo = lookup_memo(db, "users")
+        user = memo.get(phone)
+        if user is not None and user in db:
+            return user
+
         user = db.query(User).filter(User.phone == phone).first()
         if not user:
             raise UserNotFound(phone)
+        memo[phone] = user
         return user
 
+    @staticmethod
+    def get_user_snapshot(db: Session, phone: str) -> UserSnapshot:
+        """Retrieve a read-only snapshot of a user.
+
+        Snapshots are served from the process-wide entity cache, which also
+        remembers unknown phones for a short while, so hot lookups and
+        repeated misses do not reach the database.
+
+        Parameters:
+        -----------
+        db: Session
+            Database session
+        phone: str
+            Phone number of user to retrieve
+
+        Returns:
+        --------
+        UserSnapshot
+            Immutable snapshot of the user
+
+        Raises:
+        --------
+        UserNotFound: if user not found
+        """
+        cached = entity_cache.get("user", phone)
+        if cached == entity_cache.MISSING:
+            raise UserNotFound(phone)
+        if cached is not None:
+            return UserSnapshot.model_validate(cached)
+
+        try:
+            user = UserService.get_user(db, phone)
+        except UserNotFound:
+            entity_cache.set_missing("user", phone)
+            raise
+        snapshot = UserSnapshot.model_validate(user)
+        entity_cache.set("user", phone, snapshot.model_dump(mode="json"))
+        return snapshot
+
     @staticmethod
     def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
         """Retrieve paginated list of all regular users
@@ -88,6 +141,8 @@ class UserService:
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
+        response_cache.invalidate("users", f"user:{db_user.phone}")
+        entity_cache.invalidate("user", db_user.phone)
         return db_user
 
     @staticmethod
@@ -120,6 +175,8 @@ class UserService:
 
         db.commit()
         db.refresh(db_user)
+        response_cache.invalidate("users", f"user:{phone}")
+        entity_cache.invalidate("user", phone)
         return db_user
 
     @staticmethod
@@ -144,3 +201,6 @@ class UserService:
         db_user = UserService.get_user(db, phone)
         db.delete(db_user)
         db.commit()
+        lookup_memo(db, "users").pop(phone, None)
+        response_cache.invalidate("users", f"user:{phone}")
+        entity_cache.invalidate("user", phone)
@@ -0,0 +1,126 @@
+"""
+Availability benchmark.
+
+Measures the interval index at thousands of bookings per day: rebuild
+from the database, overlap checks against a linear scan, and free slot
+listing.
+
+Usage:
+    python -m benchmarks.bench_availability [--bookings 1000 5000 20000] [--checks 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.base import Base
+from app.services.availability import AvailabilityService
+
+
+SERVICE_ACCOUNT_PHONE = "+5511900000000"
+DAY = date(2030, 1, 1)
+
+
+def linear_concurrency(intervals, start, end):
+    events = []
+    for interval_start, interval_end in intervals:
+        if interval_start < end and interval_end > start:
+            events.append((max(interval_start, start), 1))
+            events.append((min(interval_end, end), -1))
+    peak = depth = 0
+    for _, delta in sorted(events):
+        depth += delta
+        peak = max(peak, depth)
+    return peak
+
+
+def run(session_local, bookings: int, checks: int, rng: random.Random) -> dict:
+    opening = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=9)
+    intervals = []
+    rows = []
+    for i in range(bookings):
+        start = opening + timedelta(minutes=rng.randrange(0, 9 * 60, 5))
+        duration = rng.choice([15, 30, 45, 60])
+        intervals.append((start, start + timedelta(minutes=duration)))
+        rows.append(
+            {
+                "user_phone": f"+55119{i:08d}",
+                "service_account_phone": SERVICE_ACCOUNT_PHONE,
+                "appointment_date": start,
+                "duration_minutes": duration,
+                "status": AppointmentStatus.ACTIVE,
+                "created_at": start,
+                "penalty": 0.0,
+            }
+        )
+
+    db = session_local()
+    try:
+        db.execute(insert(Appointment.__table__), rows)
+        db.commit()
+
+        started = time.perf_counter()
+        index = AvailabilityService.rebuild_index(db, SERVICE_ACCOUNT_PHONE, DAY)
+        rebuild_seconds = time.perf_counter() - started
+    finally:
+        db.close()
+
+    probes = []
+    for _ in range(checks):
+        start = opening + timedelta(minutes=rng.randrange(0, 9 * 60, 5))
+        probes.append((start, start + timedelta(minutes=30)))
+
+    started = time.perf_counter()
+    indexed = [index.max_concurrency(start, end) for start, end in probes]
+    index_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    linear = [linear_concurrency(intervals, start, end) for start, end in probes]
+    linear_seconds = time.perf_counter() - started
+    assert indexed == linear
+
+    capacity = max(1, bookings // 36)
+    started = time.perf_counter()
+    index.free_windows(opening, opening + timedelta(hours=9), capacity)
+    free_seconds = time.perf_counter() - started
+
+    return {
+        "bookings": bookings,
+        "rebuild_ms": round(rebuild_seconds * 1000, 3),
+        "index_check_us": round(index_seconds / checks * 1e6, 3),
+        "linear_check_us": round(linear_seconds / checks * 1e6, 3),
+        "free_windows_ms": round(free_seconds * 1000, 3),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bookings", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--checks", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    results = []
+    for bookings in args.bookings:
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+            Base.metadata.create_all(bind=engine)
+            session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            results.append(
+                run(session_local, bookings, args.checks, random.Random(args.seed))
+            )
+            engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Export benchmark.
+
+Compares the time and payload size of paging through the JSON queue
+endpoint against the NDJSON stream and the columnar snapshot exports.
+
+Usage:
+    python -m benchmarks.bench_export [--appointments 10000] [--page-size 100]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.response_cache import response_cache
+from app.backend.session import get_db
+from app.main import app
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.base import Base
+from app.models.service_account import ServiceAccount
+from app.models.user import User
+
+
+SERVICE_ACCOUNT_PHONE = "+5511900000000"
+
+
+def seed(session_local, appointments: int) -> None:
+    now = datetime.now(timezone.utc)
+    db = session_local()
+    try:
+        db.execute(
+            insert(ServiceAccount.__table__),
+            [
+                {
+                    "name": "Bench Service",
+                    "phone": SERVICE_ACCOUNT_PHONE,
+                    "created_at": now,
+                }
+            ],
+        )
+        db.execute(
+            insert(User.__table__),
+            [
+                {"name": f"User {i}", "phone": f"+55119{i:08d}", "created_at": now}
+                for i in range(appointments)
+            ],
+        )
+        db.execute(
+            insert(Appointment.__table__),
+            [
+                {
+                    "user_phone": f"+55119{i:08d}",
+                    "service_account_phone": SERVICE_ACCOUNT_PHONE,
+                    "appointment_date": now + timedelta(days=1 + i % 30),
+                    "status": AppointmentStatus.ACTIVE,
+                    "duration_minutes": 30,
+                    "created_at": now - timedelta(minutes=i),
+                    "penalty": (i % 10) / 10,
+                }
+                for i in range(appointments)
+            ],
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    return {"scenario": label, "seconds": round(elapsed, 4), "bytes": size}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--appointments", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(directory, 'bench.db')}",
+            connect_args={"check_same_thread": False},
+        )
+        Base.metadata.create_all(bind=engine)
+        session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        seed(session_local, args.appointments)
+
+        def override_get_db():
+            db = session_local()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        response_cache.enabled = False
+
+        with TestClient(app) as client:
+
+            def json_pages():
+                total, skip = 0, 0
+                while True:
+                    response = client.get(
+                        "/appointments/",
+                        params={
+                            "service_account_phone": SERVICE_ACCOUNT_PHONE,
+                            "skip": skip,
+                            "limit": args.page_size,
+                        },
+                    )
+                    total += len(response.content)
+                    if not response.json()["data"]:
+                        return total
+                    skip += args.page_size
+
+            def download(url, **params):
+                return lambda: len(client.get(url, params=params).content)
+
+            export_url = (
+                f"/service-accounts/{SERVICE_ACCOUNT_PHONE}/appointments/export"
+            )
+            results = [
+                timed("json_pagination", json_pages),
+                timed("ndjson_stream", download(export_url)),
+                timed("csv_stream", download(export_url, format="csv")),
+                timed("parquet_snapshot", download("/exports/appointments")),
+                timed(
+                    "arrow_snapshot", download("/exports/appointments", format="arrow")
+                ),
+            ]
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    print(json.dumps({"appointments": args.appointments, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
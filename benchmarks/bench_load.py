@@ -0,0 +1,315 @@
+"""
+End-to-end load benchmark.
+
+Drives the ASGI app with concurrent clients through four scenarios, in
+order, against a database filled by ``app.commands.seed`` with each
+requested number of appointments:
+
+- booking_rush: new users book the same day, favouring popular accounts
+- queue_polling: front desks page through their queue and users check
+  their position
+- close_out: queues are worked through at the end of the day, claiming,
+  cancelling and marking no-shows
+- history_export: appointment histories are streamed and snapshotted
+
+Requests go through the whole middleware stack except rate limiting,
+since every client shares one address. Every scale starts with empty
+process caches, and data is seeded relative to a fixed ``--now`` so runs
+are reproducible. Results (throughput and latency
+percentiles per scenario) are printed and saved as JSON, named after the
+current commit, so runs can be compared.
+
+Usage:
+    python -m benchmarks.bench_load [--scales 10000 100000 1000000] \
+        [--now 2030-01-01] [--concurrency 32] [--requests 2000] [--output-dir benchmarks/results]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, time as day_time, timedelta, timezone
+
+import httpx
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.entity_cache import entity_cache
+from app.backend.response_cache import response_cache
+from app.backend.session import get_db
+from app.commands.seed import (
+    popularity,
+    seed_database,
+    service_account_phone,
+    user_phone,
+)
+from app.main import app
+from app.middleware import rate_limiter
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.base import Base
+from app.services import AvailabilityService
+
+
+SEED = 42
+SERVICE_ACCOUNTS = 50
+APPOINTMENTS_PER_USER = 5
+SKEW = 1.1
+# Beyond the seeded upcoming appointments, so any user can book.
+BOOKING_DAYS_AHEAD = 45
+
+
+def summarize(name: str, latencies: list, statuses: dict, elapsed: float) -> dict:
+    percentiles = (
+        statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    )
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentiles[49] * 1000, 2),
+        "p95_ms": round(percentiles[94] * 1000, 2),
+        "p99_ms": round(percentiles[98] * 1000, 2),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def drive(
+    client: httpx.AsyncClient, name: str, operations, concurrency: int
+) -> dict:
+    """Run operations, each a ``(method, url, kwargs)`` tuple, from
+    ``concurrency`` clients sharing one iterator."""
+    operations = iter(operations)
+    latencies, statuses = [], {}
+
+    async def worker():
+        for method, url, kwargs in operations:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(name, latencies, statuses, time.perf_counter() - started)
+
+
+def booking_rush(users: int, requests: int, rng: random.Random, now: datetime):
+    weights = popularity(SERVICE_ACCOUNTS, SKEW)
+    day = (now + timedelta(days=BOOKING_DAYS_AHEAD)).date()
+    for i in range(requests):
+        account = rng.choices(range(SERVICE_ACCOUNTS), cum_weights=weights)[0]
+        date = datetime(
+            day.year, day.month, day.day, 9 + rng.randrange(9), rng.choice((0, 30))
+        )
+        yield (
+            "POST",
+            "/appointments/",
+            {
+                "json": {
+                    "user_phone": user_phone(i % users),
+                    "service_account_phone": service_account_phone(account),
+                    "appointment_date": date.replace(tzinfo=timezone.utc).isoformat(),
+                }
+            },
+        )
+
+
+def queue_polling(active_ids: list, requests: int, rng: random.Random):
+    weights = popularity(SERVICE_ACCOUNTS, SKEW)
+    for i in range(requests):
+        if i % 2:
+            yield "GET", f"/appointments/{rng.choice(active_ids)}/position", {}
+        else:
+            account = rng.choices(range(SERVICE_ACCOUNTS), cum_weights=weights)[0]
+            yield (
+                "GET",
+                "/appointments/",
+                {
+                    "params": {
+                        "service_account_phone": service_account_phone(account),
+                        "limit": 20,
+                    }
+                },
+            )
+
+
+def close_out(active_ids: list, requests: int, rng: random.Random):
+    ids = rng.sample(active_ids, min(len(active_ids), requests))
+    for i, appointment_id in enumerate(ids):
+        kind = i % 4
+        if kind == 0:
+            account = service_account_phone(i // 4 % SERVICE_ACCOUNTS)
+            yield "POST", f"/service-accounts/{account}/queue/next", {}
+        elif kind == 1:
+            yield "DELETE", f"/appointments/{appointment_id}", {}
+        elif kind == 2:
+            yield "PUT", f"/appointments/{appointment_id}/no-show", {}
+        else:
+            yield "PUT", f"/appointments/{appointment_id}/complete", {}
+
+
+def history_export(requests: int):
+    for i in range(requests):
+        account = service_account_phone(i % SERVICE_ACCOUNTS)
+        if i % 2:
+            yield (
+                "GET",
+                "/exports/appointments",
+                {"params": {"service_account_phone": account}},
+            )
+        else:
+            yield "GET", f"/service-accounts/{account}/appointments/export", {}
+
+
+async def run_scenarios(session_local, users: int, args, rng: random.Random) -> list:
+    db = session_local()
+    try:
+        active_ids = db.scalars(
+            select(Appointment.id).where(Appointment.status == AppointmentStatus.ACTIVE)
+        ).all()
+    finally:
+        db.close()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        return [
+            await drive(
+                client,
+                "booking_rush",
+                booking_rush(users, args.requests, rng, args.now),
+                args.concurrency,
+            ),
+            await drive(
+                client,
+                "queue_polling",
+                queue_polling(active_ids, args.requests, rng),
+                args.concurrency,
+            ),
+            await drive(
+                client,
+                "close_out",
+                close_out(active_ids, args.requests, rng),
+                args.concurrency,
+            ),
+            await drive(
+                client,
+                "history_export",
+                history_export(max(args.concurrency, args.requests // 50)),
+                args.concurrency,
+            ),
+        ]
+
+
+def reset_process_state() -> None:
+    """Empty the caches and limiters kept in process, which would otherwise
+    serve the previous scale's entries for the same seeded phones."""
+    response_cache.clear()
+    entity_cache.clear()
+    AvailabilityService.clear()
+    rate_limiter.clear()
+
+
+def run_scale(appointments: int, args) -> dict:
+    rng = random.Random(SEED)
+    reset_process_state()
+    with tempfile.TemporaryDirectory() as directory:
+        # Endpoints check connections out on the event loop, so a pool
+        # smaller than the number of clients would block it for good.
+        engine = create_engine(
+            f"sqlite:///{os.path.join(directory, 'bench.db')}",
+            connect_args={"check_same_thread": False},
+            pool_size=args.concurrency,
+        )
+        Base.metadata.create_all(bind=engine)
+        users = max(appointments // APPOINTMENTS_PER_USER, args.requests)
+        started = time.perf_counter()
+        seed_database(
+            engine,
+            users=users,
+            service_accounts=SERVICE_ACCOUNTS,
+            appointments=appointments,
+            seed=SEED,
+            now=args.now,
+            skew=SKEW,
+        )
+        seed_seconds = time.perf_counter() - started
+        session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = session_local()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            scenarios = asyncio.run(run_scenarios(session_local, users, args, rng))
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+
+    return {
+        "appointments": appointments,
+        "seed_seconds": round(seed_seconds, 2),
+        "scenarios": scenarios,
+    }
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scales", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    # Upcoming appointments are seeded after this day, which must stay in
+    # the future for the queues to hold them.
+    parser.add_argument("--now", type=date.fromisoformat, default=date(2030, 1, 1))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--output-dir", default=os.path.join("benchmarks", "results"))
+    args = parser.parse_args(argv)
+    args.now = datetime.combine(args.now, day_time.min, tzinfo=timezone.utc)
+
+    rate_limiter.enabled = False
+    commit = current_commit()
+    results = {
+        "commit": commit,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "now": args.now.date().isoformat(),
+        "scales": [run_scale(appointments, args) for appointments in args.scales],
+    }
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    os.makedirs(args.output_dir, exist_ok=True)
+    filename = f"load-{commit}-{results['started_at'].replace(':', '')}.json"
+    with open(os.path.join(args.output_dir, filename), "w") as file:
+        file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Metrics overhead benchmark.
+
+Measures the per-request cost of MetricsMiddleware by driving a routed
+Starlette app directly through ASGI (no network, no server), with and
+without the middleware.
+
+Usage:
+    python -m benchmarks.bench_metrics [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.backend.metrics import registry
+from app.middleware.metrics import MetricsMiddleware
+
+
+async def _ok(request):
+    return PlainTextResponse("ok")
+
+
+def build_app(with_metrics: bool):
+    app = Starlette(routes=[Route("/appointments/{appointment_id:int}", _ok)])
+    return MetricsMiddleware(app) if with_metrics else app
+
+
+async def _drive(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for i in range(requests):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"/appointments/{i}",
+            "raw_path": f"/appointments/{i}".encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "client": ("127.0.0.1", 1234),
+            "server": ("127.0.0.1", 8000),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+def run(requests: int, with_metrics: bool) -> float:
+    return asyncio.run(_drive(build_app(with_metrics), requests))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    run(1000, with_metrics=True)
+    baseline, instrumented = [], []
+    for _ in range(args.repeats):
+        baseline.append(run(args.requests, with_metrics=False))
+        instrumented.append(run(args.requests, with_metrics=True))
+    registry.clear()
+
+    baseline_us = statistics.median(baseline) * 1e6
+    instrumented_us = statistics.median(instrumented) * 1e6
+    print(
+        json.dumps(
+            {
+                "baseline_us_per_request": round(baseline_us, 2),
+                "instrumented_us_per_request": round(instrumented_us, 2),
+                "overhead_us_per_request": round(instrumented_us - baseline_us, 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Write latency benchmark.
+
+Measures the cost of appending to the appointment event log by timing
+create + cancel round trips through AppointmentService with the log
+enabled and with it replaced by a no-op.
+
+Usage:
+    python -m benchmarks.bench_write_latency [--writes 2000]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import app.main  # noqa: F401 - registers every model
+from app.backend.response_cache import response_cache
+from app.models.base import Base
+from app.models.service_account import ServiceAccount
+from app.models.user import User
+from app.schemas import AppointmentCreate
+from app.services import AppointmentService
+from app.services.events import AppointmentEventService
+
+
+SERVICE_ACCOUNT_PHONE = "+5511900000000"
+
+
+def run(writes: int, event_log: bool) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        now = datetime.now(timezone.utc)
+        with engine.begin() as connection:
+            connection.execute(
+                insert(ServiceAccount.__table__),
+                [{"name": "Bench", "phone": SERVICE_ACCOUNT_PHONE, "created_at": now}],
+            )
+            connection.execute(
+                insert(User.__table__),
+                [
+                    {"name": f"User {i}", "phone": f"+55119{i:08d}", "created_at": now}
+                    for i in range(writes)
+                ],
+            )
+
+        patch = (
+            mock.patch.object(AppointmentEventService, "record")
+            if not event_log
+            else contextlib.nullcontext()
+        )
+        latencies = []
+        db = session_local()
+        try:
+            with patch:
+                for i in range(writes):
+                    started = time.perf_counter()
+                    appointment = AppointmentService.create_appointment(
+                        db,
+                        AppointmentCreate(
+                            user_phone=f"+55119{i:08d}",
+                            service_account_phone=SERVICE_ACCOUNT_PHONE,
+                            appointment_date=now + timedelta(days=1),
+                        ),
+                    )
+                    AppointmentService.cancel_appointment(db, appointment.id)
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            db.close()
+            engine.dispose()
+
+    return {
+        "event_log": event_log,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 4),
+        "p50_ms": round(statistics.median(latencies) * 1000, 4),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    response_cache.enabled = False
+    run(min(args.writes, 100), event_log=True)
+
+    results = []
+    for _ in range(args.repeats):
+        results.append(run(args.writes, event_log=False))
+        results.append(run(args.writes, event_log=True))
+
+    baseline = statistics.mean(r["mean_ms"] for r in results if not r["event_log"])
+    with_log = statistics.mean(r["mean_ms"] for r in results if r["event_log"])
+    overhead = (with_log - baseline) / baseline * 100
+    print(
+        json.dumps(
+            {"results": results, "overhead_percent": round(overhead, 2)}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
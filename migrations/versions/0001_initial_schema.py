@@ -0,0 +1,105 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-03-01 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "service_accounts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("enable_cancellation_scoring", sa.Boolean(), nullable=True),
+        sa.Column("cancellation_weight", sa.Float(), nullable=True),
+        sa.Column("no_show_weight", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email"),
+        sa.UniqueConstraint("phone"),
+    )
+    with op.batch_alter_table("service_accounts", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_service_accounts_id"), ["id"], unique=False
+        )
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "user_type", sa.Enum("REGULAR", "SERVICE", name="usertype"), nullable=True
+        ),
+        sa.Column("is_service_account", sa.Boolean(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email"),
+        sa.UniqueConstraint("phone"),
+    )
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.create_index(batch_op.f("ix_users_id"), ["id"], unique=False)
+
+    op.create_table(
+        "appointments",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_phone", sa.String(), nullable=True),
+        sa.Column("service_account_phone", sa.String(), nullable=True),
+        sa.Column("appointment_date", sa.DateTime(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum(
+                "ACTIVE", "CANCELED", "COMPLETED", "NO_SHOW", name="appointmentstatus"
+            ),
+            nullable=True,
+        ),
+        sa.Column("duration_minutes", sa.Integer(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("penalty", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["service_account_phone"],
+            ["service_accounts.phone"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_phone"],
+            ["users.phone"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("appointments", schema=None) as batch_op:
+        batch_op.create_index(batch_op.f("ix_appointments_id"), ["id"], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("appointments", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_appointments_id"))
+
+    op.drop_table("appointments")
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_users_id"))
+
+    op.drop_table("users")
+    with op.batch_alter_table("service_accounts", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_service_accounts_id"))
+
+    op.drop_table("service_accounts")
@@ -0,0 +1,164 @@
+"""queue indexes, capacity, stats rollup, event log and change feed
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 10:45:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Created with the appointments table in 0001.
+appointment_status = postgresql.ENUM(
+    "ACTIVE",
+    "CANCELED",
+    "COMPLETED",
+    "NO_SHOW",
+    name="appointmentstatus",
+    create_type=False,
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_appointment_stats",
+        sa.Column("service_account_phone", sa.String(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("active", sa.Integer(), nullable=False),
+        sa.Column("completed", sa.Integer(), nullable=False),
+        sa.Column("canceled", sa.Integer(), nullable=False),
+        sa.Column("no_show", sa.Integer(), nullable=False),
+        sa.Column("penalty_sum", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("service_account_phone", "day"),
+    )
+    op.create_table(
+        "appointment_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("appointment_id", sa.Integer(), nullable=True),
+        sa.Column("service_account_phone", sa.String(), nullable=False),
+        sa.Column("user_phone", sa.String(), nullable=False),
+        sa.Column(
+            "event_type",
+            sa.Enum("CREATED", "STATUS_CHANGED", name="appointmenteventtype"),
+            nullable=False,
+        ),
+        sa.Column("from_status", appointment_status, nullable=True),
+        sa.Column("to_status", appointment_status, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["appointment_id"],
+            ["appointments.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=True,
+    )
+    with op.batch_alter_table("appointment_events", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_appointment_events_appointment_id"),
+            ["appointment_id"],
+            unique=False,
+        )
+
+    with op.batch_alter_table("appointments", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column("change_seq", sa.Integer(), nullable=True))
+        batch_op.create_index(
+            "ix_appointments_calendar",
+            ["service_account_phone", "appointment_date", "status"],
+            unique=False,
+        )
+        batch_op.create_index(
+            batch_op.f("ix_appointments_change_seq"), ["change_seq"], unique=False
+        )
+        batch_op.create_index(
+            "ix_appointments_changes",
+            ["service_account_phone", "change_seq"],
+            unique=False,
+        )
+        batch_op.create_index(
+            "ix_appointments_queue",
+            [
+                "service_account_phone",
+                "status",
+                "penalty",
+                "created_at",
+                "id",
+                "appointment_date",
+            ],
+            unique=False,
+        )
+        batch_op.create_index(
+            "ix_appointments_service_account_id",
+            ["service_account_phone", "id"],
+            unique=False,
+        )
+        batch_op.create_index(
+            batch_op.f("ix_appointments_updated_at"), ["updated_at"], unique=False
+        )
+
+    with op.batch_alter_table("service_accounts", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("max_concurrent_appointments", sa.Integer(), nullable=True)
+        )
+
+    # Roll existing appointments up per day, as StatsService.rebuild does;
+    # later transitions adjust these counters and must start from them.
+    op.execute(
+        "INSERT INTO daily_appointment_stats "
+        "(service_account_phone, day, total, active, completed, canceled, no_show, penalty_sum) "
+        "SELECT service_account_phone, DATE(appointment_date), COUNT(*), "
+        "SUM(CASE WHEN status = 'ACTIVE' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN status = 'COMPLETED' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN status = 'CANCELED' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN status = 'NO_SHOW' THEN 1 ELSE 0 END), "
+        "COALESCE(SUM(penalty), 0.0) "
+        "FROM appointments WHERE service_account_phone IS NOT NULL "
+        "GROUP BY service_account_phone, DATE(appointment_date)"
+    )
+    # Give existing appointments a creation event, so that they appear in
+    # the event log and the change feed.
+    op.execute(
+        "INSERT INTO appointment_events "
+        "(appointment_id, service_account_phone, user_phone, event_type, to_status, created_at) "
+        "SELECT id, COALESCE(service_account_phone, ''), COALESCE(user_phone, ''), "
+        "'CREATED', status, created_at FROM appointments ORDER BY id"
+    )
+    op.execute(
+        "UPDATE appointments SET updated_at = created_at, change_seq = ("
+        "SELECT MAX(appointment_events.id) FROM appointment_events "
+        "WHERE appointment_events.appointment_id = appointments.id)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("service_accounts", schema=None) as batch_op:
+        batch_op.drop_column("max_concurrent_appointments")
+
+    with op.batch_alter_table("appointments", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_appointments_updated_at"))
+        batch_op.drop_index("ix_appointments_service_account_id")
+        batch_op.drop_index("ix_appointments_queue")
+        batch_op.drop_index("ix_appointments_changes")
+        batch_op.drop_index(batch_op.f("ix_appointments_change_seq"))
+        batch_op.drop_index("ix_appointments_calendar")
+        batch_op.drop_column("change_seq")
+        batch_op.drop_column("updated_at")
+
+    with op.batch_alter_table("appointment_events", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_appointment_events_appointment_id"))
+
+    op.drop_table("appointment_events")
+    op.drop_table("daily_appointment_stats")
+    sa.Enum(name="appointmenteventtype").drop(op.get_bind(), checkfirst=True)
@@ -2,15 +2,27 @@
 Conftest for pytest.
 """
 
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+# Tests create their own tables on an in-memory database.
+os.environ.setdefault("DATABASE_SCHEMA_CHECK", "false")
+
 from app.main import app
 from app.models.base import Base
 from app.backend.session import get_db
+from app.backend.response_cache import response_cache
+from app.backend.entity_cache import entity_cache
+from app.backend.metrics import registry
+from app.backend.query_stats import instrument_engine
+from app.backend.tracing import trace_engine
+from app.services import AvailabilityService
+from app.middleware import rate_limiter
 
 
 @pytest.fixture(scope="session")
@@ -21,6 +33,8 @@ def test_engine():
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
+    instrument_engine(engine)
+    trace_engine(engine)
     return engine
 
 
@@ -46,6 +60,11 @@ def override_get_db(test_session_local):
 @pytest.fixture
 def client(test_engine, override_get_db):
     Base.metadata.create_all(bind=test_engine)
+    response_cache.clear()
+    entity_cache.clear()
+    AvailabilityService.clear()
+    rate_limiter.clear()
+    registry.clear()
     with TestClient(app) as client:
         yield client
     Base.metadata.drop_all(bind=test_engine)
@@ -0,0 +1,137 @@
+"""
+Admission control tests.
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.middleware.admission import (
+    READ_PRIORITY,
+    WRITE_PRIORITY,
+    AdmissionControlMiddleware,
+    AdmissionController,
+    ConcurrencyLimiter,
+)
+
+
+def test_limiter_admits_writes_before_reads():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", max_concurrency=1, max_queue=10)
+        assert await limiter.acquire(READ_PRIORITY, timeout=1)
+
+        order = []
+
+        async def request(name, priority):
+            assert await limiter.acquire(priority, timeout=1)
+            order.append(name)
+            limiter.release()
+
+        tasks = [
+            asyncio.create_task(request("read", READ_PRIORITY)),
+            asyncio.create_task(request("write", WRITE_PRIORITY)),
+        ]
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 2
+        limiter.release()
+        await asyncio.gather(*tasks)
+        return order, limiter.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["write", "read"]
+    assert stats["active"] == 0
+    assert stats["admitted"] == 3
+    assert stats["shed"] == 0
+
+
+def test_limiter_sheds_when_queue_is_full():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", max_concurrency=1, max_queue=1)
+        assert await limiter.acquire(READ_PRIORITY, timeout=1)
+
+        queued_read = asyncio.create_task(limiter.acquire(READ_PRIORITY, timeout=1))
+        await asyncio.sleep(0)
+        # Queue full: another read is shed, a write takes the read's place.
+        assert not await limiter.acquire(READ_PRIORITY, timeout=1)
+        queued_write = asyncio.create_task(limiter.acquire(WRITE_PRIORITY, timeout=1))
+        await asyncio.sleep(0)
+        assert await queued_read is False
+
+        limiter.release()
+        assert await queued_write is True
+        limiter.release()
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["shed"] == 2
+    assert stats["queue_depth"] == 0
+
+
+def test_limiter_times_out_queued_requests():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", max_concurrency=1, max_queue=5)
+        assert await limiter.acquire(READ_PRIORITY, timeout=1)
+        admitted = await limiter.acquire(READ_PRIORITY, timeout=0.01)
+        limiter.release()
+        return admitted, limiter.stats()
+
+    admitted, stats = asyncio.run(scenario())
+    assert admitted is False
+    assert stats["timed_out"] == 1
+    assert stats["active"] == 0
+    assert stats["queue_depth"] == 0
+
+
+def test_middleware_answers_503_when_saturated():
+    controller = AdmissionController(
+        max_concurrency=10,
+        max_queue=10,
+        queue_timeout=0.05,
+        retry_after=2,
+        route_limits={"GET /slow/{name}": 1},
+        route_max_queue=0,
+        exempt_routes=["GET /stream"],
+    )
+    release = asyncio.Event()
+    app = FastAPI()
+    app.add_middleware(AdmissionControlMiddleware, controller=controller)
+
+    @app.get("/slow/{name}")
+    async def slow(name: str):
+        await release.wait()
+        return {"name": name}
+
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            first = asyncio.create_task(client.get("/slow/a"))
+            await asyncio.sleep(0.01)
+            shed = await client.get("/slow/b")
+            unlimited = await client.get("/fast")
+            release.set()
+            return await first, shed, unlimited
+
+    first, shed, unlimited = asyncio.run(scenario())
+    assert first.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "2"
+    assert unlimited.status_code == 200
+
+    stats = controller.stats()
+    assert stats["routes"]["GET /slow/{name}"]["shed"] == 1
+    assert stats["routes"]["GET /slow/{name}"]["active"] == 0
+    assert controller.route_key("GET", "/stream") == "GET /stream"
+    assert controller.route_key("GET", "/fast") is None
+
+
+def test_admission_stats_endpoint(client):
+    response = client.get("/internal/admission")
+    assert response.status_code == 200
+    assert "queue_depth" in response.json()["data"]["global"]
@@ -5,6 +5,8 @@ Appointment routers tests.
 from datetime import datetime, timedelta, timezone
 from shlex import quote
 
+from app.services import AppointmentEventService
+
 
 def test_create_appointment(client, user_phone, service_account_phone):
     tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
@@ -590,3 +592,280 @@ def test_appointments_queue_functionality(client):
     assert queue_response.status_code == 200
     queue_data = queue_response.json()["data"]
     assert len(queue_data) == 3
+
+
+def test_appointment_queue_position(
+    client, user_phone, second_user_phone, service_account_phone
+):
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    appointment_ids = []
+    for phone in [user_phone, second_user_phone]:
+        response = client.post(
+            "/appointments/",
+            json={
+                "user_phone": phone,
+                "service_account_phone": service_account_phone,
+                "appointment_date": tomorrow.isoformat(),
+            },
+        )
+        appointment_ids.append(response.json()["data"]["id"])
+
+    response = client.get(f"/appointments/{appointment_ids[1]}/position")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["rank"] == 2
+    assert data["ahead"] == 1
+    assert data["queue_length"] == 2
+
+    client.delete(f"/appointments/{appointment_ids[0]}")
+    data = client.get(f"/appointments/{appointment_ids[1]}/position").json()["data"]
+    assert data["rank"] == 1
+    assert data["queue_length"] == 1
+
+    response = client.get(f"/appointments/{appointment_ids[0]}/position")
+    assert response.status_code == 400
+
+
+def test_ranked_queue_estimated_wait(
+    client, user_phone, second_user_phone, service_account_phone
+):
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    for phone, duration in [(user_phone, 45), (second_user_phone, 30)]:
+        response = client.post(
+            "/appointments/",
+            json={
+                "user_phone": phone,
+                "service_account_phone": service_account_phone,
+                "appointment_date": tomorrow.isoformat(),
+                "duration_minutes": duration,
+            },
+        )
+        assert response.status_code == 201
+
+    response = client.get(
+        "/appointments/", params={"service_account_phone": service_account_phone}
+    )
+    data = response.json()["data"]
+    assert [entry["rank"] for entry in data] == [1, 2]
+    assert [entry["estimated_wait_minutes"] for entry in data] == [0, 45]
+
+    first_start = datetime.fromisoformat(data[0]["estimated_start"])
+    second_start = datetime.fromisoformat(data[1]["estimated_start"])
+    assert second_start - first_start == timedelta(minutes=45)
+
+    response = client.get(
+        "/appointments/",
+        params={
+            "service_account_phone": service_account_phone,
+            "user_phone": second_user_phone,
+        },
+    )
+    data = response.json()["data"]
+    assert len(data) == 1
+    assert data[0]["rank"] == 2
+    assert data[0]["estimated_wait_minutes"] == 45
+
+
+def test_ranked_queue_wait_is_per_day(
+    client, user_phone, second_user_phone, service_account_phone
+):
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    for phone, days in [(user_phone, 0), (second_user_phone, 1)]:
+        response = client.post(
+            "/appointments/",
+            json={
+                "user_phone": phone,
+                "service_account_phone": service_account_phone,
+                "appointment_date": (tomorrow + timedelta(days=days)).isoformat(),
+                "duration_minutes": 45,
+            },
+        )
+        assert response.status_code == 201
+
+    response = client.get(
+        "/appointments/", params={"service_account_phone": service_account_phone}
+    )
+    data = response.json()["data"]
+    assert [entry["rank"] for entry in data] == [1, 2]
+    assert [entry["estimated_wait_minutes"] for entry in data] == [0, 0]
+    first_start = datetime.fromisoformat(data[0]["estimated_start"])
+    second_start = datetime.fromisoformat(data[1]["estimated_start"])
+    assert second_start - first_start == timedelta(days=1)
+
+
+def test_appointments_calendar(
+    client, user_phone, second_user_phone, service_account_phone
+):
+    first_day = datetime.now(timezone.utc) + timedelta(days=1)
+    appointment_ids = []
+    for phone in [user_phone, second_user_phone]:
+        response = client.post(
+            "/appointments/",
+            json={
+                "user_phone": phone,
+                "service_account_phone": service_account_phone,
+                "appointment_date": first_day.isoformat(),
+            },
+        )
+        appointment_ids.append(response.json()["data"]["id"])
+    client.delete(f"/appointments/{appointment_ids[1]}")
+
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": second_user_phone,
+            "service_account_phone": service_account_phone,
+            "appointment_date": (first_day + timedelta(days=2)).isoformat(),
+        },
+    )
+    assert response.status_code == 201
+
+    response = client.get(
+        "/appointments/calendar",
+        params={
+            "service_account_phone": service_account_phone,
+            "from": first_day.date().isoformat(),
+            "to": (first_day + timedelta(days=2)).date().isoformat(),
+            "entries": 1,
+        },
+    )
+    assert response.status_code == 200
+    days = response.json()["data"]
+    assert [day["total"] for day in days] == [2, 0, 1]
+    assert days[0]["counts"]["active"] == 1
+    assert days[0]["counts"]["canceled"] == 1
+    assert days[1]["counts"]["completed"] == 0
+    assert [len(day["entries"]) for day in days] == [1, 0, 1]
+    assert days[0]["entries"][0]["id"] == appointment_ids[0]
+
+    response = client.get(
+        "/appointments/calendar",
+        params={
+            "service_account_phone": service_account_phone,
+            "from": "2030-02-01",
+            "to": "2030-01-01",
+        },
+    )
+    assert response.status_code == 400
+
+
+def test_appointment_events_logged_in_order(
+    client, test_session_local, user_phone, service_account_phone
+):
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    appointment_id = client.post(
+        "/appointments/",
+        json={
+            "user_phone": user_phone,
+            "service_account_phone": service_account_phone,
+            "appointment_date": tomorrow.isoformat(),
+        },
+    ).json()["data"]["id"]
+    client.put(f"/appointments/{appointment_id}/no-show")
+    client.put(f"/appointments/{appointment_id}/complete")
+
+    db = test_session_local()
+    try:
+        events = AppointmentEventService.get_events(db)
+        transitions = [
+            (event.event_type.value, event.from_status, event.to_status.value)
+            for event in events
+        ]
+        sequences = [event.id for event in events]
+        assert AppointmentEventService.get_events(db, after=sequences[1]) == events[2:]
+    finally:
+        db.close()
+
+    assert transitions == [
+        ("created", None, "active"),
+        ("status_changed", "active", "no_show"),
+        ("status_changed", "no_show", "completed"),
+    ]
+    assert sequences == sorted(sequences)
+
+
+def test_appointment_change_feed(client, user_phone, service_account_phone):
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    appointment_id = client.post(
+        "/appointments/",
+        json={
+            "user_phone": user_phone,
+            "service_account_phone": service_account_phone,
+            "appointment_date": tomorrow.isoformat(),
+        },
+    ).json()["data"]["id"]
+
+    response = client.get("/appointments/changes", params={"since": 0})
+    assert response.status_code == 200
+    feed = response.json()["data"]
+    assert [change["id"] for change in feed["changes"]] == [appointment_id]
+    assert feed["changes"][0]["status"] == "active"
+    assert feed["has_more"] is False
+    cursor = feed["cursor"]
+
+    response = client.get("/appointments/changes", params={"since": cursor})
+    assert response.json()["data"] == {
+        "changes": [],
+        "cursor": cursor,
+        "has_more": False,
+    }
+
+    client.delete(f"/appointments/{appointment_id}")
+    response = client.get(
+        "/appointments/changes",
+        params={
+            "since": cursor,
+            "service_account_phone": service_account_phone,
+            "wait": 1,
+        },
+    )
+    feed = response.json()["data"]
+    assert [change["status"] for change in feed["changes"]] == ["canceled"]
+    assert feed["cursor"] > cursor
+
+    response = client.get(
+        "/appointments/changes",
+        params={"since": 0, "service_account_phone": "+0000000000"},
+    )
+    assert response.json()["data"]["changes"] == []
+
+
+def test_appointment_change_feed_pagination(client, service_account_phone):
+    appointment_ids = []
+    for index in range(3):
+        phone = f"+551198765430{index}"
+        client.post("/users/", json={"name": f"User {index}", "phone": phone})
+        appointment_ids.append(
+            client.post(
+                "/appointments/",
+                json={
+                    "user_phone": phone,
+                    "service_account_phone": service_account_phone,
+                    "appointment_date": (
+                        datetime.now(timezone.utc) + timedelta(days=1)
+                    ).isoformat(),
+                },
+            ).json()["data"]["id"]
+        )
+    client.put(f"/appointments/{appointment_ids[0]}/complete")
+
+    seen = []
+    cursor = 0
+    while True:
+        feed = client.get(
+            "/appointments/changes", params={"since": cursor, "limit": 2}
+        ).json()["data"]
+        seen.extend(change["id"] for change in feed["changes"])
+        cursor = feed["cursor"]
+        if not feed["has_more"]:
+            break
+
+    assert seen == [appointment_ids[1], appointment_ids[2], appointment_ids[0]]
+
+
+def test_appointment_change_feed_long_poll_times_out(client):
+    started = datetime.now(timezone.utc)
+    response = client.get("/appointments/changes", params={"since": 0, "wait": 0.2})
+    assert response.status_code == 200
+    assert response.json()["data"]["changes"] == []
+    assert datetime.now(timezone.utc) - started >= timedelta(seconds=0.2)
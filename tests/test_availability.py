@@ -0,0 +1,344 @@
+"""
+Availability tests.
+"""
+
+import threading
+from datetime import datetime, time, timedelta, timezone
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.entity_cache import entity_cache
+from app.exceptions import AppointmentSlotUnavailable
+from app.models.appointment import Appointment
+from app.models.base import Base
+from app.models.service_account import ServiceAccount
+from app.models.user import User
+from app.schemas import AppointmentCreate
+from app.services import AppointmentService
+from app.services.availability import AvailabilityService, IntervalIndex
+
+
+def _at(hour, minute=0):
+    return datetime(2030, 1, 1, hour, minute)
+
+
+def test_interval_index_overlaps_and_concurrency():
+    index = IntervalIndex()
+    index.add(1, _at(10), _at(10, 30))
+    index.add(2, _at(10, 15), _at(11))
+    index.add(3, _at(12), _at(12, 30))
+
+    assert len(index.overlapping(_at(10, 20), _at(10, 25))) == 2
+    assert index.overlapping(_at(11), _at(12)) == []
+    assert index.max_concurrency(_at(10), _at(11)) == 2
+    assert index.max_concurrency(_at(10, 30), _at(11)) == 1
+
+    index.remove(2)
+    assert index.max_concurrency(_at(10), _at(11)) == 1
+
+
+def test_interval_index_free_windows():
+    index = IntervalIndex()
+    index.add(1, _at(10), _at(10, 30))
+    index.add(2, _at(11), _at(12))
+
+    assert index.free_windows(_at(9), _at(13), capacity=1) == [
+        (_at(9), _at(10)),
+        (_at(10, 30), _at(11)),
+        (_at(12), _at(13)),
+    ]
+    assert index.free_windows(_at(9), _at(13), capacity=2) == [(_at(9), _at(13))]
+
+
+def _service_with_capacity(client, capacity):
+    response = client.post(
+        "/service-accounts/",
+        json={
+            "name": "Single Chair",
+            "phone": "+5511987654360",
+            "max_concurrent_appointments": capacity,
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["data"]["phone"]
+
+
+def test_overlapping_booking_rejected(client, user_phone, second_user_phone):
+    service_phone = _service_with_capacity(client, 1)
+    day = (datetime.now(timezone.utc) + timedelta(days=2)).date()
+    ten = datetime.combine(day, time(10), tzinfo=timezone.utc)
+
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": user_phone,
+            "service_account_phone": service_phone,
+            "appointment_date": ten.isoformat(),
+            "duration_minutes": 30,
+        },
+    )
+    assert response.status_code == 201
+    appointment_id = response.json()["data"]["id"]
+
+    overlapping = {
+        "user_phone": second_user_phone,
+        "service_account_phone": service_phone,
+        "appointment_date": (ten + timedelta(minutes=15)).isoformat(),
+        "duration_minutes": 30,
+    }
+    response = client.post("/appointments/", json=overlapping)
+    assert response.status_code == 409
+
+    client.delete(f"/appointments/{appointment_id}")
+    response = client.post("/appointments/", json=overlapping)
+    assert response.status_code == 201
+
+
+def test_booking_across_midnight_counts_against_next_day(
+    client, user_phone, second_user_phone
+):
+    service_phone = _service_with_capacity(client, 1)
+    day = (datetime.now(timezone.utc) + timedelta(days=2)).date()
+    late = datetime.combine(day, time(23, 30), tzinfo=timezone.utc)
+
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": user_phone,
+            "service_account_phone": service_phone,
+            "appointment_date": late.isoformat(),
+            "duration_minutes": 60,
+        },
+    )
+    assert response.status_code == 201
+
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": second_user_phone,
+            "service_account_phone": service_phone,
+            "appointment_date": (late + timedelta(minutes=45)).isoformat(),
+            "duration_minutes": 30,
+        },
+    )
+    assert response.status_code == 409
+
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": second_user_phone,
+            "service_account_phone": service_phone,
+            "appointment_date": (late + timedelta(minutes=60)).isoformat(),
+            "duration_minutes": 30,
+        },
+    )
+    assert response.status_code == 201
+
+
+def test_booking_longer_than_max_duration_rejected(client, user_phone):
+    service_phone = _service_with_capacity(client, 1)
+    day = (datetime.now(timezone.utc) + timedelta(days=2)).date()
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": user_phone,
+            "service_account_phone": service_phone,
+            "appointment_date": datetime.combine(
+                day, time(10), tzinfo=timezone.utc
+            ).isoformat(),
+            "duration_minutes": 24 * 60 + 1,
+        },
+    )
+    assert response.status_code == 422
+
+
+def test_service_account_availability(client, user_phone):
+    service_phone = _service_with_capacity(client, 1)
+    day = (datetime.now(timezone.utc) + timedelta(days=2)).date()
+
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": user_phone,
+            "service_account_phone": service_phone,
+            "appointment_date": datetime.combine(
+                day, time(10), tzinfo=timezone.utc
+            ).isoformat(),
+            "duration_minutes": 60,
+        },
+    )
+    assert response.status_code == 201
+
+    response = client.get(
+        f"/service-accounts/{service_phone}/availability",
+        params={"day": day.isoformat()},
+    )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    starts = [datetime.fromisoformat(slot["start"]).time() for slot in data["slots"]]
+    assert time(9, 30) in starts
+    assert time(10) not in starts
+    assert time(10, 30) not in starts
+    assert time(11) in starts
+    assert len(starts) == 16
+
+
+def test_index_rebuilt_after_change_by_another_worker(
+    client, test_session_local, user_phone, second_user_phone
+):
+    service_phone = _service_with_capacity(client, 1)
+    day = (datetime.now(timezone.utc) + timedelta(days=2)).date()
+    ten = datetime.combine(day, time(10), tzinfo=timezone.utc)
+    response = client.get(
+        f"/service-accounts/{service_phone}/availability",
+        params={"day": day.isoformat()},
+    )
+    assert time(10) in [
+        datetime.fromisoformat(slot["start"]).time()
+        for slot in response.json()["data"]["slots"]
+    ]
+
+    # Another worker books 10:00 and bumps the day's shared version.
+    db = test_session_local()
+    try:
+        db.add(
+            Appointment(
+                user_phone=user_phone,
+                service_account_phone=service_phone,
+                appointment_date=ten,
+                duration_minutes=30,
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+    AvailabilityService._versions.incr(
+        AvailabilityService._version_key(service_phone, day)
+    )
+
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": second_user_phone,
+            "service_account_phone": service_phone,
+            "appointment_date": ten.isoformat(),
+            "duration_minutes": 30,
+        },
+    )
+    assert response.status_code == 409
+
+
+def test_booking_recounted_when_index_is_stale(
+    client, test_session_local, user_phone, second_user_phone
+):
+    service_phone = _service_with_capacity(client, 1)
+    day = (datetime.now(timezone.utc) + timedelta(days=2)).date()
+    ten = datetime.combine(day, time(10), tzinfo=timezone.utc)
+    client.get(
+        f"/service-accounts/{service_phone}/availability",
+        params={"day": day.isoformat()},
+    )
+
+    # A concurrent booking committed after this worker's index was read,
+    # before its version was bumped.
+    db = test_session_local()
+    try:
+        db.add(
+            Appointment(
+                user_phone=user_phone,
+                service_account_phone=service_phone,
+                appointment_date=ten,
+                duration_minutes=30,
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": second_user_phone,
+            "service_account_phone": service_phone,
+            "appointment_date": ten.isoformat(),
+            "duration_minutes": 30,
+        },
+    )
+    assert response.status_code == 409
+    response = client.get(
+        "/appointments/", params={"service_account_phone": service_phone}
+    )
+    assert len(response.json()["data"]) == 1
+
+
+def test_concurrent_bookings_never_exceed_capacity(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'bookings.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    service_phone = "+5511987654398"
+    capacity, total = 2, 16
+    with engine.begin() as connection:
+        connection.execute(
+            insert(ServiceAccount.__table__),
+            [
+                {
+                    "name": "Small Service",
+                    "phone": service_phone,
+                    "max_concurrent_appointments": capacity,
+                }
+            ],
+        )
+        connection.execute(
+            insert(User.__table__),
+            [{"name": f"User {i}", "phone": f"+55117{i:08d}"} for i in range(total)],
+        )
+    ten = datetime.combine(
+        (datetime.now(timezone.utc) + timedelta(days=2)).date(),
+        time(10),
+        tzinfo=timezone.utc,
+    )
+
+    booked, rejected, errors = [], [], []
+    barrier = threading.Barrier(total)
+
+    def book(i):
+        db = session_local()
+        try:
+            barrier.wait()
+            booked.append(
+                AppointmentService.create_appointment(
+                    db,
+                    AppointmentCreate(
+                        user_phone=f"+55117{i:08d}",
+                        service_account_phone=service_phone,
+                        appointment_date=ten,
+                        duration_minutes=30,
+                    ),
+                ).id
+            )
+        except AppointmentSlotUnavailable:
+            rejected.append(i)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            db.close()
+
+    try:
+        threads = [threading.Thread(target=book, args=(i,)) for i in range(total)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        engine.dispose()
+        AvailabilityService.clear()
+        entity_cache.clear()
+
+    assert errors == []
+    assert len(booked) == capacity
+    assert len(rejected) == total - capacity
@@ -0,0 +1,248 @@
+"""
+Cache tests.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+
+from app.backend.cache import (
+    InMemoryCacheBackend,
+    RedisCacheBackend,
+    RedisChannel,
+    TieredCacheBackend,
+)
+from app.backend.entity_cache import EntityCache
+from app.backend.response_cache import ResponseCache, response_cache
+from app.services.events import ChangeNotifier
+
+
+def test_in_memory_backend_evicts_least_recently_used():
+    backend = InMemoryCacheBackend(max_entries=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    assert backend.get("a") == 1
+
+    backend.set("c", 3)
+    assert backend.get("b") is None
+    assert backend.get("a") == 1
+    assert backend.get("c") == 3
+    assert backend.stats()["evictions"] == 1
+
+
+def test_in_memory_backend_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.backend.cache.time.monotonic", lambda: now[0])
+
+    backend = InMemoryCacheBackend(max_entries=10, default_ttl=5)
+    backend.set("a", 1)
+    assert backend.get("a") == 1
+
+    now[0] += 6
+    assert backend.get("a") is None
+
+
+def test_in_memory_counters_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.backend.cache.time.monotonic", lambda: now[0])
+
+    backend = InMemoryCacheBackend(max_entries=1)
+    assert backend.incr("day", ttl=60) == 1
+    assert backend.incr("tag") == 1
+    assert backend.incr("day", ttl=60) == 2
+
+    now[0] += 61
+    assert backend.get_counters(["day", "tag"]) == [0, 1]
+    assert backend._counters == {"tag": 1}
+
+
+def test_redis_backend_round_trip():
+    backend = RedisCacheBackend(fakeredis.FakeRedis(), default_ttl=30)
+    backend.set("a", {"value": [1, 2]})
+    assert backend.get("a") == {"value": [1, 2]}
+    assert backend.get("missing") is None
+    assert backend.incr("version") == 1
+    assert backend.get_counters(["version", "other"]) == [1, 0]
+    assert backend.incr("day", ttl=60) == 1
+    assert 0 < backend.client.pttl("waitlist:counter:day") <= 60_000
+
+    stats = backend.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_counters_do_not_walk_the_cache(monkeypatch):
+    def walk(*args, **kwargs):
+        raise AssertionError("counters must not walk the cache")
+
+    client = fakeredis.FakeRedis()
+    tiered = TieredCacheBackend(
+        InMemoryCacheBackend(max_entries=10), RedisCacheBackend(client)
+    )
+    tiered.set("a", 1)
+    assert tiered.get("a") == 1
+    assert tiered.get("missing") is None
+
+    monkeypatch.setattr(InMemoryCacheBackend, "memory_bytes", walk)
+    monkeypatch.setattr(client, "scan_iter", walk)
+    assert tiered.counters() == {"hits": 1, "misses": 1, "entries": 1}
+    assert tiered.shared.counters()["entries"] is None
+    tiered.close()
+
+
+def test_response_cache_invalidation_changes_key():
+    cache = ResponseCache(InMemoryCacheBackend(max_entries=10))
+    key = cache.make_key("route", {"skip": 0, "day": None}, ["users"])
+    assert key == cache.make_key("route", {"skip": 0}, ["users"])
+
+    cache.invalidate("users")
+    assert key != cache.make_key("route", {"skip": 0}, ["users"])
+
+
+def test_read_users_is_cached_until_write(client):
+    client.post("/users/", json={"name": "First", "phone": "+5511987654321"})
+
+    assert len(client.get("/users/").json()["data"]) == 1
+    assert len(client.get("/users/").json()["data"]) == 1
+    assert response_cache.stats()["hits"] == 1
+
+    client.post("/users/", json={"name": "Second", "phone": "+5511987654322"})
+    assert len(client.get("/users/").json()["data"]) == 2
+
+
+def test_ranked_queue_cache_invalidated_by_status_change(
+    client, user_phone, service_account_phone
+):
+    tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    appointment_id = client.post(
+        "/appointments/",
+        json={
+            "user_phone": user_phone,
+            "service_account_phone": service_account_phone,
+            "appointment_date": tomorrow,
+        },
+    ).json()["data"]["id"]
+
+    params = {"service_account_phone": service_account_phone}
+    assert len(client.get("/appointments/", params=params).json()["data"]) == 1
+
+    client.delete(f"/appointments/{appointment_id}")
+    assert client.get("/appointments/", params=params).json()["data"] == []
+
+
+def test_entity_snapshot_invalidated_by_update(client, service_account_phone):
+    client.get(f"/service-accounts/{service_account_phone}")
+    response = client.put(
+        f"/service-accounts/{service_account_phone}",
+        json={"cancellation_weight": 5.0},
+    )
+    assert response.status_code == 200
+
+    response = client.get(f"/service-accounts/{service_account_phone}")
+    assert response.json()["data"]["cancellation_weight"] == 5.0
+
+
+def test_entity_snapshot_invalidated_by_delete(client, service_account_phone):
+    client.get(f"/service-accounts/{service_account_phone}")
+    assert (
+        client.delete(f"/service-accounts/{service_account_phone}").status_code == 204
+    )
+    assert client.get(f"/service-accounts/{service_account_phone}").status_code == 404
+
+
+def test_cache_stats_endpoint(client, user_phone):
+    client.get(f"/users/{user_phone}")
+    client.get("/users/+5511900000000")
+    client.get("/users/+5511900000000")
+
+    response = client.get("/internal/caches")
+    assert response.status_code == 200
+    entity_stats = response.json()["data"]["entity"]
+    assert entity_stats["entries"] == 2
+    assert entity_stats["hits"] == 1
+    assert entity_stats["negative_hits"] == 1
+    assert 0 < entity_stats["hit_rate"] < 1
+    assert entity_stats["memory_bytes"] > 0
+
+
+def _tiered_backend(server, channel="test:invalidate"):
+    return TieredCacheBackend(
+        InMemoryCacheBackend(max_entries=10, default_ttl=60),
+        RedisCacheBackend(fakeredis.FakeRedis(server=server), prefix="test:"),
+        channel=channel,
+    )
+
+
+def _eventually(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_tiered_backend_invalidates_other_workers():
+    server = fakeredis.FakeServer()
+    first, second = _tiered_backend(server), _tiered_backend(server)
+    try:
+        first.set("a", {"value": 1})
+        assert second.get("a") == {"value": 1}
+        assert second.local.get("a") == {"value": 1}
+
+        first.delete("a")
+        assert _eventually(lambda: len(second.local) == 0)
+        assert second.get("a") is None
+
+        second.set("b", 2)
+        assert first.get("b") == 2
+        second.clear()
+        assert _eventually(lambda: len(first.local) == 0)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_caches_consistent_across_workers_on_shared_backend():
+    server = fakeredis.FakeServer()
+    first = EntityCache(_tiered_backend(server), ttl=60, negative_ttl=5)
+    second = EntityCache(_tiered_backend(server), ttl=60, negative_ttl=5)
+    first_responses = ResponseCache(first.backend)
+    second_responses = ResponseCache(second.backend)
+    try:
+        second.set_missing("user", "+5511900000000")
+        assert first.get("user", "+5511900000000") == EntityCache.MISSING
+        second.invalidate("user", "+5511900000000")
+        assert _eventually(lambda: first.get("user", "+5511900000000") is None)
+
+        key = first_responses.make_key("route", {}, ["users"])
+        assert key == second_responses.make_key("route", {}, ["users"])
+        second_responses.invalidate("users")
+        assert first_responses.make_key("route", {}, ["users"]) != key
+    finally:
+        first.backend.close()
+        second.backend.close()
+
+
+def test_change_notifier_wakes_waiters_of_other_workers():
+    server = fakeredis.FakeServer()
+    first, second = (
+        ChangeNotifier(
+            RedisChannel(fakeredis.FakeRedis(server=server), "test:invalidate")
+        )
+        for _ in range(2)
+    )
+
+    async def scenario():
+        waiter = asyncio.create_task(second.wait(5))
+        await asyncio.sleep(0.05)
+        first.notify()
+        return await waiter
+
+    try:
+        assert asyncio.run(scenario())
+    finally:
+        first.channel.close()
+        second.channel.close()
@@ -0,0 +1,88 @@
+"""
+Export routers tests.
+"""
+
+import io
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.schemas.export import ColumnarFormat, ExportTable
+from app.services.export import ExportService
+
+
+def _book(client, user_phone, service_account_phone, days_ahead):
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": user_phone,
+            "service_account_phone": service_account_phone,
+            "appointment_date": (
+                datetime.now(timezone.utc) + timedelta(days=days_ahead)
+            ).isoformat(),
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["data"]
+
+
+def test_export_appointments_parquet(
+    client,
+    user_phone,
+    second_user_phone,
+    service_account_phone,
+    another_service_account_phone,
+):
+    _book(client, user_phone, service_account_phone, 1)
+    _book(client, second_user_phone, another_service_account_phone, 1)
+
+    response = client.get("/exports/appointments")
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 2
+    assert table.column("status").to_pylist() == ["active", "active"]
+
+    response = client.get(
+        "/exports/appointments",
+        params={"service_account_phone": service_account_phone},
+    )
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column("user_phone").to_pylist() == [user_phone]
+
+
+def test_export_users_filtered_by_service_account_arrow(
+    client, user_phone, second_user_phone, service_account_phone
+):
+    _book(client, user_phone, service_account_phone, 1)
+
+    response = client.get(
+        "/exports/users",
+        params={"format": "arrow", "service_account_phone": service_account_phone},
+    )
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("phone").to_pylist() == [user_phone]
+
+
+def test_export_date_range_in_multiple_batches(
+    client, test_session_local, user_phone, second_user_phone, service_account_phone
+):
+    _book(client, user_phone, service_account_phone, 2)
+    _book(client, second_user_phone, service_account_phone, 3)
+
+    db = test_session_local()
+    try:
+        chunks = ExportService.stream_columnar_snapshot(
+            db,
+            table=ExportTable.APPOINTMENTS,
+            columnar_format=ColumnarFormat.PARQUET,
+            date_from=(datetime.now(timezone.utc) + timedelta(days=1)).date(),
+            batch_size=1,
+        )
+        parquet_file = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+    finally:
+        db.close()
+
+    assert parquet_file.metadata.num_rows == 2
+    assert parquet_file.metadata.num_row_groups == 2
@@ -0,0 +1,131 @@
+"""
+Metrics tests.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+from app.backend.metrics import MetricsRegistry
+
+
+def _samples(text: str) -> dict:
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_metrics_by_route_template(client, user_phone):
+    client.get(f"/users/{user_phone}")
+    client.get("/users/+5511000000000")
+    client.get("/unknown")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = _samples(response.text)
+    route = 'method="GET",route="/users/{phone}"'
+    assert samples[f'waitlist_http_requests_total{{{route},status="200"}}'] == 1
+    assert samples[f'waitlist_http_requests_total{{{route},status="404"}}'] == 1
+    assert samples[f"waitlist_http_request_duration_seconds_count{{{route}}}"] == 2
+    assert (
+        samples[f'waitlist_http_request_duration_seconds_bucket{{{route},le="+Inf"}}']
+        == 2
+    )
+    assert (
+        samples[
+            'waitlist_http_requests_total{method="GET",route="unmatched",status="404"}'
+        ]
+        == 1
+    )
+    assert (
+        samples['waitlist_http_requests_in_progress{method="GET",route="/metrics"}']
+        == 1
+    )
+    assert user_phone not in response.text
+
+
+def test_metrics_service_counters(
+    client, user_phone, service_account_phone, another_service_account_phone
+):
+    appointment_date = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    for phone in (service_account_phone, another_service_account_phone):
+        client.post(
+            "/appointments/",
+            json={
+                "user_phone": user_phone,
+                "service_account_phone": phone,
+                "appointment_date": appointment_date,
+            },
+        )
+
+    samples = _samples(client.get("/metrics").text)
+
+    assert samples["waitlist_penalty_computations_total"] == 1
+    assert samples['waitlist_appointment_rejections_total{reason="duplicate"}'] == 1
+    assert 'waitlist_db_pool_connections{state="checked_out"}' in samples
+
+
+def test_multiprocess_aggregation(tmp_path):
+    def worker_registry():
+        registry = MetricsRegistry(directory=str(tmp_path))
+        return (
+            registry,
+            registry.counter("requests_total", "Requests", ("route",)),
+            registry.gauge("in_progress", "In progress"),
+            registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)),
+        )
+
+    def snapshot(requests: float, in_progress: float, latencies) -> dict:
+        registry, requests_total, gauge, latency = worker_registry()
+        requests_total.inc("/a", amount=requests)
+        gauge.set(in_progress)
+        for value in latencies:
+            latency.observe(value)
+        return registry.snapshot()
+
+    # Another live worker, and one that exited.
+    (tmp_path / f"{os.getppid()}.json").write_text(json.dumps(snapshot(2, 3, [0.05])))
+    dead = tmp_path / f"{_dead_pid()}.json"
+    dead.write_text(json.dumps(snapshot(5, 7, [0.5, 2.0])))
+
+    registry, requests_total, gauge, _ = worker_registry()
+    requests_total.inc("/a")
+    gauge.set(1)
+    samples = _samples(registry.render())
+
+    assert samples['requests_total{route="/a"}'] == 8
+    assert samples["in_progress"] == 4
+    assert samples['latency_seconds_bucket{le="0.1"}'] == 1
+    assert samples['latency_seconds_bucket{le="1.0"}'] == 2
+    assert samples['latency_seconds_bucket{le="+Inf"}'] == 3
+    assert samples["latency_seconds_sum"] == 2.55
+
+    # The exited worker was folded into the archive, and is counted once.
+    assert not dead.exists()
+    assert (tmp_path / "archive.json").exists()
+    assert _samples(registry.render())['requests_total{route="/a"}'] == 8
+
+
+def test_flush_on_stop_drops_gauges(tmp_path):
+    registry = MetricsRegistry(directory=str(tmp_path), flush_interval=60)
+    registry.counter("requests_total", "Requests").inc()
+    registry.gauge("in_progress", "In progress").set(2)
+
+    registry.start()
+    registry.stop()
+
+    written = json.loads((tmp_path / f"{os.getpid()}.json").read_text())
+    assert set(written) == {"requests_total"}
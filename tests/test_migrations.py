@@ -0,0 +1,142 @@
+"""
+Tests for the database migrations and the startup schema check.
+"""
+
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+
+from app.backend import migrations
+from app.backend.migrations import (
+    ALEMBIC_INI,
+    SCHEMA_REVISION,
+    current_revision,
+    ensure_schema,
+    migrate_database,
+    unversioned_revision,
+    upgrade_database,
+)
+from app.models.base import Base
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'waitlist.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_schema_revision_is_head():
+    script = ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+    assert script.get_current_head() == SCHEMA_REVISION
+
+
+def test_upgrade_creates_model_tables(file_engine):
+    upgrade_database(file_engine)
+
+    assert current_revision(file_engine) == SCHEMA_REVISION
+    tables = set(inspect(file_engine).get_table_names())
+    assert set(Base.metadata.tables) <= tables
+
+
+def test_upgrade_backfills_change_feed(file_engine):
+    upgrade_database(file_engine, "0001")
+    with file_engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO appointments "
+                "(user_phone, service_account_phone, appointment_date, status, created_at) "
+                "VALUES ('+5511987654321', '+5511987654323', '2030-01-01', 'ACTIVE', '2029-12-01')"
+            )
+        )
+
+    upgrade_database(file_engine)
+
+    with file_engine.connect() as connection:
+        change_seq, updated_at = connection.execute(
+            text("SELECT change_seq, updated_at FROM appointments")
+        ).one()
+        event = connection.execute(
+            text("SELECT id, event_type, to_status FROM appointment_events")
+        ).one()
+    assert change_seq == event.id
+    assert updated_at.startswith("2029-12-01")
+    assert (event.event_type, event.to_status) == ("CREATED", "ACTIVE")
+
+
+def test_upgrade_backfills_daily_stats(file_engine):
+    upgrade_database(file_engine, "0001")
+    with file_engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO appointments "
+                "(user_phone, service_account_phone, appointment_date, status, penalty) "
+                "VALUES ('+5511987654321', '+5511987654323', '2030-01-01 10:00:00', 'ACTIVE', 0.5), "
+                "('+5511987654322', '+5511987654323', '2030-01-01 11:00:00', 'CANCELED', 1.0), "
+                "('+5511987654321', '+5511987654323', '2030-01-02 10:00:00', 'COMPLETED', 0.0)"
+            )
+        )
+
+    upgrade_database(file_engine)
+
+    with file_engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                "SELECT day, total, active, completed, canceled, no_show, penalty_sum "
+                "FROM daily_appointment_stats ORDER BY day"
+            )
+        ).all()
+    assert [tuple(row) for row in rows] == [
+        ("2030-01-01", 2, 1, 0, 1, 0, 1.5),
+        ("2030-01-02", 1, 0, 1, 0, 0, 0.0),
+    ]
+
+
+def test_ensure_schema_migrates_when_allowed(file_engine, monkeypatch):
+    monkeypatch.setattr(migrations.settings, "DATABASE_MIGRATE_ON_STARTUP", True)
+
+    assert ensure_schema(file_engine) == SCHEMA_REVISION
+
+
+def test_ensure_schema_rejects_outdated_database(file_engine, monkeypatch):
+    monkeypatch.setattr(migrations.settings, "DATABASE_MIGRATE_ON_STARTUP", False)
+    upgrade_database(file_engine, "0001")
+
+    with pytest.raises(RuntimeError, match="app.commands.migrate"):
+        ensure_schema(file_engine)
+
+
+def test_ensure_schema_stamps_unversioned_tables(file_engine, monkeypatch):
+    monkeypatch.setattr(migrations.settings, "DATABASE_MIGRATE_ON_STARTUP", True)
+    Base.metadata.create_all(bind=file_engine)
+    assert unversioned_revision(file_engine) == SCHEMA_REVISION
+
+    assert ensure_schema(file_engine) == SCHEMA_REVISION
+
+
+def test_migrate_stamps_tables_created_before_migrations(file_engine):
+    upgrade_database(file_engine, "0001")
+    with file_engine.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+    assert unversioned_revision(file_engine) == "0001"
+
+    assert migrate_database(file_engine) == SCHEMA_REVISION
+    assert unversioned_revision(file_engine) is None
+    assert inspect(file_engine).has_table("appointment_events")
+
+
+def test_ensure_schema_accepts_current_database(file_engine, monkeypatch):
+    monkeypatch.setattr(migrations.settings, "DATABASE_MIGRATE_ON_STARTUP", False)
+    upgrade_database(file_engine)
+
+    assert ensure_schema(file_engine) == SCHEMA_REVISION
+
+
+def test_read_startup_timing(client):
+    response = client.get("/internal/startup")
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert {"imports", "app", "schema"} <= set(data["phases_ms"])
+    assert data["total_ms"] >= data["phases_ms"]["imports"]
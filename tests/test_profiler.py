@@ -0,0 +1,99 @@
+"""
+Profiler tests.
+"""
+
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.backend.profiler import Profiler, StackSampler
+from app.main import app
+from app.middleware.profiler import ProfilerMiddleware
+
+
+def _busy(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+@pytest.fixture
+def profiled_client(client, tmp_path):
+    profiler = Profiler(directory=str(tmp_path), interval=0.0005)
+    with TestClient(
+        ProfilerMiddleware(app, profiler, enabled=True, token="secret")
+    ) as profiled:
+        yield profiled
+
+
+def test_sampler_folds_stacks():
+    sampler = StackSampler(interval=0.0005, root=os.path.dirname(__file__))
+    sampler.start()
+    _busy(0.05)
+    sampler.stop()
+
+    lines = sampler.folded().splitlines()
+    assert lines
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == sampler.samples
+    stack = lines[0].rsplit(" ", 1)[0].split(";")
+    assert stack[-1].startswith("_busy (test_profiler.py:")
+    assert "test_sampler_folds_stacks (test_profiler.py:" in ";".join(stack)
+
+
+def test_profile_requested_with_token(profiled_client, user_phone, tmp_path):
+    response = profiled_client.get(
+        f"/users/{user_phone}", headers={"X-Profile": "secret"}
+    )
+
+    assert response.status_code == 200
+    filename = response.headers["x-profile"]
+    assert filename.endswith("-GET__users__phone.folded")
+    assert (tmp_path / filename).exists()
+
+    for headers in ({}, {"X-Profile": "wrong"}):
+        response = profiled_client.get(f"/users/{user_phone}", headers=headers)
+        assert "x-profile" not in response.headers
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_streaming_response_profiled_to_the_end(tmp_path):
+    streaming = FastAPI()
+
+    @streaming.get("/stream")
+    def stream():
+        def chunks():
+            yield "start\n"
+            _busy(0.05)
+            yield "end\n"
+
+        return StreamingResponse(chunks())
+
+    profiler = Profiler(
+        directory=str(tmp_path), interval=0.0005, root=os.path.dirname(__file__)
+    )
+    with TestClient(
+        ProfilerMiddleware(streaming, profiler, enabled=True, token="secret")
+    ) as profiled:
+        response = profiled.get("/stream", headers={"X-Profile": "secret"})
+
+    assert response.text == "start\nend\n"
+    folded = (tmp_path / response.headers["x-profile"]).read_text()
+    assert "chunks (test_profiler.py:" in folded
+    assert "_busy (test_profiler.py:" in folded
+
+
+def test_one_profile_at_a_time(tmp_path):
+    profiler = Profiler(directory=str(tmp_path))
+    sampler = profiler.start()
+
+    assert profiler.start() is None
+    profiler.finish(sampler, "first")
+    second = profiler.start()
+    assert second is not None
+    profiler.finish(second, "second")
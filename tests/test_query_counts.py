@@ -0,0 +1,78 @@
+"""
+Per-endpoint query count tests.
+"""
+
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def table_reads(test_engine):
+    """Count SELECT statements per table read while the fixture is active."""
+    reads = Counter()
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            for table in re.findall(r"FROM (\w+)", statement):
+                reads[table] += 1
+
+    event.listen(test_engine, "before_cursor_execute", count)
+    yield reads
+    event.remove(test_engine, "before_cursor_execute", count)
+
+
+def test_create_appointment_fetches_each_identity_once(
+    client, user_phone, service_account_phone, table_reads
+):
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": user_phone,
+            "service_account_phone": service_account_phone,
+            "appointment_date": (
+                datetime.now(timezone.utc) + timedelta(days=1)
+            ).isoformat(),
+        },
+    )
+    assert response.status_code == 201
+    assert table_reads["users"] == 1
+    assert table_reads["service_accounts"] == 1
+
+
+def test_read_service_account_fetches_it_once(
+    client, service_account_phone, table_reads
+):
+    response = client.get(f"/service-accounts/{service_account_phone}")
+    assert response.status_code == 200
+    assert table_reads["service_accounts"] == 1
+
+
+def test_warm_entity_cache_skips_identity_reads(
+    client, service_account_phone, table_reads
+):
+    for _ in range(2):
+        assert (
+            client.get(f"/service-accounts/{service_account_phone}").status_code == 200
+        )
+        response = client.get(
+            f"/service-accounts/{service_account_phone}/stats",
+            params={"from": "2030-01-01", "to": "2030-01-07"},
+        )
+        assert response.status_code == 200
+    assert table_reads["service_accounts"] == 1
+
+
+def test_unknown_phone_is_negatively_cached(client, table_reads):
+    phone = "+5511900000000"
+    assert client.get(f"/users/{phone}").status_code == 404
+    assert client.get(f"/users/{phone}").status_code == 404
+    assert table_reads["users"] == 1
+
+    assert (
+        client.post("/users/", json={"name": "Late", "phone": phone}).status_code == 201
+    )
+    assert client.get(f"/users/{phone}").status_code == 200
@@ -0,0 +1,115 @@
+"""
+SQL instrumentation tests.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, text
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.backend.query_stats import instrument_engine, statement_shape
+from app.middleware import QueryStatsMiddleware
+
+
+def _lookup_app(engine, lookups: int, **kwargs):
+    def lookup(request):
+        with engine.connect() as connection:
+            for value in range(lookups):
+                connection.execute(text("SELECT :value"), {"value": value})
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/items/{item_id}", lookup)])
+    return QueryStatsMiddleware(app, debug_headers=True, **kwargs)
+
+
+def test_statement_shape_ignores_in_list_length():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?)") == statement_shape(
+        "SELECT *\n  FROM t WHERE id IN (?, ?, ?, ?)"
+    )
+
+
+def test_server_timing_header(client, user_phone, service_account_phone):
+    response = client.post(
+        "/appointments/",
+        json={
+            "user_phone": user_phone,
+            "service_account_phone": service_account_phone,
+            "appointment_date": (
+                datetime.now(timezone.utc) + timedelta(days=1)
+            ).isoformat(),
+        },
+    )
+
+    assert response.status_code == 201
+    name, duration, description = response.headers["server-timing"].split(";")
+    assert name == "db"
+    assert float(duration.removeprefix("dur=")) > 0
+    assert int(description.removeprefix('desc="').split()[0]) > 1
+
+
+def test_repeated_statements_are_flagged(caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    with caplog.at_level(logging.WARNING, logger="app.middleware.query_stats"):
+        with TestClient(_lookup_app(engine, 2, repeat_threshold=3)) as client:
+            response = client.get("/items/1")
+        assert response.headers["server-timing"].endswith('desc="2 queries"')
+        assert not caplog.records
+
+        with TestClient(_lookup_app(engine, 3, repeat_threshold=3)) as client:
+            client.get("/items/1")
+
+    (record,) = caplog.records
+    assert (
+        record.getMessage()
+        == "Possible N+1: GET /items/{item_id} ran 3 times: SELECT ?"
+    )
+
+
+def test_same_lookup_twice_is_flagged_by_default(caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    with caplog.at_level(logging.WARNING, logger="app.middleware.query_stats"):
+        with TestClient(_lookup_app(engine, 2)) as client:
+            client.get("/items/1")
+
+    (record,) = caplog.records
+    assert (
+        record.getMessage()
+        == "Possible N+1: GET /items/{item_id} ran 2 times: SELECT ?"
+    )
+
+
+def test_slow_queries_are_logged_with_parameters(caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, slow_query_ms=0)
+
+    with caplog.at_level(logging.WARNING, logger="app.backend.query_stats"):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT :value"), {"value": 42})
+
+    (record,) = caplog.records
+    assert record.getMessage().startswith("Slow query (")
+    assert record.getMessage().endswith("SELECT ?; parameters: (42,)")
+
+
+def test_slow_bulk_writes_log_the_first_row(caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, slow_query_ms=0)
+
+    with caplog.at_level(logging.WARNING, logger="app.backend.query_stats"):
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE t (value INTEGER)"))
+            connection.execute(
+                text("INSERT INTO t VALUES (:value)"),
+                [{"value": i} for i in range(1000)],
+            )
+
+    assert (
+        caplog.records[-1].getMessage().endswith("parameters: (0,) and 999 more rows")
+    )
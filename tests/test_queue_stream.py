@@ -0,0 +1,156 @@
+"""
+Live queue stream tests.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+import pytest
+
+from app.backend.cache import RedisChannel
+from app.exceptions import QueueStreamFull
+from app.schemas import AppointmentCreate
+from app.services import AppointmentService
+from app.services.queue_stream import QueueBroadcaster, diff_queue, queue_broadcaster
+
+
+def test_diff_queue_insert_remove():
+    old = [{"id": 1}, {"id": 2}, {"id": 3}]
+    new = [{"id": 1}, {"id": 4}, {"id": 3}]
+
+    changes = diff_queue(old, new)
+    assert changes["removed"] == [2]
+    assert changes["inserted"] == [{"position": 1, "appointment": {"id": 4}}]
+    assert changes["moved"] == []
+
+
+def test_diff_queue_reorder():
+    changes = diff_queue([{"id": 1}, {"id": 2}], [{"id": 2}, {"id": 1}])
+    assert changes["inserted"] == []
+    assert changes["removed"] == []
+    assert {move["id"] for move in changes["moved"]} == {1, 2}
+
+
+def test_diff_queue_updates_shifted_entries():
+    old = [
+        {"id": 1, "rank": 1, "estimated_wait_minutes": 0},
+        {"id": 2, "rank": 2, "estimated_wait_minutes": 30},
+        {"id": 3, "rank": 3, "estimated_wait_minutes": 60},
+    ]
+    new = [
+        {"id": 2, "rank": 1, "estimated_wait_minutes": 0},
+        {"id": 3, "rank": 2, "estimated_wait_minutes": 30},
+    ]
+
+    changes = diff_queue(old, new)
+    assert changes["removed"] == [1]
+    assert changes["moved"] == []
+    assert changes["updated"] == [
+        {"id": 2, "fields": {"rank": 1, "estimated_wait_minutes": 0}},
+        {"id": 3, "fields": {"rank": 2, "estimated_wait_minutes": 30}},
+    ]
+
+
+def test_broadcaster_fans_out_one_diff_to_all_subscribers():
+    broadcaster = QueueBroadcaster()
+
+    async def scenario():
+        queues = [broadcaster.subscribe("+1", [{"id": 1}]) for _ in range(3)]
+        broadcaster.publish("+1", [{"id": 1}, {"id": 2}])
+        events = [await asyncio.wait_for(queue.get(), 1) for queue in queues]
+        for queue in queues:
+            broadcaster.unsubscribe("+1", queue)
+        return events
+
+    events = asyncio.run(scenario())
+    assert all(event == events[0] for event in events)
+    assert events[0][0] == "diff"
+    assert events[0][1]["inserted"][0]["appointment"] == {"id": 2}
+    assert not broadcaster.has_subscribers("+1")
+    assert broadcaster.snapshot("+1") is None
+
+
+def test_create_and_cancel_publish_queue_diffs(
+    client, test_session_local, user_phone, service_account_phone
+):
+    async def scenario():
+        db = test_session_local()
+        try:
+            queue = queue_broadcaster.subscribe(
+                service_account_phone,
+                AppointmentService.get_queue_snapshot(db, service_account_phone),
+            )
+            appointment = AppointmentService.create_appointment(
+                db,
+                AppointmentCreate(
+                    user_phone=user_phone,
+                    service_account_phone=service_account_phone,
+                    appointment_date=datetime.now(timezone.utc) + timedelta(days=1),
+                ),
+            )
+            created = await asyncio.wait_for(queue.get(), 1)
+
+            AppointmentService.cancel_appointment(db, appointment.id)
+            canceled = await asyncio.wait_for(queue.get(), 1)
+
+            queue_broadcaster.unsubscribe(service_account_phone, queue)
+            return appointment.id, created, canceled
+        finally:
+            db.close()
+
+    appointment_id, created, canceled = asyncio.run(scenario())
+    assert created[1]["inserted"][0]["appointment"]["id"] == appointment_id
+    assert canceled[1]["removed"] == [appointment_id]
+
+
+def test_broadcaster_caps_subscribers():
+    broadcaster = QueueBroadcaster(max_subscribers=2, retry_after=7)
+
+    async def scenario():
+        queues = [broadcaster.subscribe("+1", []), broadcaster.subscribe("+2", [])]
+        with pytest.raises(QueueStreamFull):
+            broadcaster.subscribe("+1", [])
+        broadcaster.unsubscribe("+2", queues[1])
+        broadcaster.subscribe("+1", [])
+
+    asyncio.run(scenario())
+    assert broadcaster.subscriber_count() == 2
+
+
+def test_stream_rejects_subscribers_over_the_cap(
+    client, service_account_phone, monkeypatch
+):
+    monkeypatch.setattr(queue_broadcaster, "max_subscribers", 0)
+    response = client.get(
+        "/appointments/stream",
+        params={"service_account_phone": service_account_phone},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(queue_broadcaster.retry_after)
+
+
+def test_broadcaster_fans_out_changes_of_other_workers():
+    server = fakeredis.FakeServer()
+    first, second = (
+        QueueBroadcaster(
+            channel=RedisChannel(fakeredis.FakeRedis(server=server), "test:invalidate")
+        )
+        for _ in range(2)
+    )
+    second.load_snapshot = lambda phone: [{"id": 1}, {"id": 2}]
+
+    async def scenario():
+        queue = second.subscribe("+1", [{"id": 1}])
+        first.announce("+1")
+        event = await asyncio.wait_for(queue.get(), 5)
+        second.unsubscribe("+1", queue)
+        return event
+
+    try:
+        event = asyncio.run(scenario())
+    finally:
+        first.channel.close()
+        second.channel.close()
+    assert event[0] == "diff"
+    assert event[1]["inserted"] == [{"position": 1, "appointment": {"id": 2}}]
@@ -0,0 +1,114 @@
+"""
+Rate limiting tests.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.middleware.rate_limit import (
+    LocalBucketStore,
+    RateLimitMiddleware,
+    RateLimiter,
+    RedisBucketStore,
+)
+
+
+def test_local_bucket_allows_burst_then_limits(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.middleware.rate_limit.time.monotonic", lambda: now[0])
+    store = LocalBucketStore()
+
+    assert [store.hit("k", rate=2, burst=3) for _ in range(3)] == [0, 0, 0]
+    assert store.hit("k", rate=2, burst=3) == 0.5
+
+    now[0] += 0.5
+    assert store.hit("k", rate=2, burst=3) == 0
+    assert store.hit("k", rate=2, burst=3) > 0
+
+
+def test_local_bucket_evicts_idle_and_excess_keys(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.middleware.rate_limit.time.monotonic", lambda: now[0])
+    store = LocalBucketStore(max_keys=2)
+
+    store.hit("a", rate=1, burst=1)
+    store.hit("b", rate=1, burst=1)
+    store.hit("c", rate=1, burst=1)
+    assert len(store) == 2
+
+    now[0] += 10
+    store.hit("d", rate=1, burst=1)
+    assert len(store) == 1
+
+
+def test_redis_bucket_shared_between_workers():
+    server = fakeredis.FakeServer()
+    first = RedisBucketStore(fakeredis.FakeRedis(server=server), prefix="test:")
+    second = RedisBucketStore(fakeredis.FakeRedis(server=server), prefix="test:")
+
+    assert first.hit("k", rate=1, burst=2) == 0
+    assert second.hit("k", rate=1, burst=2) == 0
+    assert first.hit("k", rate=1, burst=2) > 0
+    assert len(second) == 1
+    assert first.client.pttl("test:k") > 0
+
+
+def test_middleware_limits_by_query_and_body_keys():
+    limiter = RateLimiter(
+        {
+            "GET /items": {"service_account_phone": (0.001, 2)},
+            "POST /items": {"user_phone": (0.001, 1), "ip": (1000.0, 1000)},
+        }
+    )
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    @app.get("/items")
+    async def read_items(service_account_phone: str):
+        return {"ok": True}
+
+    @app.post("/items")
+    async def create_item(request: Request):
+        return await request.json()
+
+    client = TestClient(app)
+    params = {"service_account_phone": "+5511987654323"}
+    assert client.get("/items", params=params).status_code == 200
+    assert client.get("/items", params=params).status_code == 200
+    response = client.get("/items", params=params)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    other = {"service_account_phone": "+5511987654324"}
+    assert client.get("/items", params=other).status_code == 200
+
+    body = {"user_phone": "+5511987654321", "note": "kept"}
+    response = client.post("/items", json=body)
+    assert response.status_code == 200
+    assert response.json() == body
+    assert client.post("/items", json=body).status_code == 429
+    assert (
+        client.post("/items", json={"user_phone": "+5511987654322"}).status_code == 200
+    )
+
+    assert limiter.stats()["limited"] == 2
+
+
+def test_booking_loop_is_rate_limited(client, user_phone, service_account_phone):
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    statuses = [
+        client.post(
+            "/appointments/",
+            json={
+                "user_phone": user_phone,
+                "service_account_phone": service_account_phone,
+                "appointment_date": tomorrow.isoformat(),
+            },
+        ).status_code
+        for _ in range(8)
+    ]
+    assert statuses[0] == 201
+    assert statuses[-1] == 429
+    assert client.get("/internal/rate-limits").json()["data"]["limited"] > 0
@@ -0,0 +1,137 @@
+"""
+Tests for the synthetic dataset seeding command.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.backend.migrations import upgrade_database
+from app.commands.seed import seed_database, service_account_phone, user_phone
+from app.models.appointment import Appointment
+from app.services import AppointmentService
+
+
+NOW = datetime(2030, 1, 15)
+
+
+@pytest.fixture
+def seed_engine(tmp_path):
+    def make(name: str):
+        engine = create_engine(f"sqlite:///{tmp_path / name}")
+        upgrade_database(engine)
+        engines.append(engine)
+        return engine
+
+    engines = []
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+
+def _dump(engine) -> list:
+    with engine.connect() as connection:
+        return [
+            connection.execute(text(f"SELECT * FROM {table} ORDER BY 1, 2")).all()
+            for table in (
+                "users",
+                "service_accounts",
+                "appointments",
+                "appointment_events",
+            )
+        ]
+
+
+def test_seed_is_deterministic(seed_engine):
+    first, second, other = seed_engine("a.db"), seed_engine("b.db"), seed_engine("c.db")
+    for engine in (first, second):
+        seed_database(
+            engine,
+            users=50,
+            service_accounts=5,
+            appointments=500,
+            now=NOW,
+            batch_size=64,
+        )
+    seed_database(
+        other, users=50, service_accounts=5, appointments=500, now=NOW, seed=7
+    )
+
+    assert _dump(first) == _dump(second)
+    assert _dump(first)[2] != _dump(other)[2]
+
+
+def test_seed_distributions(seed_engine):
+    engine = seed_engine("waitlist.db")
+
+    counts = seed_database(
+        engine,
+        users=200,
+        service_accounts=20,
+        appointments=4000,
+        now=NOW,
+        cancel_rate=0.2,
+        no_show_rate=0.1,
+    )
+
+    with engine.connect() as connection:
+        statuses = dict(
+            connection.execute(
+                text("SELECT status, COUNT(*) FROM appointments GROUP BY status")
+            ).all()
+        )
+        by_account = connection.execute(
+            text(
+                "SELECT service_account_phone, COUNT(*) FROM appointments "
+                "GROUP BY service_account_phone ORDER BY 2 DESC"
+            )
+        ).all()
+        duplicate_bookings = connection.execute(
+            text(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM appointments WHERE status = 'ACTIVE' "
+                "GROUP BY user_phone, date(appointment_date) HAVING COUNT(*) > 1)"
+            )
+        ).scalar()
+        stats_total = connection.execute(
+            text("SELECT SUM(total) FROM daily_appointment_stats")
+        ).scalar()
+        change_seq = connection.execute(
+            text("SELECT MAX(change_seq) FROM appointments")
+        ).scalar()
+        active_in_past = connection.execute(
+            text(
+                "SELECT COUNT(*) FROM appointments WHERE status = 'ACTIVE' AND appointment_date < :now"
+            ),
+            {"now": NOW.isoformat(" ")},
+        ).scalar()
+
+    settled = counts["appointments"] - statuses["ACTIVE"]
+    assert 0.15 < statuses["CANCELED"] / settled < 0.25
+    assert 0.05 < statuses["NO_SHOW"] / settled < 0.15
+    assert 0.2 < statuses["ACTIVE"] / counts["appointments"] < 0.4
+    assert by_account[0][0] == service_account_phone(0)
+    assert by_account[0][1] > 3 * by_account[-1][1]
+    assert duplicate_bookings == 0
+    assert active_in_past == 0
+    assert stats_total == 4000
+    assert change_seq == counts["appointment_events"] == 4000 + settled
+
+    with Session(engine) as db:
+        # The seeded history feeds the penalty of new bookings.
+        assert (
+            AppointmentService.calculate_user_penalty(
+                db, user_phone(0), service_account_phone(0)
+            )
+            >= 0
+        )
+        assert db.get(Appointment, 1).user_phone == user_phone(0)
+
+
+def test_seed_refuses_non_empty_database(seed_engine):
+    engine = seed_engine("waitlist.db")
+    seed_database(engine, users=1, service_accounts=1, appointments=1, now=NOW)
+
+    with pytest.raises(ValueError, match="already has users"):
+        seed_database(engine, users=1, service_accounts=1, appointments=1, now=NOW)
@@ -0,0 +1,149 @@
+"""
+Tests for the production server command.
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+from app.commands import serve
+from app.commands.serve import (
+    WORKER_BOOT_ERROR,
+    WorkerPool,
+    check_workers,
+    default_workers,
+)
+from app.config import settings, CacheBackendType
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_serving(url: str, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        assert process.poll() is None, process.stdout.read()
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    pytest.fail("Server did not start")
+
+
+@pytest.fixture
+def server(tmp_path):
+    port = _free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tmp_path / 'waitlist.db'}",
+        DATABASE_MIGRATE_ON_STARTUP="true",
+        WORKER_ALLOW_LOCAL_STATE="true",
+    )
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "app.commands.serve",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            "2",
+            "--max-requests",
+            "3",
+            "--max-requests-jitter",
+            "0",
+            "--graceful-timeout",
+            "5",
+        ],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    url = f"http://127.0.0.1:{port}/"
+    # Probe the metrics endpoint so a slow first response that times out
+    # and is retried does not show up in the counts of ``/``.
+    _wait_until_serving(url + "metrics", process)
+    yield process, url
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+
+
+def test_default_workers_matches_cpus():
+    assert default_workers() >= 1
+
+
+def test_worker_failing_to_build_its_server_reports_boot_error(monkeypatch):
+    import uvicorn
+
+    def broken_config(*args, **kwargs):
+        raise TypeError("unexpected keyword argument")
+
+    monkeypatch.setattr(uvicorn, "Config", broken_config)
+    monkeypatch.setattr(serve.signal, "signal", lambda *args: None)
+    with socket.socket() as sock:
+        pool = WorkerPool(sock, workers=1, preload=False)
+        assert pool._run_worker() == WORKER_BOOT_ERROR
+
+
+def test_memory_backends_fall_back_to_one_worker(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "CACHE_BACKEND", CacheBackendType.MEMORY)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", CacheBackendType.REDIS)
+    assert check_workers(4) == 1
+    assert "CACHE_BACKEND set to memory" in caplog.text
+
+    monkeypatch.setattr(settings, "CACHE_BACKEND", CacheBackendType.TIERED)
+    assert check_workers(4) == 4
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", CacheBackendType.MEMORY)
+    assert check_workers(4) == 1
+    monkeypatch.setattr(settings, "WORKER_ALLOW_LOCAL_STATE", True)
+    assert check_workers(4) == 4
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_workers_are_recycled_and_drained(server):
+    process, url = server
+
+    # Well beyond what 2 workers serve before recycling. A connection
+    # accepted by a worker as it exits is closed unanswered, like an idle
+    # keep-alive connection, so the request is retried once.
+    retries = 0
+    for _ in range(20):
+        try:
+            response = httpx.get(url, headers={"Connection": "close"}, timeout=5)
+        except httpx.RemoteProtocolError:
+            retries += 1
+            response = httpx.get(url, headers={"Connection": "close"}, timeout=5)
+        assert response.status_code == 200
+
+    # Every worker, recycled or alive, is counted once its snapshot is
+    # flushed. A retried request may have been served before its
+    # connection was dropped.
+    time.sleep(1.5)
+    metrics = httpx.get(url + "metrics", timeout=5).text
+    served = next(
+        float(line.rsplit(" ", 1)[1])
+        for line in metrics.splitlines()
+        if line.startswith('waitlist_http_requests_total{method="GET",route="/",')
+    )
+    assert 20 <= served <= 20 + retries
+
+    process.send_signal(signal.SIGTERM)
+    output, _ = process.communicate(timeout=15)
+
+    assert process.returncode == 0
+    assert output.count("Started worker") > 2
@@ -2,6 +2,21 @@
 Service account routers tests.
 """
 
+import csv
+import io
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.base import Base
+from app.models.service_account import ServiceAccount
+from app.services import AppointmentService, StatsService
+
 
 def test_create_service_account(client):
     response = client.post(
@@ -150,3 +165,183 @@ def test_delete_service_account(client):
 
     response = client.get(f"/service-accounts/{service_phone}")
     assert response.status_code == 404
+
+
+def test_export_service_account_appointments(
+    client, user_phone, second_user_phone, service_account_phone
+):
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    for phone in [user_phone, second_user_phone]:
+        response = client.post(
+            "/appointments/",
+            json={
+                "user_phone": phone,
+                "service_account_phone": service_account_phone,
+                "appointment_date": tomorrow.isoformat(),
+            },
+        )
+        assert response.status_code == 201
+
+    response = client.get(
+        f"/service-accounts/{service_account_phone}/appointments/export"
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["user_phone"] for row in rows] == [user_phone, second_user_phone]
+    assert rows[0]["status"] == "active"
+
+    response = client.get(
+        f"/service-accounts/{service_account_phone}/appointments/export",
+        params={"format": "csv"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 2
+    assert rows[1]["user_phone"] == second_user_phone
+
+
+def test_export_nonexistent_service_account(client):
+    response = client.get("/service-accounts/+9999999999/appointments/export")
+    assert response.status_code == 404
+
+
+def test_claim_next_appointment(
+    client, user_phone, second_user_phone, service_account_phone
+):
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    appointment_ids = []
+    for phone in [user_phone, second_user_phone]:
+        response = client.post(
+            "/appointments/",
+            json={
+                "user_phone": phone,
+                "service_account_phone": service_account_phone,
+                "appointment_date": tomorrow.isoformat(),
+            },
+        )
+        appointment_ids.append(response.json()["data"]["id"])
+
+    claimed = []
+    for _ in appointment_ids:
+        response = client.post(f"/service-accounts/{service_account_phone}/queue/next")
+        assert response.status_code == 200
+        assert response.json()["data"]["status"] == "completed"
+        claimed.append(response.json()["data"]["id"])
+    assert claimed == appointment_ids
+
+    response = client.post(f"/service-accounts/{service_account_phone}/queue/next")
+    assert response.status_code == 404
+
+    response = client.post("/service-accounts/+9999999999/queue/next")
+    assert response.status_code == 404
+    assert "Service account" in response.json()["detail"]
+
+
+def test_claim_next_appointment_concurrent_claimers(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'claims.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    service_phone = "+5511987654399"
+    total = 200
+    now = datetime.now(timezone.utc)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(ServiceAccount.__table__),
+            [{"name": "Busy Service", "phone": service_phone}],
+        )
+        connection.execute(
+            insert(Appointment.__table__),
+            [
+                {
+                    "user_phone": f"+55119{i:08d}",
+                    "service_account_phone": service_phone,
+                    "appointment_date": now + timedelta(days=1),
+                    "status": AppointmentStatus.ACTIVE,
+                    "created_at": now - timedelta(seconds=i),
+                    "penalty": 0.0,
+                }
+                for i in range(total)
+            ],
+        )
+
+    claimed = []
+    errors = []
+
+    def claimer():
+        db = session_local()
+        try:
+            while True:
+                try:
+                    appointment = AppointmentService.claim_next_appointment(
+                        db, service_phone
+                    )
+                except HTTPException:
+                    return
+                claimed.append(appointment.id)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=claimer) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    assert errors == []
+    assert len(claimed) == total
+    assert len(set(claimed)) == total
+
+
+def test_service_account_daily_stats(
+    client, test_session_local, user_phone, second_user_phone, service_account_phone
+):
+    day = datetime.now(timezone.utc) + timedelta(days=1)
+    appointment_ids = []
+    for phone in [user_phone, second_user_phone]:
+        response = client.post(
+            "/appointments/",
+            json={
+                "user_phone": phone,
+                "service_account_phone": service_account_phone,
+                "appointment_date": day.isoformat(),
+            },
+        )
+        appointment_ids.append(response.json()["data"]["id"])
+
+    client.delete(f"/appointments/{appointment_ids[0]}")
+    client.post(f"/service-accounts/{service_account_phone}/queue/next")
+
+    params = {
+        "from": day.date().isoformat(),
+        "to": (day + timedelta(days=1)).date().isoformat(),
+    }
+    response = client.get(
+        f"/service-accounts/{service_account_phone}/stats", params=params
+    )
+    assert response.status_code == 200
+    incremental = response.json()["data"]
+    assert incremental[0]["total"] == 2
+    assert incremental[0]["active"] == 0
+    assert incremental[0]["canceled"] == 1
+    assert incremental[0]["completed"] == 1
+    assert incremental[1]["total"] == 0
+
+    db = test_session_local()
+    try:
+        assert StatsService.rebuild(db) == 1
+    finally:
+        db.close()
+
+    response = client.get(
+        f"/service-accounts/{service_account_phone}/stats", params=params
+    )
+    assert response.json()["data"] == incremental
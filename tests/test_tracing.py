@@ -0,0 +1,180 @@
+"""
+Tracing tests.
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.backend.tracing import (
+    SPAN_KIND_CLIENT,
+    SPAN_KIND_SERVER,
+    FileSpanExporter,
+    InMemorySpanExporter,
+    Span,
+    parse_traceparent,
+    tracer,
+    wrap_static_methods,
+)
+from app.services import AppointmentService, ServiceAccountService, UserService
+
+
+TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = InMemorySpanExporter()
+    monkeypatch.setattr(tracer, "enabled", True)
+    monkeypatch.setattr(tracer, "sample_rate", 1.0)
+    monkeypatch.setattr(tracer, "exporter", exporter)
+    for cls in (AppointmentService, ServiceAccountService, UserService):
+        for name, method in wrap_static_methods(cls).items():
+            monkeypatch.setattr(cls, name, method)
+    return exporter
+
+
+def _book(client, user_phone, service_account_phone, **kwargs):
+    return client.post(
+        "/appointments/",
+        json={
+            "user_phone": user_phone,
+            "service_account_phone": service_account_phone,
+            "appointment_date": (
+                datetime.now(timezone.utc) + timedelta(days=1)
+            ).isoformat(),
+        },
+        **kwargs,
+    )
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(TRACEPARENT) == (
+        "4bf92f3577b34da6a3ce929d0e0e4736",
+        "00f067aa0ba902b7",
+        True,
+    )
+    assert (
+        parse_traceparent("00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-00")[2]
+        is False
+    )
+    assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+    assert parse_traceparent("garbage") is None
+
+
+def test_booking_trace_continues_incoming_context(
+    client, user_phone, service_account_phone, exporter
+):
+    exporter.clear()
+
+    response = _book(
+        client, user_phone, service_account_phone, headers={"traceparent": TRACEPARENT}
+    )
+
+    assert response.status_code == 201
+    spans = {span.name: span for span in exporter.spans}
+    server = spans["POST /appointments/"]
+    assert server.kind == SPAN_KIND_SERVER
+    assert server.parent_id == "00f067aa0ba902b7"
+    assert server.attributes["http.response.status_code"] == 201
+    assert {span.trace_id for span in exporter.spans} == {
+        "4bf92f3577b34da6a3ce929d0e0e4736"
+    }
+
+    create = spans["AppointmentService.create_appointment"]
+    assert create.parent_id == server.span_id
+    assert (
+        spans["AppointmentService.calculate_user_penalty"].parent_id == create.span_id
+    )
+    statements = [span for span in exporter.spans if span.kind == SPAN_KIND_CLIENT]
+    assert statements
+    assert any(
+        span.name == "INSERT" and span.parent_id == create.span_id
+        for span in statements
+    )
+    assert all(span.start_ns <= span.end_ns for span in exporter.spans)
+
+
+def test_unsampled_requests_record_nothing(
+    client, user_phone, service_account_phone, exporter, monkeypatch
+):
+    monkeypatch.setattr(tracer, "sample_rate", 0.0)
+    exporter.clear()
+
+    assert client.get(f"/users/{user_phone}").status_code == 200
+    # The caller's sampling decision wins over the local rate.
+    unsampled = TRACEPARENT[:-2] + "00"
+    assert (
+        _book(
+            client,
+            user_phone,
+            service_account_phone,
+            headers={"traceparent": unsampled},
+        ).status_code
+        == 201
+    )
+    assert exporter.spans == []
+
+    client.get(f"/users/{user_phone}", headers={"traceparent": TRACEPARENT})
+    assert exporter.spans
+
+
+def test_file_exporter_writes_otlp_json(
+    tmp_path, client, user_phone, exporter, monkeypatch
+):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracer, "exporter", FileSpanExporter(str(path), "waitlist-api"))
+
+    client.get(f"/users/{user_phone}")
+    client.get("/unknown")
+    tracer.exporter.flush()
+
+    requests = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(requests) == 2
+    (resource_spans,) = requests[0]["resourceSpans"]
+    assert resource_spans["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": "waitlist-api"}}
+    ]
+    spans = resource_spans["scopeSpans"][0]["spans"]
+    server = next(span for span in spans if span["kind"] == SPAN_KIND_SERVER)
+    assert server["name"] == "GET /users/{phone}"
+    assert {"key": "http.route", "value": {"stringValue": "/users/{phone}"}} in server[
+        "attributes"
+    ]
+    assert int(server["endTimeUnixNano"]) >= int(server["startTimeUnixNano"])
+    assert (
+        requests[1]["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"]
+        == "GET unmatched"
+    )
+
+
+def test_file_exporter_writes_off_the_calling_thread(tmp_path, monkeypatch):
+    writers = []
+    real_open = open
+
+    def recording_open(*args, **kwargs):
+        writers.append(threading.current_thread().name)
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", recording_open)
+    exporter = FileSpanExporter(str(tmp_path / "traces.jsonl"), "waitlist-api")
+    exporter.export([Span("GET /", SPAN_KIND_SERVER, "1" * 32, None, None, {})])
+    exporter.flush()
+
+    assert writers == ["trace-export"]
+    assert len((tmp_path / "traces.jsonl").read_text().splitlines()) == 1
+
+
+def test_wrap_static_methods_skips_private_methods():
+    class Service:
+        @staticmethod
+        def public():
+            return 1
+
+        @staticmethod
+        def _helper():
+            return 2
+
+    assert list(wrap_static_methods(Service)) == ["public"]